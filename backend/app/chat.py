@@ -1,189 +1,83 @@
 from fastapi import APIRouter, Request
-from services.supabase import fetch_chat_history, save_chat
+from fastapi.responses import JSONResponse, StreamingResponse
+from services.supabase import chat_history_cache, save_chat
 from services.model_selector import select_model
 from services.langchain.agent import ask_disha_with_tools
-from services.bedrock import ask_bedrock
-from services.bias_detector import is_gender_biased
-from services.context_manager import EphemeralContextManager
-from datetime import datetime
+from services.bedrock import ask_bedrock, stream_bedrock, is_guardrail_reply
+from services.bias_detector import is_gender_biased, detect_gender_bias_batch
+from services.context_manager import context_manager
+from services.context_builder import context_builder
+from services.career_gate import is_career_related
+from services.pii_scrubber import scrub_pii, StreamScrubber
+from services.executor import run_blocking
+from services.response_cache import response_cache, is_cacheable_reply
+from services.single_flight import reply_flight
+from services.metrics import stage_timer, SHORT_CIRCUITS, STAGE_SECONDS
+import asyncio
 import hashlib
+import json
+import os
 import time
-import re
 
 router = APIRouter()
 
 FALLBACK_GUARDRAIL_RESPONSE = "Sorry, I can't help with that. Let's focus on career-related questions instead."
-context_manager = EphemeralContextManager()
 
-def is_career_related(text: str) -> bool:
-    text_lower = text.lower().strip()
+BATCH_MAX_ITEMS = int(os.getenv("BATCH_MAX_ITEMS", "100"))
+BATCH_CONCURRENCY = int(os.getenv("BATCH_CONCURRENCY", "8"))
+BATCH_MAX_CONCURRENCY = int(os.getenv("BATCH_MAX_CONCURRENCY", "32"))
 
-    if is_explicitly_non_career(text_lower):
-        return False
-
-    if contains_career_keywords_or_phrases(text_lower):
-        return True
-
-    if is_question_with_career_context(text_lower):
-        return True
-
-    if is_list_request_for_career_topics(text_lower):
-        return True
-
-    return False
-
-
-def is_explicitly_non_career(text: str) -> bool:
-    non_career_topics = get_non_career_topics()
-    list_patterns = get_list_patterns()
+@router.post("/")
+async def chat_endpoint(request: Request):
+    start_time = time.time()
+    data = await request.json()
+    prompt = data.get("message")
+    session_id = data.get("session_id", "anonymous")
+    user_id = data.get("user_id", "default_user")
+    is_guest = data.get("is_guest", False)
 
-    for pattern in list_patterns:
-        if re.match(pattern, text) and not contains_career_terms(text):
-            if any(topic in text for topic in non_career_topics):
-                return True
+    if not prompt:
+        return {"error": "No message provided"}
 
-    for topic in non_career_topics:
-        if topic in text and len(text.split()) < 10:
-            return True
+    clean_prompt, guard_response = await run_guards(prompt)
+    if guard_response:
+        return guard_response
 
-    for topic_phrase in [f"tell me about {topic}" for topic in non_career_topics]:
-        if topic_phrase in text:
-            return True
+    anon_id = generate_anonymous_id(request, session_id)
+    with stage_timer("context_fetch"):
+        messages = await run_blocking(prepare_context_messages, clean_prompt, anon_id, user_id, is_guest)
+
+    cache_key = response_cache.make_key(clean_prompt, messages)
+    cacheable = is_cacheable_prompt(clean_prompt)
+    clean_reply_text = response_cache.get(cache_key) if cacheable else None
+    guardrail_intervened = False
+
+    if clean_reply_text is None:
+        try:
+            reply_text, guardrail_intervened = await generate_shared_reply(cache_key, clean_prompt, messages, anon_id)
+        except Exception as e:
+            return {"error": str(e), "processing_time_ms": int((time.time() - start_time) * 1000)}
+
+        with stage_timer("scrub"):
+            clean_reply_text = scrub_pii(reply_text)
+        if cacheable and is_cacheable_reply(clean_reply_text, guardrail_intervened):
+            response_cache.put(cache_key, clean_reply_text)
+
+    if guardrail_intervened:
+        SHORT_CIRCUITS.inc(reason="guardrail")
+    else:
+        with stage_timer("persistence"):
+            await run_blocking(store_context_data, clean_prompt, clean_reply_text, anon_id, user_id, is_guest)
 
-    return False
+    return {
+        "reply": clean_reply_text,
+        "guardrail_intervened": guardrail_intervened,
+        "processing_time_ms": int((time.time() - start_time) * 1000)
+    }
 
 
-def contains_career_keywords_or_phrases(text: str) -> bool:
-    career_keywords = get_career_keywords()
-    career_phrases = get_career_phrases()
-
-    if any(keyword in text for keyword in career_keywords):
-        return True
-
-    if any(phrase in text for phrase in career_phrases):
-        return True
-
-    return False
-
-
-def is_question_with_career_context(text: str) -> bool:
-    question_starters = ["how", "what", "when", "where", "why", "who", "can"]
-    non_career_topics = get_non_career_topics()
-
-    if any(text.startswith(starter) for starter in question_starters):
-        if any(f"{starter} {topic}" in text for starter in question_starters for topic in non_career_topics):
-            return False
-        return True
-
-    return False
-
-
-def is_list_request_for_career_topics(text: str) -> bool:
-    if ("list" in text or "show" in text) and contains_career_terms(text):
-        return True
-    return False
-
-
-def contains_career_terms(text: str) -> bool:
-    career_terms = ["job", "career", "skill", "course", "training", "resume", "cv", "company", "opportunity"]
-    return any(term in text for term in career_terms)
-
-
-def get_non_career_topics() -> list:
-    return [
-        "movie", "film", "cinema", "imdb", "rating", "actor", "actress", "director", "box office",
-        "song", "music", "album", "band", "singer", "concert", "lyrics", "playlist",
-        "medicine", "medical", "health", "doctor", "anxiety", "depression", "therapy", "drug", "pill",
-        "game", "play", "sport", "team", "athlete", "football", "basketball", "baseball",
-        "recipe", "food", "cook", "restaurant", "celebrity", "politics", "news", "weather",
-        "tv show", "book", "novel", "story", "poem", "religion", "god", "birthday", "wedding",
-        "dating", "relationship", "breakup", "girlfriend", "boyfriend", "prayer", "worship",
-        "travel", "vacation", "holiday", "flight", "tickets", "hotel", "tourism",
-        "anime", "manga", "comic", "superhero", "marvel", "dc", "pet", "dog", "cat"
-    ]
-
-
-def get_list_patterns() -> list:
-    return [
-        r"list of .+",
-        r"list .+ songs",
-        r"list .+ movies",
-        r"show me .+ list",
-        r"give me list of .+",
-        r"what are the .+ songs",
-        r"top \d+ .+"
-    ]
-
-
-def get_career_keywords() -> list:
-    return [
-        "job", "career", "resume", "cv", "interview", "skill", "profession",
-        "workplace", "salary", "hiring", "mentor", "education", "degree",
-        "certification", "industry", "employment", "work", "company",
-        "position", "role", "application", "promotion", "leadership",
-        "professional", "business", "office", "team", "manager", "experience",
-        "recruit", "talent", "hr", "human resources", "training", "development",
-        "coaching", "remote", "hybrid", "office", "startup", "corporate",
-        "tech", "technology", "software", "engineering", "developer", "design",
-        "marketing", "finance", "project", "product", "data", "analyst",
-        "portfolio", "network", "networking", "opportunity", "growth", "learn",
-        "job search", "job market", "gap", "break", "returning", "workforce"
-    ]
-
-
-def get_career_phrases() -> list:
-    return [
-        "going back to work", "return to work", "change my career",
-        "looking for a job", "find a job", "get hired", "get a job",
-        "career change", "earn more", "switch careers", "career advice",
-        "professional advice", "working parent", "working mother", "working father",
-        "stay at home", "maternity leave", "paternity leave", "career break",
-        "employment gap", "resume gap", "returning to workforce", "career transition"
-    ]
-
-def scrub_pii(text: str) -> str:
-  
-    # Email pattern
-    text = re.sub(r'[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}', '[EMAIL REDACTED]', text)
-    
-    # Phone number patterns (various formats)
-    # Simplified phone number patterns
-    phone_patterns = [
-        r'\b\+\d{1,3}[\s-]?\(?\d{3}\)?[\s.-]?\d{3}[\s.-]?\d{4}\b',  # International format
-        r'\b\(?\d{3}\)?[\s.-]?\d{3}[\s.-]?\d{4}\b'  # Local format
-    ]
-    for pattern in phone_patterns:
-        text = re.sub(pattern, '[PHONE REDACTED]', text)
-    
-    # Social security / ID number patterns
-    text = re.sub(r'\b\d{3}[-\s]?\d{2}[-\s]?\d{4}\b', '[ID REDACTED]', text)
-    
-    # URLs with potential user IDs
-    text = re.sub(r'https?://[^\s/]+/(?:user|profile|account|u)/[a-zA-Z0-9_-]+', '[URL REDACTED]', text)
-    
-    # Physical addresses (simplified pattern)
-    address_patterns = [
-        r'\b\d+\s+[A-Za-z0-9\s,]+(?:Avenue|Ave|Street|St|Road|Rd)\b',
-        r'\b\d+\s+[A-Za-z0-9\s,]+(?:Boulevard|Blvd|Lane|Ln|Drive|Dr)\b',
-        r'\b\d+\s+[A-Za-z0-9\s,]+(?:Way|Court|Ct|Plaza|Square|Sq)\b',
-        r'\b\d+\s+[A-Za-z0-9\s,]+(?:Trail|Tr|Parkway|Pkwy|Circle|Cir)\b'
-    ]
-    for pattern in address_patterns:
-        text = re.sub(pattern, '[ADDRESS REDACTED]', text)
-    
-    # WhatsApp/Telegram number patterns
-    text = re.sub(r'\b(?:whatsapp|telegram|signal|viber)(?:\s+at)?\s+[+]?\d[0-9\s-]{7,}', '[CONTACT REDACTED]', text)
-    
-    # LinkedIn profile patterns
-    text = re.sub(r'linkedin\.com/in/[a-zA-Z0-9_-]+', '[LINKEDIN REDACTED]', text)
-    
-    # Other social media handles
-    text = re.sub(r'@\w{2,}', '[SOCIAL MEDIA HANDLE REDACTED]', text)
-    
-    return text
-
-@router.post("/")
-async def chat_endpoint(request: Request):
+@router.post("/stream")
+async def chat_stream_endpoint(request: Request):
     start_time = time.time()
     data = await request.json()
     prompt = data.get("message")
@@ -194,32 +88,199 @@ async def chat_endpoint(request: Request):
     if not prompt:
         return {"error": "No message provided"}
 
-    clean_prompt = scrub_pii(prompt)
-
-    if not is_career_related(clean_prompt):
-        return generate_career_related_response()
+    clean_prompt, guard_response = await run_guards(prompt)
+    if guard_response:
+        return sse_response(single_reply_events(guard_response))
 
     anon_id = generate_anonymous_id(request, session_id)
-    if is_gender_biased(clean_prompt):
-        return generate_gender_bias_response()
+    with stage_timer("context_fetch"):
+        messages = await run_blocking(prepare_context_messages, clean_prompt, anon_id, user_id, is_guest)
+
+    return sse_response(stream_reply_events(clean_prompt, messages, anon_id, user_id, is_guest, start_time))
+
+
+@router.post("/batch")
+async def chat_batch_endpoint(request: Request):
+    start_time = time.time()
+    data = await request.json()
+    prompts = data.get("messages") or []
+    if not isinstance(prompts, list) or not prompts:
+        return bad_request("No messages provided")
+    if len(prompts) > BATCH_MAX_ITEMS:
+        return bad_request(f"At most {BATCH_MAX_ITEMS} messages per batch")
+    concurrency = data.get("concurrency", BATCH_CONCURRENCY)
+    if isinstance(concurrency, bool) or not isinstance(concurrency, int) or concurrency < 1:
+        return bad_request("concurrency must be a positive integer")
+
+    concurrency = min(concurrency, BATCH_MAX_CONCURRENCY)
+    results = [None] * len(prompts)
+
+    # Cheap guards run over the whole batch in one pass
+    clean_prompts = []
+    with stage_timer("scrub"):
+        for prompt in prompts:
+            text = prompt.get("message") if isinstance(prompt, dict) else prompt
+            clean_prompts.append(scrub_pii(text) if isinstance(text, str) and text else None)
+
+    survivors = []
+    with stage_timer("career_gate"):
+        for i, clean_prompt in enumerate(clean_prompts):
+            if clean_prompt is None:
+                results[i] = {"index": i, "error": "No message provided"}
+            elif not is_career_related(clean_prompt):
+                SHORT_CIRCUITS.inc(reason="career_gate")
+                results[i] = {"index": i, **generate_career_related_response(), "processing_time_ms": 0}
+            else:
+                survivors.append(i)
+
+    with stage_timer("bias_check"):
+        biased = await run_blocking(detect_gender_bias_batch, [clean_prompts[i] for i in survivors])
+    model_items = []
+    for i, is_biased in zip(survivors, biased):
+        if is_biased:
+            SHORT_CIRCUITS.inc(reason="gender_bias")
+            results[i] = {"index": i, **generate_gender_bias_response(), "processing_time_ms": 0}
+        else:
+            model_items.append(i)
+
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def answer(i):
+        async with semaphore:
+            results[i] = await answer_batch_item(i, clean_prompts[i])
+
+    await asyncio.gather(*(answer(i) for i in model_items))
+
+    return {
+        "results": results,
+        "concurrency": concurrency,
+        "processing_time_ms": int((time.time() - start_time) * 1000)
+    }
+
 
-    messages = prepare_context_messages(clean_prompt, anon_id, user_id, is_guest)
+async def answer_batch_item(index, clean_prompt):
+    # Batch items are answered independently, without session context or persistence
+    item_start = time.time()
+    messages = [{"role": "user", "content": clean_prompt}]
+    cache_key = response_cache.make_key(clean_prompt, messages)
+    cacheable = is_cacheable_prompt(clean_prompt)
+    clean_reply_text = response_cache.get(cache_key) if cacheable else None
+    guardrail_intervened = False
+
+    if clean_reply_text is None:
+        try:
+            reply_text, guardrail_intervened = await generate_shared_reply(cache_key, clean_prompt, messages, "batch")
+        except Exception as e:
+            return {"index": index, "error": str(e), "processing_time_ms": int((time.time() - item_start) * 1000)}
+        clean_reply_text = scrub_pii(reply_text)
+        if cacheable and is_cacheable_reply(clean_reply_text, guardrail_intervened):
+            response_cache.put(cache_key, clean_reply_text)
+
+    if guardrail_intervened:
+        SHORT_CIRCUITS.inc(reason="guardrail")
+
+    return {
+        "index": index,
+        "reply": clean_reply_text,
+        "guardrail_intervened": guardrail_intervened,
+        "processing_time_ms": int((time.time() - item_start) * 1000)
+    }
+
+
+async def run_guards(prompt):
+    with stage_timer("scrub"):
+        clean_prompt = scrub_pii(prompt)
+
+    with stage_timer("career_gate"):
+        career_related = is_career_related(clean_prompt)
+    if not career_related:
+        SHORT_CIRCUITS.inc(reason="career_gate")
+        return clean_prompt, generate_career_related_response()
+
+    with stage_timer("bias_check"):
+        biased = await run_blocking(is_gender_biased, clean_prompt)
+    if biased:
+        SHORT_CIRCUITS.inc(reason="gender_bias")
+        return clean_prompt, generate_gender_bias_response()
+
+    return clean_prompt, None
+
+
+def bad_request(error):
+    return JSONResponse({"error": error}, status_code=400)
+
+
+def sse_response(events):
+    return StreamingResponse(
+        events,
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+def sse_event(event, payload):
+    return f"event: {event}\ndata: {json.dumps(payload)}\n\n"
+
+
+async def single_reply_events(response):
+    yield sse_event("done", response)
+
+
+async def stream_reply_events(clean_prompt, messages, anon_id, user_id, is_guest, start_time, client=None):
+    scrubber = StreamScrubber()
+    guardrail_intervened = False
+    cache_key = response_cache.make_key(clean_prompt, messages)
+    cacheable = is_cacheable_prompt(clean_prompt)
+    cached_reply = response_cache.get(cache_key) if cacheable else None
 
     try:
-        reply_text, guardrail_intervened = generate_reply(clean_prompt, messages)
+        if cached_reply is not None:
+            yield sse_event("delta", {"text": scrubber.feed(cached_reply) + scrubber.flush()})
+        elif needs_tool_agent(clean_prompt):
+            with stage_timer("tool_agent"):
+                reply_text = await run_blocking(ask_disha_with_tools, clean_prompt)
+            yield sse_event("delta", {"text": scrubber.feed(reply_text) + scrubber.flush()})
+        else:
+            stream_started = time.perf_counter()
+            events = await run_blocking(stream_bedrock, messages, client, anon_id)
+            try:
+                while True:
+                    event = await run_blocking(next, events, None)
+                    if event is None:
+                        break
+                    if event["type"] == "guardrail":
+                        guardrail_intervened = True
+                        continue
+                    text = scrubber.feed(event["text"])
+                    if text:
+                        yield sse_event("delta", {"text": text})
+            finally:
+                # Frees the admission slot as soon as the client goes away
+                events.close()
+            text = scrubber.flush()
+            if text:
+                yield sse_event("delta", {"text": text})
+            STAGE_SECONDS.observe(time.perf_counter() - stream_started, stage="bedrock")
+            guardrail_intervened = guardrail_intervened or is_guardrail_reply(scrubber.text())
     except Exception as e:
-        return {"error": str(e), "processing_time_ms": int((time.time() - start_time) * 1000)}
+        yield sse_event("error", {"error": str(e), "processing_time_ms": int((time.time() - start_time) * 1000)})
+        return
 
-    clean_reply_text = scrub_pii(reply_text)
+    clean_reply_text = scrubber.text()
+    if cacheable and cached_reply is None and is_cacheable_reply(clean_reply_text, guardrail_intervened):
+        response_cache.put(cache_key, clean_reply_text)
 
-    if not guardrail_intervened:
-        store_context_data(clean_prompt, clean_reply_text, anon_id, user_id, is_guest)
+    if guardrail_intervened:
+        SHORT_CIRCUITS.inc(reason="guardrail")
+    else:
+        with stage_timer("persistence"):
+            await run_blocking(store_context_data, clean_prompt, clean_reply_text, anon_id, user_id, is_guest)
 
-    return {
+    yield sse_event("done", {
         "reply": clean_reply_text,
         "guardrail_intervened": guardrail_intervened,
         "processing_time_ms": int((time.time() - start_time) * 1000)
-    }
+    })
 
 
 def generate_career_related_response():
@@ -252,53 +313,54 @@ def generate_gender_bias_response():
 
 
 def prepare_context_messages(clean_prompt, anon_id, user_id, is_guest):
-    messages = []
     if not is_guest:
-        messages = fetch_authenticated_user_context(anon_id, user_id)
+        turns = fetch_authenticated_user_context(anon_id, user_id)
     else:
-        messages = fetch_guest_user_context(anon_id)
-    messages.append({"role": "user", "content": clean_prompt})
+        turns = fetch_guest_user_context(anon_id)
+    messages, _ = context_builder.build(anon_id, turns, clean_prompt)
     return messages
 
 
 def fetch_authenticated_user_context(anon_id, user_id):
-    messages = []
     ephemeral_context = context_manager.get_context(anon_id)
-    past = fetch_chat_history(user_id, limit=5)
-    messages = add_context_messages(ephemeral_context, messages)
-    if not messages and past:
-        messages = add_context_messages(reversed(past[-6:]), messages)
-    return messages
+    if ephemeral_context:
+        return ephemeral_context
+    return chat_history_cache.get(user_id, limit=5)
 
 
 def fetch_guest_user_context(anon_id):
-    messages = []
-    ephemeral_context = context_manager.get_context(anon_id)
-    return add_context_messages(ephemeral_context, messages)
-
-
-def add_context_messages(context, messages):
-    context_list = list(context)
-    
-    for ctx in context_list[-6:]:
-        
-        if isinstance(ctx, dict) and "context" in ctx and "prompt" in ctx["context"] and "response" in ctx["context"]:
-            messages.append({"role": "user", "content": ctx["context"]["prompt"]})
-            messages.append({"role": "assistant", "content": ctx["context"]["response"]})
-    
-    return messages
+    return context_manager.get_context(anon_id)
+
+
+TOOL_KEYWORDS = [
+    "job", "jobs", "opening", "hiring", "apply", "remote", "vacancy",
+    "mentor", "mentorship", "career guidance", "find a mentor", "coaching",
+    "community", "forum", "group", "network", "connect with others",
+    "list of jobs", "active jobs", "job listings", "available positions"]
+
+
+def needs_tool_agent(clean_prompt):
+    return any(keyword in clean_prompt.lower() for keyword in TOOL_KEYWORDS)
+
+
+def is_cacheable_prompt(clean_prompt):
+    # Tool-agent replies list live jobs, mentors and events, which go stale well inside the cache TTL
+    return not needs_tool_agent(clean_prompt)
+
+
+async def generate_shared_reply(cache_key, clean_prompt, messages, session_key=""):
+    # Identical prompts with identical context already in flight share one model call
+    return await reply_flight.do(cache_key, lambda: run_blocking(generate_reply, clean_prompt, messages, session_key))
 
 
-def generate_reply(clean_prompt, messages):
-    if any(keyword in clean_prompt.lower() for keyword in [
-        "job", "jobs", "opening", "hiring", "apply", "remote", "vacancy",
-        "mentor", "mentorship", "career guidance", "find a mentor", "coaching",
-        "community", "forum", "group", "network", "connect with others",
-        "list of jobs", "active jobs", "job listings", "available positions"]):
-        reply_text = ask_disha_with_tools(clean_prompt)
+def generate_reply(clean_prompt, messages, session_key=""):
+    if needs_tool_agent(clean_prompt):
+        with stage_timer("tool_agent"):
+            reply_text = ask_disha_with_tools(clean_prompt)
         guardrail_intervened = False
     else:
-        result = ask_bedrock(messages)
+        with stage_timer("bedrock"):
+            result = ask_bedrock(messages, session_key)
         reply_text = next((r["text"] for r in result["reply"] if r["type"] == "text"), "[No valid text reply]")
         guardrail_intervened = result.get("guardrail_intervened", False)
     return reply_text, guardrail_intervened
@@ -309,6 +371,5 @@ def store_context_data(clean_prompt, clean_reply_text, anon_id, user_id, is_gues
         save_chat(user_id, clean_prompt, clean_reply_text)
     context_manager.store_context(anon_id, {
         'prompt': clean_prompt,
-        'response': clean_reply_text,
-        'timestamp': datetime.now().isoformat()
+        'response': clean_reply_text
     })
\ No newline at end of file
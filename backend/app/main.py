@@ -1,15 +1,40 @@
-from fastapi import FastAPI
-from services import bedrock  
+from contextlib import asynccontextmanager
+from datetime import datetime
+from fastapi import FastAPI, Request
+from fastapi.responses import PlainTextResponse
+from services import bedrock
 from app import chat
 from fastapi.middleware.cors import CORSMiddleware
-from services.context_manager import EphemeralContextManager
+from services.context_manager import context_manager, context_snapshotter
+from services.executor import blocking_executor, run_blocking
+from services.supabase import chat_writer, chat_history_cache
+from services.supabase_rest import supabase_rest
+from services.response_cache import response_cache
+from services.single_flight import reply_flight
+from services.bedrock_clients import bedrock_clients
+from services.admission import bedrock_limiter
+from services.model_gateway import model_gateway
+from services.context_builder import context_builder
+from services.metrics import registry, REQUEST_SECONDS
+import time
 
-app = FastAPI()
-context_manager = EphemeralContextManager()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    context_snapshotter.start()
+    yield
+    await run_blocking(chat_writer.stop)
+    supabase_rest.close()
+    await run_blocking(context_snapshotter.stop)
+    blocking_executor.shutdown()
+    model_gateway.shutdown()
+
+
+app = FastAPI(lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
-    allow_origins=["https://disha-ai.vercel.app", "https://disha-ai.onrender.com", "http://localhost:3000"],  
+    allow_origins=["https://disha-ai.vercel.app", "https://disha-ai.onrender.com", "http://localhost:3000"],
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
@@ -17,10 +42,40 @@ app.add_middleware(
 
 app.include_router(chat.router, prefix="/chat", tags=["chat"])
 
+registry.register_collector("disha_blocking_executor", blocking_executor.stats)
+registry.register_collector("disha_response_cache", response_cache.stats)
+registry.register_collector("disha_chat_writer", chat_writer.stats)
+registry.register_collector("disha_chat_history_cache", chat_history_cache.stats)
+registry.register_collector("disha_supabase", supabase_rest.stats)
+registry.register_collector("disha_reply_flight", reply_flight.stats)
+registry.register_collector("disha_bedrock_clients", bedrock_clients.stats)
+registry.register_collector("disha_bedrock_admission", bedrock_limiter.stats)
+registry.register_collector("disha_context_builder", context_builder.stats)
+registry.register_collector("disha_context_store", context_manager.stats)
+registry.register_collector("disha_context_snapshots", context_snapshotter.stats)
+registry.register_collector("disha_model_gateway", lambda: {
+    f"{region.replace('-', '_')}_{key}": value
+    for region, health in model_gateway.stats().items()
+    for key, value in health.items() if key != "state"
+})
+
+@app.middleware("http")
+async def time_requests(request: Request, call_next):
+    started = time.perf_counter()
+    response = await call_next(request)
+    # Only matched routes are labelled by path, to keep label cardinality fixed
+    endpoint = request.url.path if request.scope.get("route") else "unmatched"
+    REQUEST_SECONDS.observe(time.perf_counter() - started, endpoint=endpoint)
+    return response
+
 @app.get("/")
 def root():
     return {"message": "🚀 Disha AI backend running!"}
 
 @app.get("/health")
 def health_check():
-    return {"status": "healthy", "timestamp": datetime.now().isoformat()}
\ No newline at end of file
+    return {"status": "healthy", "timestamp": datetime.now().isoformat()}
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def metrics():
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
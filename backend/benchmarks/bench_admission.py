@@ -0,0 +1,62 @@
+# benchmarks/bench_admission.py
+#
+# Runs a burst of Bedrock calls against a fake backend that throttles above a
+# fixed concurrency quota. One chatty session floods the queue alongside a
+# handful of ordinary sessions; the limiter should settle near the quota and
+# the ordinary sessions should not wait behind the flood.
+#
+#   cd backend && PYTHONPATH=. python benchmarks/bench_admission.py
+import os
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+os.environ.setdefault("AWS_REGION", "us-east-1")
+os.environ.setdefault("AWS_ACCOUNT_ID", "000000000000")
+
+from benchmarks.fake_bedrock import FakeBedrockClient
+from services.admission import bedrock_limiter
+from services.bedrock import ask_bedrock
+from services.bedrock_clients import bedrock_clients
+
+QUOTA = 8
+CHATTY_CALLS = 150
+QUIET_SESSIONS = 10
+QUIET_CALLS = 5
+
+
+def main():
+    fake = FakeBedrockClient(first_token_delay=0.05, token_delay=0, capacity=QUOTA)
+    bedrock_clients.get_client = lambda region, purpose="runtime": fake
+
+    jobs = [("chatty", i) for i in range(CHATTY_CALLS)]
+    jobs += [(f"quiet-{s}", i) for i in range(QUIET_CALLS) for s in range(QUIET_SESSIONS)]
+
+    started = time.perf_counter()
+
+    def run(job):
+        session, _ = job
+        try:
+            ask_bedrock([{"role": "user", "content": "resume tips"}], session_key=session)
+            ok = True
+        except RuntimeError:
+            ok = False
+        return session, ok, time.perf_counter() - started
+
+    with ThreadPoolExecutor(max_workers=len(jobs)) as pool:
+        results = list(pool.map(run, jobs))
+
+    elapsed = time.perf_counter() - started
+    chatty = [t for s, ok, t in results if s == "chatty" and ok]
+    quiet = [t for s, ok, t in results if s != "chatty" and ok]
+    failed = sum(1 for _, ok, _ in results if not ok)
+
+    print(f"{len(results)} calls in {elapsed:.2f} s against a quota of {QUOTA}: {failed} failed, "
+          f"{fake.throttles} throttles from the backend")
+    print(f"chatty session: median finish {statistics.median(chatty):.2f} s")
+    print(f"quiet sessions: median finish {statistics.median(quiet):.2f} s")
+    print(bedrock_limiter.stats())
+
+
+if __name__ == "__main__":
+    main()
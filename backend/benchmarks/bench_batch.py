@@ -0,0 +1,44 @@
+# benchmarks/bench_batch.py
+#
+# Sends one /chat/batch request per concurrency cap against the local fake
+# Bedrock backend and reports throughput.
+#
+#   cd backend && PYTHONPATH=. python benchmarks/bench_batch.py
+import os
+import time
+
+os.environ.setdefault("AWS_REGION", "us-east-1")
+os.environ.setdefault("AWS_ACCOUNT_ID", "000000000000")
+os.environ.setdefault("SUPABASE_URL", "http://localhost:54321")
+os.environ.setdefault("SUPABASE_ANON_KEY", "local")
+
+from fastapi.testclient import TestClient
+
+from app.chat import response_cache
+from app.main import app
+from services.bedrock_clients import bedrock_clients
+from benchmarks.fake_bedrock import FakeBedrockClient
+
+ITEMS = 32
+
+
+def main():
+    fake = FakeBedrockClient(first_token_delay=0.2, token_delay=0)
+    bedrock_clients.get_client = lambda region: fake
+    client = TestClient(app)
+
+    prompts = [f"How should I prepare for interview round {i}?" for i in range(ITEMS)]
+    prompts += ["Tell me about movies", "Women are less capable engineers"]
+
+    for concurrency in (1, 4, 8, 16, 32):
+        response_cache.clear()
+        started = time.perf_counter()
+        body = client.post("/chat/batch", json={"messages": prompts, "concurrency": concurrency}).json()
+        elapsed = time.perf_counter() - started
+        answered = sum(1 for r in body["results"] if "reply" in r and not r["guardrail_intervened"])
+        print(f"cap {concurrency:>2}: {elapsed:6.2f} s, {answered / elapsed:6.1f} model replies/s, "
+              f"{len(body['results'])} results")
+
+
+if __name__ == "__main__":
+    main()
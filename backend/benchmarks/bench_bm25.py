@@ -0,0 +1,97 @@
+# benchmarks/bench_bm25.py
+#
+# Builds a DocumentStore over 100k synthetic career articles and compares
+# query latency of the BM25 inverted index with the old scan that counted
+# every query term in every document. Also checks the shipped data still
+# finds the expected articles.
+#
+#   cd backend && PYTHONPATH=. python benchmarks/bench_bm25.py
+import random
+import tempfile
+import time
+
+from services.rag_system import DocumentStore
+
+DOCUMENTS = 100000
+QUERIES = 200
+
+TOPICS = {
+    "resume": "resume cv bullet achievements keywords format recruiter screening",
+    "interview": "interview behavioral technical coding questions preparation panel",
+    "salary": "salary negotiation offer compensation equity benefits counter",
+    "networking": "networking linkedin events referral connections community",
+    "leadership": "leadership manager team delegation feedback promotion",
+    "switch": "career switch transition transferable skills bootcamp retraining",
+}
+FILLER = ("the a of to and in for with on your you can is are this that how what when it as be by from "
+          "work job role company growth plan goal skill project experience time people week month").split()
+
+
+def synthetic_documents(rng):
+    topics = list(TOPICS)
+    for i in range(DOCUMENTS):
+        topic = rng.choice(topics)
+        words = TOPICS[topic].split()
+        body = " ".join(rng.choice(words) if rng.random() < 0.15 else rng.choice(FILLER)
+                        for _ in range(rng.randint(80, 240)))
+        title = f"{topic.title()} guide {i}"
+        yield f"doc-{i}", f"{title}\n\n{body}", {"title": title, "tags": [topic, rng.choice(words)]}
+
+
+def old_scan(store, query, top_k=3):
+    # The previous simple_search: substring counts over every document and metadata value
+    terms = set(query.lower().split())
+    results = []
+    for doc_id, doc in store.documents.items():
+        content = doc['content'].lower()
+        score = sum(content.count(term) for term in terms if term in content)
+        for value in doc['metadata'].values():
+            values = value if isinstance(value, list) else [value]
+            score += sum(2 for item in values if isinstance(item, str) and any(t in item.lower() for t in terms))
+        if score > 0:
+            results.append((score, doc_id))
+    results.sort(reverse=True)
+    return results[:top_k]
+
+
+def main():
+    store = DocumentStore()
+    for query, title in [("how do I write a good resume", "Resume Best Practices"),
+                         ("salary negotiation tips", "Salary Negotiation Strategies"),
+                         ("preparing for technical interviews", "Acing Technical Interviews")]:
+        assert store.simple_search(query)[0]['metadata']['title'] == title, query
+    print("shipped data: expected articles ranked first")
+
+    rng = random.Random(4)
+    with tempfile.TemporaryDirectory() as empty:
+        store = DocumentStore(data_dir=empty)
+    started = time.perf_counter()
+    for doc_id, content, metadata in synthetic_documents(rng):
+        store.add_document(doc_id, content, metadata, "knowledge_base")
+    print(f"indexed {len(store.documents)} documents in {time.perf_counter() - started:.1f} s: {store.index.stats()}")
+
+    words = [w for topic in TOPICS.values() for w in topic.split()]
+    queries = [" ".join(rng.sample(words, rng.randint(2, 4))) for _ in range(QUERIES)]
+
+    started = time.perf_counter()
+    for query in queries:
+        store.simple_search(query)
+    indexed = (time.perf_counter() - started) / QUERIES
+    rare = [f"bootcamp retraining {i}" for i in range(QUERIES)]
+    started = time.perf_counter()
+    for query in rare:
+        store.simple_search(query)
+    indexed_rare = (time.perf_counter() - started) / QUERIES
+
+    started = time.perf_counter()
+    for query in queries[:10]:
+        old_scan(store, query)
+    scan = (time.perf_counter() - started) / 10
+
+    print(f"old scan:   {scan * 1000:.1f} ms per query")
+    print(f"BM25 index: {indexed * 1000:.1f} ms per query (topic words), "
+          f"{indexed_rare * 1000:.1f} ms per query (rarer words)")
+
+
+if __name__ == "__main__":
+    main()
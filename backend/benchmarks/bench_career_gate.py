@@ -0,0 +1,161 @@
+# benchmarks/bench_career_gate.py
+#
+# Checks that the compiled career gate makes exactly the same decisions as the
+# original per-call keyword scans, then times both.
+#
+#   cd backend && PYTHONPATH=. python benchmarks/bench_career_gate.py
+import random
+import re
+import sys
+import timeit
+
+from services.career_gate import (
+    CAREER_KEYWORDS,
+    CAREER_PHRASES,
+    CAREER_TERMS,
+    LIST_PATTERNS,
+    NON_CAREER_TOPICS,
+    QUESTION_STARTERS,
+    is_career_related,
+)
+
+
+# Reference implementation, as it lived in app/chat.py
+def legacy_is_career_related(text: str) -> bool:
+    text_lower = text.lower().strip()
+    if legacy_is_explicitly_non_career(text_lower):
+        return False
+    if legacy_contains_career_keywords_or_phrases(text_lower):
+        return True
+    if legacy_is_question_with_career_context(text_lower):
+        return True
+    if legacy_is_list_request_for_career_topics(text_lower):
+        return True
+    return False
+
+
+def legacy_is_explicitly_non_career(text: str) -> bool:
+    non_career_topics = list(NON_CAREER_TOPICS)
+    list_patterns = list(LIST_PATTERNS)
+    for pattern in list_patterns:
+        if re.match(pattern, text) and not legacy_contains_career_terms(text):
+            if any(topic in text for topic in non_career_topics):
+                return True
+    for topic in non_career_topics:
+        if topic in text and len(text.split()) < 10:
+            return True
+    for topic_phrase in [f"tell me about {topic}" for topic in non_career_topics]:
+        if topic_phrase in text:
+            return True
+    return False
+
+
+def legacy_contains_career_keywords_or_phrases(text: str) -> bool:
+    career_keywords = list(CAREER_KEYWORDS)
+    career_phrases = list(CAREER_PHRASES)
+    if any(keyword in text for keyword in career_keywords):
+        return True
+    if any(phrase in text for phrase in career_phrases):
+        return True
+    return False
+
+
+def legacy_is_question_with_career_context(text: str) -> bool:
+    question_starters = list(QUESTION_STARTERS)
+    non_career_topics = list(NON_CAREER_TOPICS)
+    if any(text.startswith(starter) for starter in question_starters):
+        if any(f"{starter} {topic}" in text for starter in question_starters for topic in non_career_topics):
+            return False
+        return True
+    return False
+
+
+def legacy_is_list_request_for_career_topics(text: str) -> bool:
+    return ("list" in text or "show" in text) and legacy_contains_career_terms(text)
+
+
+def legacy_contains_career_terms(text: str) -> bool:
+    return any(term in text for term in CAREER_TERMS)
+
+
+CORPUS = [
+    "How do I prepare for an interview?",
+    "resume tips",
+    "Tell me about movies",
+    "tell me about the weather in delhi tomorrow and whether I should carry an umbrella",
+    "List of top songs from 2020",
+    "list of jobs in bangalore",
+    "list the best bollywood movies",
+    "show me a playlist list",
+    "show me career courses",
+    "Top 10 anime of all time",
+    "top 5 skills for data analysts",
+    "what are the best songs for running",
+    "What is the best way to switch careers after a maternity leave?",
+    "how dog training works",
+    "how do i get back into the workforce after a career break",
+    "Can you recommend a good recipe?",
+    "can football players become coaches",
+    "Why is the sky blue?",
+    "who won the game yesterday",
+    "Where can I find remote work?",
+    "I want to cook dinner",
+    "i love my cat",
+    "Is it okay to take a gap year before my first job?",
+    "give me list of companies hiring women engineers",
+    "give me list of hotels in goa",
+    "my girlfriend and I want to plan a vacation somewhere warm next month please help",
+    "Help me write a cover letter",
+    "negotiate",
+    "",
+    "   ",
+    "HR policies on hybrid teams",
+    "how team dynamics affect productivity in startups and large corporate offices worldwide",
+    "what play should i watch",
+    "when is the next concert",
+    "Returning to workforce after 5 years at home",
+    "i need a new hobby",
+    "show",
+    "what",
+    "Can I ask about DC comics and my portfolio",
+    "how to become a film director with a degree in media studies",
+]
+
+
+def generated_corpus(size: int, seed: int = 7) -> list:
+    rng = random.Random(seed)
+    vocab = (
+        NON_CAREER_TOPICS + CAREER_KEYWORDS + CAREER_PHRASES + CAREER_TERMS
+        + list(QUESTION_STARTERS) + ["list", "show", "me", "of", "top 3", "tell me about",
+                                     "the", "a", "my", "please", "for", "with", "and"]
+    )
+    corpus = []
+    for _ in range(size):
+        words = rng.choices(vocab, k=rng.randint(1, 16))
+        if rng.random() < 0.3:
+            words.insert(0, rng.choice(QUESTION_STARTERS + ("list of", "show me", "top 10", "give me list of")))
+        text = " ".join(words)
+        if rng.random() < 0.3:
+            text = text.upper()
+        corpus.append(text)
+    return corpus
+
+
+def main():
+    corpus = CORPUS + generated_corpus(20000)
+
+    mismatches = [t for t in corpus if is_career_related(t) != legacy_is_career_related(t)]
+    if mismatches:
+        for text in mismatches[:20]:
+            print(f"MISMATCH: {text!r} legacy={legacy_is_career_related(text)} compiled={is_career_related(text)}")
+        sys.exit(1)
+    print(f"Equivalence: {len(corpus)} prompts, 0 mismatches")
+
+    sample = corpus[:2000]
+    for name, fn in [("legacy", legacy_is_career_related), ("compiled", is_career_related)]:
+        seconds = min(timeit.repeat(lambda: [fn(t) for t in sample], number=1, repeat=5))
+        print(f"{name:>9}: {seconds / len(sample) * 1e6:8.2f} us/prompt")
+
+
+if __name__ == "__main__":
+    main()
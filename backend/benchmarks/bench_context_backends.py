@@ -0,0 +1,80 @@
+# benchmarks/bench_context_backends.py
+#
+# Runs 1, 2 and 4 worker processes against one SQLite-WAL context store,
+# each doing the chat pattern (read the last turns, then append one), and
+# reports throughput and read latency. Also checks that a turn written by
+# one worker is visible to another.
+#
+#   cd backend && PYTHONPATH=. python benchmarks/bench_context_backends.py
+import multiprocessing
+import os
+import tempfile
+import time
+
+from services.context_backends import InProcessContextBackend, SqliteContextBackend
+
+OPS_PER_WORKER = 3000
+SESSIONS = 2000
+PROMPT = "How do I ask for a promotion?"
+RESPONSE = "Document your impact and ask for a review. " * 10
+
+
+def worker(path, worker_id, results):
+    backend = SqliteContextBackend(path)
+    read_times = []
+    started = time.perf_counter()
+    for i in range(OPS_PER_WORKER):
+        anon_id = f"session-{(i * 31 + worker_id * 997) % SESSIONS}"
+        t0 = time.perf_counter()
+        backend.recent(anon_id, 6)
+        read_times.append(time.perf_counter() - t0)
+        backend.append(anon_id, PROMPT, RESPONSE)
+    results.put((time.perf_counter() - started, sorted(read_times)))
+
+
+def run(path, workers):
+    results = multiprocessing.Queue()
+    procs = [multiprocessing.Process(target=worker, args=(path, w, results)) for w in range(workers)]
+    started = time.perf_counter()
+    for p in procs:
+        p.start()
+    outcomes = [results.get() for _ in procs]
+    for p in procs:
+        p.join()
+    elapsed = time.perf_counter() - started
+    reads = sorted(t for _, times in outcomes for t in times)
+    pct = lambda q: reads[int(len(reads) * q) - 1] * 1e6
+    print(f"sqlite, {workers} worker(s): {workers * OPS_PER_WORKER / elapsed:7.0f} read+append/s, "
+          f"read p50 {pct(0.5):5.0f} µs, p99 {pct(0.99):5.0f} µs")
+
+
+def main():
+    memory = InProcessContextBackend()
+    started = time.perf_counter()
+    for i in range(OPS_PER_WORKER):
+        anon_id = f"session-{i * 31 % SESSIONS}"
+        memory.recent(anon_id, 6)
+        memory.append(anon_id, PROMPT, RESPONSE)
+    print(f"memory, 1 worker:  {OPS_PER_WORKER / (time.perf_counter() - started):7.0f} read+append/s")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "context.sqlite3")
+        for workers in (1, 2, 4):
+            run(path, workers)
+
+        writer, reader = SqliteContextBackend(path), SqliteContextBackend(path)
+        writer.append("handoff", PROMPT, RESPONSE)
+        process = multiprocessing.Process(target=_check_visible, args=(path,))
+        process.start()
+        process.join()
+        assert process.exitcode == 0, "turn written by one worker was not visible to another"
+        assert reader.recent("handoff"), "turn not visible to a second connection"
+        print("cross-worker visibility check passed")
+
+
+def _check_visible(path):
+    assert SqliteContextBackend(path).recent("handoff")
+
+
+if __name__ == "__main__":
+    main()
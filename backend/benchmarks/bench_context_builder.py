@@ -0,0 +1,61 @@
+# benchmarks/bench_context_builder.py
+#
+# Replays long conversations through the token-budgeted context builder and
+# compares the input size with the old fixed six-turn window. Replies run up
+# to ~500 tokens, the max_tokens Bedrock is called with.
+#
+#   cd backend && PYTHONPATH=. python benchmarks/bench_context_builder.py
+import random
+import time
+
+from services.context_builder import ContextBuilder
+from services.context_records import Turn, estimate_tokens
+
+SESSIONS = 200
+TURNS = 30
+
+ANSWER = ("Start by listing the roles you want and the skills they ask for. "
+          "Then map your experience onto those skills and note the gaps. ") * 16
+
+
+def legacy_messages(turns, prompt):
+    messages = []
+    for turn in turns[-6:]:
+        messages.append({"role": "user", "content": turn.prompt})
+        messages.append({"role": "assistant", "content": turn.response})
+    messages.append({"role": "user", "content": prompt})
+    return messages
+
+
+def main():
+    random.seed(5)
+    builder = ContextBuilder()
+    legacy_tokens = sent_tokens = 0
+    build_time = 0.0
+    requests = 0
+
+    for session in range(SESSIONS):
+        turns = []
+        for turn in range(TURNS):
+            prompt = f"Question {turn}: how do I move from support engineering into product management?"
+            legacy_tokens += sum(estimate_tokens(m["content"]) for m in legacy_messages(turns, prompt))
+
+            started = time.perf_counter()
+            messages, report = builder.build(f"session-{session}", turns, prompt)
+            build_time += time.perf_counter() - started
+            sent_tokens += report["sent_tokens"]
+            requests += 1
+
+            assert [m["role"] for m in messages][::2] == ["user"] * ((len(messages) + 1) // 2)
+            turns.append(Turn(prompt, ANSWER[:random.randint(600, len(ANSWER))], float(turn)))
+
+    print(f"{requests} requests, budget {builder.budget} tokens")
+    print(f"legacy window: {legacy_tokens / requests:7.0f} tokens per request")
+    print(f"builder:       {sent_tokens / requests:7.0f} tokens per request "
+          f"({(1 - sent_tokens / legacy_tokens) * 100:.0f}% fewer)")
+    print(f"build(): {build_time / requests * 1e6:.0f} µs per request")
+    print(f"last request: {report}")
+
+
+if __name__ == "__main__":
+    main()
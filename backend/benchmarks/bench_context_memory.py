@@ -0,0 +1,83 @@
+# benchmarks/bench_context_memory.py
+#
+# Memory held by 10k guest sessions of 20 turns each: the old nested-dict
+# entries, slotted Turn records, and Turn records with older turns packed.
+#
+#   cd backend && PYTHONPATH=. python benchmarks/bench_context_memory.py
+#
+# Takes a few minutes: tracemalloc records every allocation.
+import random
+import time
+import tracemalloc
+from datetime import datetime
+
+from services.context_backends import InProcessContextBackend
+
+SESSIONS = 10000
+TURNS = 20
+
+WORDS = ("resume interview salary negotiate mentor skills portfolio manager role team project impact "
+         "leadership growth offer career switch data design product engineering feedback review network "
+         "apply hiring remote promotion goals learning course certificate experience").split()
+
+
+def sentence(rng, words):
+    return " ".join(rng.choice(WORDS) for _ in range(words)).capitalize() + "."
+
+
+def conversation(rng):
+    for _ in range(TURNS):
+        prompt = sentence(rng, rng.randint(8, 25))
+        response = " ".join(sentence(rng, rng.randint(10, 20)) for _ in range(rng.randint(4, 12)))
+        yield prompt, response
+
+
+def legacy_store():
+    # As entries were kept before: a dict per turn with a datetime and a nested context dict
+    rng = random.Random(11)
+    store = {}
+    for s in range(SESSIONS):
+        data = []
+        for prompt, response in conversation(rng):
+            data.append({'timestamp': datetime.now(),
+                         'context': {'prompt': prompt, 'response': response, 'timestamp': datetime.now().isoformat()}})
+        store[f"session-{s}"] = {'data': data, 'expires': datetime.now()}
+    return store
+
+
+def turn_store(compress):
+    rng = random.Random(11)
+    backend = InProcessContextBackend(max_turns=TURNS, compress=compress)
+    for s in range(SESSIONS):
+        for prompt, response in conversation(rng):
+            backend.append(f"session-{s}", prompt, response)
+    return backend
+
+
+def measure(label, build):
+    tracemalloc.start()
+    started = time.perf_counter()
+    held = build()
+    elapsed = time.perf_counter() - started
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{label:<32} {current / 2**20:7.1f} MiB per {SESSIONS // 1000}k sessions, built in {elapsed:5.2f} s")
+    return held
+
+
+def main():
+    measure("dict entries (before)", legacy_store)
+    measure("Turn records", lambda: turn_store(False))
+    backend = measure("Turn records, older turns packed", lambda: turn_store(True))
+
+    turns = backend.recent("session-42")
+    started = time.perf_counter()
+    for _ in range(1000):
+        for turn in turns:
+            turn.messages()
+    print(f"reading all {len(turns)} turns of a session: {(time.perf_counter() - started) * 1000:.1f} µs "
+          f"({sum(t.compressed for t in turns)} packed)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+# benchmarks/bench_context_snapshot.py
+#
+# Snapshots an in-process context store of 100k sessions, restores it into
+# a fresh store, and reports file size, write and restore time, how long
+# requests were held up while the snapshot ran, and that expired sessions
+# are dropped on restore.
+#
+#   cd backend && PYTHONPATH=. python benchmarks/bench_context_snapshot.py
+import os
+import random
+import tempfile
+import threading
+import time
+
+from services.context_backends import InProcessContextBackend
+from services.context_snapshots import read_snapshot, write_snapshot
+
+SESSIONS = 100000
+TURNS = 6
+
+WORDS = ("resume interview salary negotiate mentor skills portfolio manager role team project impact "
+         "leadership growth offer career switch data design product engineering feedback review").split()
+
+
+def text(rng, words):
+    return " ".join(rng.choice(WORDS) for _ in range(words))
+
+
+def build_store():
+    rng = random.Random(2)
+    backend = InProcessContextBackend(max_sessions=SESSIONS, max_bytes=2**31)
+    replies = [text(rng, rng.randint(60, 160)) for _ in range(200)]
+    for s in range(SESSIONS):
+        for t in range(TURNS):
+            backend.append(f"session-{s}", text(rng, 12), rng.choice(replies))
+    return backend
+
+
+def main():
+    started = time.perf_counter()
+    backend = build_store()
+    print(f"built {SESSIONS} sessions x {TURNS} turns in {time.perf_counter() - started:.1f} s")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "context.snap")
+
+        # Time reads from another thread while the snapshot is written
+        stalls, done = [], threading.Event()
+
+        def reader():
+            i = 0
+            while not done.is_set():
+                t0 = time.perf_counter()
+                backend.recent(f"session-{i % SESSIONS}")
+                stalls.append(time.perf_counter() - t0)
+                i += 7919
+
+        thread = threading.Thread(target=reader)
+        thread.start()
+        started = time.perf_counter()
+        written = write_snapshot(backend, path)
+        elapsed = time.perf_counter() - started
+        done.set()
+        thread.join()
+        print(f"snapshot: {written} sessions, {os.path.getsize(path) / 2**20:.1f} MiB, {elapsed:.2f} s; "
+              f"concurrent reads max {max(stalls) * 1000:.1f} ms over {len(stalls)} reads")
+
+        restored = InProcessContextBackend(max_sessions=SESSIONS, max_bytes=2**31)
+        started = time.perf_counter()
+        result = read_snapshot(restored, path)
+        print(f"restore: {result} in {time.perf_counter() - started:.2f} s")
+        assert restored.stats()["sessions"] == SESSIONS
+        original = backend.recent("session-123")
+        copy = restored.recent("session-123")
+        assert [t.messages() for t in original] == [t.messages() for t in copy]
+
+        expired = InProcessContextBackend(expiry_hours=0.5 / 3600)
+        for s in range(1000):
+            expired.append(f"short-{s}", "prompt", "response")
+        write_snapshot(expired, path)
+        time.sleep(0.6)
+        result = read_snapshot(InProcessContextBackend(), path)
+        assert result == {"restored": 0, "dropped_expired": 1000}, result
+        print("expired sessions dropped on restore")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+# benchmarks/bench_context_store.py
+#
+# Compares get_context latency against the old scan-on-every-read store as
+# the number of sessions grows, and checks the turn, session and byte caps.
+#
+#   cd backend && PYTHONPATH=. python benchmarks/bench_context_store.py
+import time
+from datetime import datetime, timedelta
+
+from services.context_backends import InProcessContextBackend
+from services.context_manager import EphemeralContextManager
+
+READS = 2000
+
+
+class LegacyContextManager:
+    # As it was before the expiry queue: every read scans the whole store
+
+    def __init__(self, expiry_hours=24):
+        self.context_store = {}
+        self.expiry_hours = expiry_hours
+
+    def store_context(self, anon_id, context_data):
+        if anon_id not in self.context_store:
+            self.context_store[anon_id] = {'data': [], 'expires': datetime.now() + timedelta(hours=self.expiry_hours)}
+        self.context_store[anon_id]['data'].append({'timestamp': datetime.now(), 'context': dict(context_data)})
+
+    def get_context(self, anon_id):
+        now = datetime.now()
+        for key in [k for k, v in self.context_store.items() if v['expires'] < now]:
+            del self.context_store[key]
+        return self.context_store.get(anon_id, {}).get('data', [])
+
+
+def read_latency(manager, sessions):
+    started = time.perf_counter()
+    for i in range(READS):
+        manager.get_context(f"session-{i * 7919 % sessions}")
+    return (time.perf_counter() - started) / READS * 1e6
+
+
+def main():
+    turn = {"prompt": "How do I switch careers into UX design?", "response": "Start with a portfolio. " * 20}
+
+    for sessions in (1000, 10000, 50000):
+        legacy, current = LegacyContextManager(), EphemeralContextManager(InProcessContextBackend())
+        for i in range(sessions):
+            legacy.store_context(f"session-{i}", turn)
+            current.store_context(f"session-{i}", turn)
+        print(f"{sessions:>6} sessions: legacy {read_latency(legacy, sessions):8.1f} µs/read, "
+              f"current {read_latency(current, sessions):6.1f} µs/read")
+
+    manager = EphemeralContextManager(InProcessContextBackend(max_turns=5, max_sessions=1000, max_bytes=2 * 1024 * 1024))
+    for i in range(5000):
+        for _ in range(8):
+            manager.store_context(f"session-{i}", turn)
+    assert all(len(s['data']) <= 5 for s in manager.backend.context_store.values())
+    print(f"capped store after 5000 sessions x 8 turns: {manager.stats()}")
+
+    manager = EphemeralContextManager(InProcessContextBackend(expiry_hours=-1))
+    for i in range(10000):
+        manager.store_context(f"session-{i}", turn)
+    manager.cleanup_expired()
+    print(f"already-expired sessions left after cleanup: {manager.stats()['sessions']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+# benchmarks/bench_executor.py
+#
+# Simulates many concurrent chats whose blocking model call takes a fixed time
+# and checks the event loop stays responsive while they are in flight.
+#
+#   cd backend && PYTHONPATH=. python benchmarks/bench_executor.py
+import asyncio
+import time
+
+from services.executor import BlockingExecutor
+
+CONCURRENT_CHATS = 500
+MODEL_LATENCY_SECONDS = 0.2
+
+
+def fake_model_call():
+    time.sleep(MODEL_LATENCY_SECONDS)
+    return "ok"
+
+
+async def probe_loop_lag(stop: asyncio.Event) -> float:
+    worst = 0.0
+    while not stop.is_set():
+        started = time.perf_counter()
+        await asyncio.sleep(0.01)
+        worst = max(worst, time.perf_counter() - started - 0.01)
+    return worst
+
+
+async def main():
+    executor = BlockingExecutor(max_workers=256)
+    stop = asyncio.Event()
+    probe = asyncio.create_task(probe_loop_lag(stop))
+
+    started = time.perf_counter()
+    await asyncio.gather(*(executor.run(fake_model_call) for _ in range(CONCURRENT_CHATS)))
+    elapsed = time.perf_counter() - started
+
+    stop.set()
+    lag = await probe
+    executor.shutdown()
+
+    print(f"{CONCURRENT_CHATS} chats x {MODEL_LATENCY_SECONDS * 1000:.0f} ms blocking call: {elapsed:.2f} s wall "
+          f"(serial would be {CONCURRENT_CHATS * MODEL_LATENCY_SECONDS:.0f} s)")
+    print(f"worst event-loop lag: {lag * 1000:.1f} ms")
+    print(executor.stats())
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
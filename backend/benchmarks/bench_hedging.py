@@ -0,0 +1,93 @@
+# benchmarks/bench_hedging.py
+#
+# Two fake Bedrock regions behind the model gateway. The primary has a slow
+# tail (and later an outage); the report shows tail latency with and without
+# hedging and which region answered.
+#
+#   cd backend && PYTHONPATH=. python benchmarks/bench_hedging.py
+import os
+import random
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+os.environ.setdefault("AWS_REGION", "us-east-1")
+os.environ.setdefault("AWS_ACCOUNT_ID", "000000000000")
+os.environ.setdefault("BEDROCK_REGIONS", "us-east-1,us-west-2")
+os.environ.setdefault("BEDROCK_HEDGE_MIN_DELAY_SECONDS", "0.05")
+
+from botocore.exceptions import ClientError
+
+from services import bedrock
+from services.admission import AdaptiveLimiter
+from services.model_gateway import HEDGES, ModelGateway
+from services.bedrock_clients import bedrock_clients
+from benchmarks.fake_bedrock import FakeBedrockClient
+
+REQUESTS = 400
+# Calls per region before timing starts; hedging waits for a region's p95, which needs 20 samples
+WARMUP = 60
+CONCURRENCY = 16
+
+
+class FlakyRegion(FakeBedrockClient):
+
+    def __init__(self, slow_ratio=0.0, slow_delay=1.5, down=False, **kwargs):
+        super().__init__(**kwargs)
+        self.slow_ratio = slow_ratio
+        self.slow_delay = slow_delay
+        self.down = down
+
+    def invoke_model(self, **kwargs):
+        if self.down:
+            self.calls += 1
+            raise ClientError({"Error": {"Code": "ServiceUnavailableException", "Message": "Unavailable"},
+                               "ResponseMetadata": {"HTTPStatusCode": 503}}, "InvokeModel")
+        if random.random() < self.slow_ratio:
+            time.sleep(self.slow_delay)
+        return super().invoke_model(**kwargs)
+
+
+def run(label, hedging, primary):
+    gateway = bedrock.model_gateway = ModelGateway(["us-east-1", "us-west-2"], hedging=hedging)
+    fakes = {"us-east-1": primary,
+             "us-west-2": FlakyRegion(first_token_delay=0.08, token_delay=0)}
+    bedrock_clients.get_client = lambda region, purpose="runtime": fakes[region]
+    for region in gateway.regions:
+        for _ in range(WARMUP):
+            try:
+                gateway._timed_call(region, lambda region: fakes[region].invoke_model())
+            except ClientError:
+                pass
+    primary_calls = primary.calls
+    # A fresh limiter per run, so one run's learned limit does not carry into the next
+    bedrock.bedrock_limiter = gateway.limiter = limiter = AdaptiveLimiter()
+    hedges = HEDGES.value(outcome="sent")
+
+    def one(i):
+        started = time.perf_counter()
+        result = bedrock.ask_bedrock([{"role": "user", "content": f"How do I prepare for interview {i}?"}])
+        return time.perf_counter() - started, result["region"]
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(CONCURRENCY) as pool:
+        results = list(pool.map(one, range(REQUESTS)))
+    elapsed = time.perf_counter() - started
+
+    latencies = sorted(r[0] for r in results)
+    wins = Counter(r[1] for r in results)
+    pct = lambda q: latencies[int(len(latencies) * q) - 1] * 1000
+    print(f"{label:<28} p50 {pct(0.5):6.0f} ms  p99 {pct(0.99):6.0f} ms  max {latencies[-1] * 1000:6.0f} ms  "
+          f"{elapsed:5.2f} s  wins {dict(wins)}  primary calls {primary.calls - primary_calls}  "
+          f"hedges {HEDGES.value(outcome='sent') - hedges:.0f}  limit {limiter.limit:.1f}")
+
+
+def main():
+    random.seed(7)
+    run("slow tail, no hedging", False, FlakyRegion(slow_ratio=0.03, first_token_delay=0.05, token_delay=0))
+    run("slow tail, hedging", True, FlakyRegion(slow_ratio=0.03, first_token_delay=0.05, token_delay=0))
+    run("primary down, breaker", True, FlakyRegion(down=True))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+# benchmarks/bench_history_cache.py
+#
+# Replays signed-in chat sessions against a fake chat_history table with a
+# simulated Supabase round trip, with and without the per-user history
+# cache, and checks the cache returns the same (most recent) rows.
+#
+#   cd backend && PYTHONPATH=. python benchmarks/bench_history_cache.py
+import time
+from datetime import datetime, timedelta, timezone
+
+from services.history_cache import HistoryCache
+
+USERS = 200
+REQUESTS_PER_USER = 10
+ROUND_TRIP = 0.004
+
+
+class FakeHistoryTable:
+
+    def __init__(self):
+        self.rows = {}
+        self.queries = 0
+        self.clock = datetime(2026, 1, 1, tzinfo=timezone.utc)
+
+    def insert(self, user_id, prompt, response):
+        self.clock += timedelta(seconds=1)
+        row = {"prompt": prompt, "response": response, "timestamp": self.clock.isoformat()}
+        self.rows.setdefault(user_id, []).append(row)
+        return row
+
+    def fetch(self, user_id, limit=5):
+        # Newest first with a limit, returned oldest first, like fetch_chat_history
+        self.queries += 1
+        time.sleep(ROUND_TRIP)
+        return list(reversed(sorted(self.rows.get(user_id, []), key=lambda r: r["timestamp"], reverse=True)[:limit]))
+
+
+def replay(table, read):
+    for user in range(USERS):
+        table.insert(f"user-{user}", "Earlier question", "Earlier answer")
+    started = time.perf_counter()
+    for turn in range(REQUESTS_PER_USER):
+        for user in range(USERS):
+            user_id = f"user-{user}"
+            history = read(user_id)
+            assert history[-1]["prompt"] == (f"Question {turn - 1}" if turn else "Earlier question")
+            yield user_id, turn
+    table.elapsed = time.perf_counter() - started
+
+
+def main():
+    table = FakeHistoryTable()
+    for user_id, turn in replay(table, lambda user_id: table.fetch(user_id, 5)):
+        table.insert(user_id, f"Question {turn}", f"Answer {turn}")
+    requests = USERS * REQUESTS_PER_USER
+    print(f"no cache:   {table.queries} history queries for {requests} requests, {table.elapsed:.2f} s")
+
+    table = FakeHistoryTable()
+    cache = HistoryCache(table.fetch)
+    for user_id, turn in replay(table, lambda user_id: cache.get(user_id, 5)):
+        # save_chat: the write goes behind, the cache is updated straight away
+        row = table.insert(user_id, f"Question {turn}", f"Answer {turn}")
+        cache.append(user_id, row)
+    print(f"with cache: {table.queries} history queries for {requests} requests, {table.elapsed:.2f} s, "
+          f"{cache.stats()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+# benchmarks/bench_hot_reload.py
+#
+# Edits, adds and deletes files in a knowledge directory of 20k articles
+# and times DocumentStore.refresh() (which re-reads only the changed files
+# and re-indexes only the changed documents) against rebuilding the store,
+# while reader threads keep searching and record their slowest query.
+#
+#   cd backend && PYTHONPATH=. python benchmarks/bench_hot_reload.py
+import itertools
+import json
+import os
+import random
+import tempfile
+import threading
+import time
+
+from benchmarks.bench_bm25 import synthetic_documents
+from services.rag_system import DocumentStore
+
+ARTICLES = 20000
+FILES = 200
+READERS = 2
+
+
+def write_file(path, articles):
+    with open(path, "w") as f:
+        json.dump(articles, f)
+
+
+def main():
+    rng = random.Random(8)
+    articles = [{"title": metadata["title"], "content": content.split("\n\n", 1)[1], "tags": metadata["tags"]}
+                for _, content, metadata in itertools.islice(synthetic_documents(rng), ARTICLES)]
+    per_file = len(articles) // FILES
+    with tempfile.TemporaryDirectory() as data_dir, tempfile.TemporaryDirectory() as knowledge_dir:
+        for n in range(FILES):
+            write_file(os.path.join(knowledge_dir, f"part-{n:03d}.json"), articles[n * per_file:(n + 1) * per_file])
+        embeddings = os.path.join(data_dir, "embeddings.npy")
+        embedder = os.path.join(data_dir, "embedder.json")
+
+        started = time.perf_counter()
+        store = DocumentStore(data_dir, embeddings_path=embeddings, embedder_path=embedder, knowledge_dir=knowledge_dir)
+        full = time.perf_counter() - started
+        print(f"full build: {len(store.documents)} documents in {full:.2f} s")
+
+        stop = threading.Event()
+        slowest, failures, queries = [0.0], [0], [0]
+
+        def reader(seed):
+            local = random.Random(seed)
+            while not stop.is_set():
+                query = local.choice(articles)["title"]
+                started = time.perf_counter()
+                try:
+                    store.simple_search(query, 3)
+                    store.dense_search(query, 3)
+                except Exception:
+                    failures[0] += 1
+                slowest[0] = max(slowest[0], time.perf_counter() - started)
+                queries[0] += 1
+
+        threads = [threading.Thread(target=reader, args=(n,)) for n in range(READERS)]
+        for thread in threads:
+            thread.start()
+        time.sleep(1.0)
+        idle_slowest, slowest[0], idle_queries, queries[0] = slowest[0], 0.0, queries[0], 0
+
+        steps = []
+        # Edit one article in one file
+        path = os.path.join(knowledge_dir, "part-007.json")
+        edited = articles[7 * per_file:8 * per_file]
+        edited[0] = dict(edited[0], content=edited[0]["content"] + " relocation visa sponsorship")
+        write_file(path, edited)
+        steps.append(("edit 1 article", store.refresh()))
+        # Touch a file without changing it: stat differs, content hash does not
+        os.utime(path, ns=(time.time_ns(), time.time_ns() + 10**9))
+        steps.append(("touch unchanged file", store.refresh()))
+        # New file with 50 articles
+        write_file(os.path.join(knowledge_dir, "new.json"),
+                   [{"title": f"Fresh article {i}", "content": "negotiating a remote contract", "tags": []}
+                    for i in range(50)])
+        steps.append(("add a 50-article file", store.refresh()))
+        # Delete a whole file
+        os.remove(os.path.join(knowledge_dir, "part-011.json"))
+        steps.append(("delete a file", store.refresh()))
+        steps.append(("nothing changed", store.refresh()))
+
+        stop.set()
+        for thread in threads:
+            thread.join()
+
+        for name, changes in steps:
+            print(f"{name:24s} {changes}")
+        timings = []
+        for n in range(5):
+            edited[1] = dict(edited[1], content=f"{edited[1]['content']} revision {n}")
+            write_file(path, edited)
+            os.utime(path, ns=(time.time_ns(), time.time_ns() + (n + 2) * 10**9))
+            started = time.perf_counter()
+            store.refresh()
+            timings.append(time.perf_counter() - started)
+        started = time.perf_counter()
+        store.refresh()
+        idle = time.perf_counter() - started
+        print(f"incremental refresh of one edited file: {min(timings) * 1000:.1f} ms "
+              f"(full rebuild {full:.2f} s); check with nothing changed: {idle * 1000:.1f} ms")
+        print(f"readers: {queries[0]} queries during the changes, {failures[0]} failed, "
+              f"slowest {slowest[0] * 1000:.1f} ms (slowest of {idle_queries} before them: {idle_slowest * 1000:.1f} ms)")
+        found = store.simple_search("relocation visa sponsorship", 1)
+        titles = {doc['metadata'].get('title') for doc in store.documents.values()}
+        deleted = [article["title"] for article in articles[11 * per_file:12 * per_file]]
+        print(f"edited article ranks first for its new words: {found[0]['metadata']['title'] == edited[0]['title']}; "
+              f"articles of the deleted file still indexed: {sum(title in titles for title in deleted)}")
+
+
+if __name__ == "__main__":
+    main()
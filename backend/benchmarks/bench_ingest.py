@@ -0,0 +1,117 @@
+# benchmarks/bench_ingest.py
+#
+# Writes a synthetic article dump (as JSONL and as one JSON array, with a
+# share of exact and reformatted duplicates and some long articles), then:
+#   - peak Python memory of streaming it through the chunk pipeline
+#     against json.load of the array, the old way to read a data file;
+#   - ingestion throughput into a DocumentStore and the dedup counts;
+#   - what a DocumentStore loading the file as its knowledge dir holds
+#     at its peak, against what it keeps once loaded.
+#
+#   cd backend && PYTHONPATH=. python benchmarks/bench_ingest.py
+import json
+import os
+import random
+import tempfile
+import time
+import tracemalloc
+from collections import Counter
+
+from benchmarks.bench_bm25 import FILLER, TOPICS
+from services.ingest import CorpusIngester, iter_chunks
+from services.rag_system import DocumentStore
+
+ARTICLES = 30000
+DUPLICATE_SHARE = 0.1
+LONG_SHARE = 0.1
+
+
+def articles(rng):
+    """Yields (article, is_duplicate) pairs."""
+    topics = list(TOPICS)
+    previous = []
+    for i in range(ARTICLES):
+        if previous and rng.random() < DUPLICATE_SHARE:
+            article = dict(rng.choice(previous))
+            if rng.random() < 0.5:
+                # The same text re-scraped with other spacing and case
+                article["content"] = "  ".join(article["content"].upper().split())
+            yield article, True
+            continue
+        topic = rng.choice(topics)
+        words = TOPICS[topic].split()
+        length = rng.randint(1500, 3000) if rng.random() < LONG_SHARE else rng.randint(80, 240)
+        body = [rng.choice(words) if rng.random() < 0.15 else rng.choice(FILLER) for _ in range(length)]
+        article = {"title": f"{topic.title()} guide {i}", "content": " ".join(body),
+                   "tags": [topic], "url": f"https://example.org/{i}"}
+        previous = (previous + [article])[-50:]
+        yield article, False
+
+
+def measure(work):
+    """(result, peak traced MiB, seconds); timed on a separate run, since tracing slows small allocations a lot."""
+    started = time.perf_counter()
+    work()
+    seconds = time.perf_counter() - started
+    tracemalloc.start()
+    result = work()
+    peak = tracemalloc.get_traced_memory()[1] / 2**20
+    tracemalloc.stop()
+    return result, peak, seconds
+
+
+def main():
+    rng = random.Random(25)
+    with tempfile.TemporaryDirectory() as tmp:
+        jsonl_path = os.path.join(tmp, "articles.jsonl")
+        json_path = os.path.join(tmp, "articles.json")
+        duplicates = 0
+        with open(jsonl_path, "w") as jsonl, open(json_path, "w") as array:
+            array.write("[")
+            for n, (article, duplicate) in enumerate(articles(rng)):
+                line = json.dumps(article)
+                jsonl.write(line + "\n")
+                array.write(("," if n else "") + line)
+                duplicates += duplicate
+            array.write("]")
+        print(f"{ARTICLES} articles ({duplicates} duplicated), {os.path.getsize(jsonl_path) / 2**20:.0f} MiB on disk")
+
+        def stream(path):
+            stats = Counter()
+            for _ in iter_chunks(path, set(), stats):
+                pass
+            return stats
+
+        stats, peak, seconds = measure(lambda: stream(jsonl_path))
+        print(f"stream .jsonl:  peak {peak:6.1f} MiB, {seconds:.1f} s  {dict(stats)}")
+        _, peak, seconds = measure(lambda: stream(json_path))
+        print(f"stream .json:   peak {peak:6.1f} MiB, {seconds:.1f} s")
+
+        def load_whole():
+            with open(json_path) as f:
+                return len(json.load(f))
+
+        _, peak, seconds = measure(load_whole)
+        print(f"json.load:      peak {peak:6.1f} MiB, {seconds:.1f} s  (before any indexing)")
+
+        store = DocumentStore(data_dir=tmp, vectors=False)
+        result = CorpusIngester(store).ingest(jsonl_path)
+        print(f"ingest into the store: {result['added']} chunks of {result['articles']} articles at "
+              f"{result['added'] / result['seconds']:.0f} chunks/s, {result['duplicates']} duplicate chunks dropped; "
+              f"index {store.index.stats()}")
+
+        knowledge_dir = os.path.join(tmp, "knowledge")
+        os.mkdir(knowledge_dir)
+        os.rename(jsonl_path, os.path.join(knowledge_dir, "articles.jsonl"))
+        tracemalloc.start()
+        started = time.perf_counter()
+        store = DocumentStore(data_dir=tmp, vectors=False, knowledge_dir=knowledge_dir)
+        seconds = time.perf_counter() - started
+        kept, peak = (size / 2**20 for size in tracemalloc.get_traced_memory())
+        tracemalloc.stop()
+        print(f"store startup:  {len(store.documents)} documents in {seconds:.1f} s (traced); "
+              f"peak {peak:.0f} MiB, {kept:.0f} MiB kept, {peak - kept:.0f} MiB above what is kept")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+# benchmarks/bench_model_router.py
+#
+# Routes a mix of prompts through the model router while the simulated
+# latency of the stronger model degrades and recovers, and reports where
+# traffic went plus the per-decision overhead.
+#
+#   cd backend && PYTHONPATH=. python benchmarks/bench_model_router.py
+import random
+import time
+from collections import Counter
+
+from services.model_selector import ModelRouter
+
+HAIKU = "anthropic.claude-3-haiku-20240307-v1:0"
+SONNET = "anthropic.claude-3-5-sonnet-20240620-v1:0"
+
+PROMPTS = [
+    "What is a cover letter?",
+    "Can you review my resume for a product manager role?",
+    "How do I negotiate a counter offer from my current employer?",
+    "Tips for networking at a tech meetup",
+    "Compare data science and data engineering careers in detail",
+    "Is a PMP certificate worth it?",
+]
+
+
+def run_phase(router, label, latencies, calls=2000):
+    decisions = Counter()
+    for _ in range(calls):
+        prompt = random.choice(PROMPTS)
+        decision = router.route(prompt, [{"role": "user", "content": prompt}])
+        decisions[(decision["model_id"] == SONNET and "sonnet" or "haiku", decision["reason"])] += 1
+        mean = latencies[decision["model_id"]]
+        router.record(decision["model_id"], random.uniform(0.8, 1.2) * mean)
+    print(f"{label:<26} " + ", ".join(f"{m}/{r}: {n}" for (m, r), n in sorted(decisions.items())))
+
+
+def main():
+    random.seed(3)
+    router = ModelRouter([HAIKU, SONNET], latency_slo=8.0, recovery_seconds=0.5)
+    run_phase(router, "healthy", {HAIKU: 1.5, SONNET: 4.0})
+    run_phase(router, "sonnet degraded (12 s)", {HAIKU: 1.5, SONNET: 12.0})
+    # Nothing is sent to the slow model, so it is retried once its samples go stale
+    time.sleep(0.6)
+    run_phase(router, "sonnet recovered", {HAIKU: 1.5, SONNET: 4.0})
+
+    started = time.perf_counter()
+    for i in range(20000):
+        router.route(PROMPTS[i % len(PROMPTS)])
+    print(f"route(): {(time.perf_counter() - started) / 20000 * 1e6:.1f} µs per decision")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+# benchmarks/bench_pii_scrubber.py
+#
+# Times the single-pass scrubber against the three per-module copies it
+# replaced and reports how often their outputs agree.
+#
+#   cd backend && PYTHONPATH=. python benchmarks/bench_pii_scrubber.py
+import random
+import re
+import timeit
+
+from services.pii_scrubber import ScrubbedText, scrub_pii
+
+
+# Reference implementation, as it lived in app/chat.py
+def legacy_chat_scrub_pii(text: str) -> str:
+    text = re.sub(r'[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}', '[EMAIL REDACTED]', text)
+    phone_patterns = [
+        r'\b\+\d{1,3}[\s-]?\(?\d{3}\)?[\s.-]?\d{3}[\s.-]?\d{4}\b',
+        r'\b\(?\d{3}\)?[\s.-]?\d{3}[\s.-]?\d{4}\b'
+    ]
+    for pattern in phone_patterns:
+        text = re.sub(pattern, '[PHONE REDACTED]', text)
+    text = re.sub(r'\b\d{3}[-\s]?\d{2}[-\s]?\d{4}\b', '[ID REDACTED]', text)
+    text = re.sub(r'https?://[^\s/]+/(?:user|profile|account|u)/[a-zA-Z0-9_-]+', '[URL REDACTED]', text)
+    address_patterns = [
+        r'\b\d+\s+[A-Za-z0-9\s,]+(?:Avenue|Ave|Street|St|Road|Rd)\b',
+        r'\b\d+\s+[A-Za-z0-9\s,]+(?:Boulevard|Blvd|Lane|Ln|Drive|Dr)\b',
+        r'\b\d+\s+[A-Za-z0-9\s,]+(?:Way|Court|Ct|Plaza|Square|Sq)\b',
+        r'\b\d+\s+[A-Za-z0-9\s,]+(?:Trail|Tr|Parkway|Pkwy|Circle|Cir)\b'
+    ]
+    for pattern in address_patterns:
+        text = re.sub(pattern, '[ADDRESS REDACTED]', text)
+    text = re.sub(r'\b(?:whatsapp|telegram|signal|viber)(?:\s+at)?\s+[+]?\d[0-9\s-]{7,}', '[CONTACT REDACTED]', text)
+    text = re.sub(r'linkedin\.com/in/[a-zA-Z0-9_-]+', '[LINKEDIN REDACTED]', text)
+    text = re.sub(r'@\w{2,}', '[SOCIAL MEDIA HANDLE REDACTED]', text)
+    return text
+
+
+# Reference implementation, as it lived in EphemeralContextManager.scrub_pii
+def legacy_context_scrub_pii(text: str) -> str:
+    text = re.sub(r'[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}', '[EMAIL REDACTED]', text)
+    text = re.sub(r'\b(\+\d{1,3}[\s-]?)?\(?\d{3}\)?[\s.-]?\d{3}[\s.-]?\d{4}\b', '[PHONE REDACTED]', text)
+    text = re.sub(r'\b\d{3}[-\s]?\d{2}[-\s]?\d{4}\b', '[ID REDACTED]', text)
+    text = re.sub(r'https?://[^\s/]+/(?:user|profile|account|u)/[a-zA-Z0-9_-]+', '[URL REDACTED]', text)
+    text = re.sub(r'\b\d+\s+[A-Za-z0-9\s,]+(?:Ave|St|Rd|Blvd|Ln|Dr|Way|Ct|Sq|Tr|Pkwy|Cir)\b', '[ADDRESS REDACTED]', text)
+    text = re.sub(r'\b(?:whatsapp|telegram|signal|viber)(?:\s+at)?\s+[+]?\d[\d\s-]{7,}', '[CONTACT REDACTED]', text)
+    text = re.sub(r'linkedin\.com/in/[a-zA-Z0-9_-]+', '[LINKEDIN REDACTED]', text)
+    text = re.sub(r'@\w{2,}', '[SOCIAL MEDIA HANDLE REDACTED]', text)
+    return text
+
+
+# Reference implementation, as it lived in services/supabase.py
+def legacy_supabase_scrub_pii(text: str) -> str:
+    text = re.sub(r'[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}', '[EMAIL REDACTED]', text)
+    text = re.sub(r'\b\+?\d{1,3}[-.\s]?\d{3}[-.\s]?\d{3}[-.\s]?\d{4}\b', '[PHONE REDACTED]', text)
+    text = re.sub(r'\b\d{3}[-\s]?\d{2}[-\s]?\d{4}\b', '[ID REDACTED]', text)
+    text = re.sub(r'https?://[^\s/]+/(?:user|profile|account|u)/[a-zA-Z0-9_-]+', '[URL REDACTED]', text)
+    text = re.sub(r'\b\d+\s+[A-Za-z0-9\s,]+(?:Ave|St|Rd|Blvd|Ln|Dr|Way|Ct|Sq|Tr|Pkwy|Cir)\b', '[ADDRESS REDACTED]', text)
+    text = re.sub(r'\b(?:whatsapp|telegram|signal|viber)(?:\s+at)?\s+[+]?\d[\d\s-]{7,}', '[CONTACT REDACTED]', text)
+    text = re.sub(r'linkedin\.com/in/[a-zA-Z0-9_-]+', '[LINKEDIN REDACTED]', text)
+    text = re.sub(r'@\w{2,}', '[SOCIAL MEDIA HANDLE REDACTED]', text)
+    return text
+
+
+def legacy_request(prompt: str, reply: str):
+    # One authenticated request: chat scrubs prompt and reply, then save_chat
+    # and the context store each scrub both again.
+    clean_prompt = legacy_chat_scrub_pii(prompt)
+    clean_reply = legacy_chat_scrub_pii(reply)
+    legacy_supabase_scrub_pii(clean_prompt)
+    legacy_supabase_scrub_pii(clean_reply)
+    legacy_context_scrub_pii(clean_prompt)
+    legacy_context_scrub_pii(clean_reply)
+
+
+def unified_request(prompt: str, reply: str):
+    clean_prompt = scrub_pii(prompt)
+    clean_reply = scrub_pii(reply)
+    scrub_pii(clean_prompt)
+    scrub_pii(clean_reply)
+    scrub_pii(clean_prompt)
+    scrub_pii(clean_reply)
+
+
+PII_SNIPPETS = [
+    "jane.doe@example.com", "+1 (555) 123-4567", "555.123.4567", "123-45-6789",
+    "https://site.com/user/jane_doe", "42 Baker Street", "whatsapp at +91 98765 43210",
+    "linkedin.com/in/jane-doe", "@janedoe",
+]
+
+FILLER = (
+    "I have five years of experience in product management and want to move into a "
+    "leadership role at a larger company. What should I focus on when preparing my resume "
+    "and how do I talk about the gap after my maternity leave in interviews?"
+).split()
+
+
+def build_corpus(size: int, seed: int = 11) -> list:
+    rng = random.Random(seed)
+    corpus = []
+    for _ in range(size):
+        words = rng.choices(FILLER, k=rng.randint(8, 80))
+        if rng.random() < 0.4:
+            words.insert(rng.randrange(len(words) + 1), rng.choice(PII_SNIPPETS))
+        corpus.append(" ".join(words))
+    return corpus
+
+
+def main():
+    corpus = build_corpus(2000)
+    pairs = list(zip(corpus[::2], corpus[1::2]))
+
+    assert all(isinstance(scrub_pii(t), ScrubbedText) for t in corpus)
+    for name, legacy in [("chat", legacy_chat_scrub_pii),
+                         ("context", legacy_context_scrub_pii),
+                         ("supabase", legacy_supabase_scrub_pii)]:
+        agree = sum(scrub_pii(t) == legacy(t) for t in corpus)
+        seconds = min(timeit.repeat(lambda: [legacy(t) for t in corpus], number=1, repeat=5))
+        print(f"{name:>9} copy: {seconds / len(corpus) * 1e6:8.2f} us/text  output agreement {agree}/{len(corpus)}")
+
+    seconds = min(timeit.repeat(lambda: [scrub_pii(t) for t in corpus], number=1, repeat=5))
+    print(f"{'unified':>14}: {seconds / len(corpus) * 1e6:8.2f} us/text")
+
+    for name, fn in [("legacy request", legacy_request), ("unified request", unified_request)]:
+        seconds = min(timeit.repeat(lambda: [fn(p, r) for p, r in pairs], number=1, repeat=5))
+        print(f"{name:>15}: {seconds / len(pairs) * 1e6:8.2f} us/request (prompt + reply, all layers)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+# benchmarks/bench_stream.py
+#
+# Drives the /chat/stream event generator against the local fake Bedrock
+# backend and compares time-to-first-byte with the buffered path.
+#
+#   cd backend && PYTHONPATH=. python benchmarks/bench_stream.py
+import asyncio
+import os
+import random
+import time
+
+os.environ.setdefault("AWS_REGION", "us-east-1")
+os.environ.setdefault("AWS_ACCOUNT_ID", "000000000000")
+os.environ.setdefault("SUPABASE_URL", "http://localhost:54321")
+os.environ.setdefault("SUPABASE_ANON_KEY", "local")
+
+from app.chat import context_manager, response_cache, stream_reply_events
+from services.admission import bedrock_limiter
+from services.pii_scrubber import StreamScrubber
+from benchmarks.fake_bedrock import FakeBedrockClient
+
+REPLY = (
+    "Start by tailoring your resume to the role. Email me at jane@example.com if you want a review. "
+    "Quantify your impact with numbers: revenue, users, latency. Practice behavioral questions out loud. "
+    "Finally, prepare two or three questions for the interviewer!"
+)
+
+SPLIT_WORDS = "Street Lane the role team your skills project impact build learn Main Oak data years growth".split()
+SPLIT_PII = ["123 Main Street", "42 Oak Lane", "whatsapp at +91 98765 43210", "555-123-4567", "jane.doe@example.com"]
+
+
+def check_split_pii(streams=3000):
+    """Streams long replies without sentence breaks in random pieces; no PII may go out whole or split across sends."""
+    rng = random.Random(4)
+    leaks = 0
+    for _ in range(streams):
+        words = [str(rng.randint(1, 99))]
+        length = rng.randint(300, 5000)
+        while sum(len(word) + 1 for word in words) < length:
+            words.append(rng.choice(SPLIT_PII) if rng.random() < 0.08 else rng.choice(SPLIT_WORDS))
+        text = " ".join(words)
+        scrubber, sent, pos = StreamScrubber(), [], 0
+        while pos < len(text):
+            step = rng.randint(1, 60)
+            sent.append(scrubber.feed(text[pos:pos + step]))
+            pos += step
+        sent = [piece for piece in sent + [scrubber.flush()] if piece]
+        leaks += any(
+            pii in piece or any(piece.endswith(pii[:i]) and after.startswith(pii[i:]) for i in range(1, len(pii)))
+            for piece, after in zip(sent, sent[1:] + [""]) for pii in SPLIT_PII
+        )
+    # One address that only ends at the hard cap
+    scrubber = StreamScrubber()
+    sent = "".join(scrubber.feed(piece) for piece in ["12 "] + ["Main Street "] * 200) + scrubber.flush()
+    assert "12 Main" not in sent, sent[:80]
+    assert not leaks, f"{leaks} of {streams} streams leaked PII"
+
+
+async def run_stream(client, anon_id):
+    messages = [{"role": "user", "content": "How do I prepare for an interview?"}]
+    started = time.perf_counter()
+    first_byte = None
+    events = []
+    async for event in stream_reply_events("How do I prepare for an interview?", messages, anon_id,
+                                           "guest", True, time.time(), client=client):
+        if first_byte is None:
+            first_byte = time.perf_counter() - started
+        events.append(event)
+    return first_byte, time.perf_counter() - started, events
+
+
+async def main():
+    client = FakeBedrockClient(reply=REPLY)
+    ttfb, total, events = await run_stream(client, "bench-stream")
+    print(f"stream: first byte {ttfb * 1000:.0f} ms, done {total * 1000:.0f} ms, {len(events)} events")
+    print(f"buffered equivalent: first byte {total * 1000:.0f} ms")
+
+    done = events[-1]
+    assert done.startswith("event: done"), done
+    assert "jane@example.com" not in "".join(events), "PII leaked into the stream"
+    assert context_manager.get_context("bench-stream"), "reply was not stored"
+    limiter = bedrock_limiter.stats()
+    assert limiter["in_flight"] == 0 and limiter["min_latency_ms"] == 0, limiter
+
+    # Same prompt again: drop the cached reply so the guardrail stream is actually sent
+    response_cache.clear()
+    _, _, events = await run_stream(FakeBedrockClient(reply=REPLY, guardrail=True), "bench-guardrail")
+    assert '"guardrail_intervened": true' in events[-1]
+    assert not context_manager.get_context("bench-guardrail"), "guardrail reply was stored"
+    check_split_pii()
+    print("guardrail and PII checks passed")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,95 @@
+# benchmarks/bench_supabase_rest.py
+#
+# Runs the chat_history data access against a local PostgREST stand-in:
+# checks the fetch_chat_history/save_chat round trip, compares a connection per call with the pooled client for single and
+# concurrent reads, and shows retries on 503s and a stalled request cut off at its
+# deadline.
+#
+#   cd backend && PYTHONPATH=. python benchmarks/bench_supabase_rest.py
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import httpx
+
+from benchmarks.postgrest_standin import PostgrestStandIn
+
+# 2 ms per query, 30 ms of TCP + TLS round trips per new connection
+server = PostgrestStandIn(api_key="bench-key", latency=0.002, handshake=0.03).start()
+os.environ["SUPABASE_URL"] = server.url
+os.environ["SUPABASE_ANON_KEY"] = "bench-key"
+
+from services.supabase import chat_writer, fetch_chat_history, insert_chat_rows, save_chat  # noqa: E402
+from services.supabase_rest import SupabaseRestClient, supabase_rest  # noqa: E402
+
+USERS = 50
+READS = 2000
+THREADS = 16
+SEQUENTIAL_READS = 200
+
+
+# Same HTTP client code with keep-alive off, so every call opens a new connection
+unpooled = httpx.Client(base_url=f"{server.url}/rest/v1/", headers={"apikey": "bench-key"},
+                        limits=httpx.Limits(max_keepalive_connections=0))
+
+
+def unpooled_fetch(user_id, limit=5):
+    response = unpooled.get("chat_history", params={
+        "select": "prompt,response,timestamp", "user_id": f"eq.{user_id}",
+        "order": "timestamp.desc", "limit": str(limit)})
+    response.raise_for_status()
+    return list(reversed(response.json()))
+
+
+def timed_reads(name, fetch):
+    connections = server.connections
+    started = time.perf_counter()
+    for i in range(SEQUENTIAL_READS):
+        fetch(f"user-{i % USERS}", 5)
+    latency = (time.perf_counter() - started) / SEQUENTIAL_READS
+    started = time.perf_counter()
+    with ThreadPoolExecutor(THREADS) as pool:
+        results = list(pool.map(lambda i: fetch(f"user-{i % USERS}", 5), range(READS)))
+    elapsed = time.perf_counter() - started
+    assert all(len(rows) == 5 for rows in results)
+    print(f"{name}: {latency * 1000:.1f} ms per read one at a time; {READS} reads from {THREADS} threads "
+          f"in {elapsed:.2f} s ({READS / elapsed:.0f}/s); {server.connections - connections} connections opened")
+
+
+def main():
+    rows = [{"user_id": f"user-{u}", "prompt": f"Question {t}", "response": f"Answer {t}",
+             "timestamp": f"2026-01-01T00:00:{t:02d}+00:00"} for u in range(USERS) for t in range(12)]
+    insert_chat_rows(rows)
+    history = fetch_chat_history("user-7", limit=5)
+    assert [r["prompt"] for r in history] == [f"Question {t}" for t in range(7, 12)]
+
+    save_chat("user-new", "How do I ask for a raise?", "Start with your impact.")
+    chat_writer.stop()
+    assert fetch_chat_history("user-new")[-1]["prompt"] == "How do I ask for a raise?"
+    print("round trip matches")
+
+    timed_reads("connection per call", unpooled_fetch)
+    timed_reads("pooled client      ", fetch_chat_history)
+
+    before = supabase_rest.stats()["retries"]
+    server.fail_next(2, status=503)
+    assert len(fetch_chat_history("user-3")) == 5
+    print(f"two 503s absorbed by {supabase_rest.stats()['retries'] - before} retries")
+
+    strict = SupabaseRestClient(deadline=0.3)
+    server.stall_next(1, 2.0)
+    started = time.perf_counter()
+    try:
+        strict.select("chat_history", {"user_id": "eq.user-1"})
+        raise AssertionError("stalled request was not cut off")
+    except TimeoutError as e:
+        print(f"stalled request cut off after {time.perf_counter() - started:.2f} s: {e}")
+    strict.close()
+
+    print(f"stats: {supabase_rest.stats()}")
+    supabase_rest.close()
+    server.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+# benchmarks/fake_bedrock.py
+#
+# Local stand-in for the bedrock-runtime client. It speaks the same response
+# shapes as invoke_model / invoke_model_with_response_stream so the chat paths
+# can be exercised without AWS.
+import io
+import json
+import threading
+import time
+
+from botocore.exceptions import ClientError
+
+
+class FakeBedrockClient:
+
+    def __init__(self, reply="Tailor your resume to each role. Quantify your impact. Practice mock interviews.",
+                 token_delay=0.02, first_token_delay=0.3, guardrail=False, capacity=None):
+        self.reply = reply
+        self.token_delay = token_delay
+        self.first_token_delay = first_token_delay
+        self.guardrail = guardrail
+        # Requests beyond this many concurrent calls are throttled, like a Bedrock quota
+        self.capacity = capacity
+        self.calls = 0
+        self.throttles = 0
+        self.in_flight = 0
+        self._lock = threading.Lock()
+
+    def invoke_model(self, **kwargs):
+        with self._lock:
+            self.calls += 1
+            if self.capacity is not None and self.in_flight >= self.capacity:
+                self.throttles += 1
+                raise ClientError({"Error": {"Code": "ThrottlingException", "Message": "Too many requests"}},
+                                  "InvokeModel")
+            self.in_flight += 1
+        try:
+            time.sleep(self.first_token_delay + self.token_delay * len(self.reply.split()))
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+        body = json.dumps({"content": [{"type": "text", "text": self.reply}]}).encode()
+        return {"body": io.BytesIO(body)}
+
+    def invoke_model_with_response_stream(self, **kwargs):
+        self.calls += 1
+        return {"body": self._events()}
+
+    def _events(self):
+        time.sleep(self.first_token_delay)
+        yield self._chunk({"type": "message_start"})
+        for i, word in enumerate(self.reply.split(" ")):
+            if i:
+                time.sleep(self.token_delay)
+            text = word if i == 0 else " " + word
+            yield self._chunk({"type": "content_block_delta", "delta": {"type": "text_delta", "text": text}})
+        stop = {"type": "message_stop"}
+        if self.guardrail:
+            stop["amazon-bedrock-guardrailAction"] = "INTERVENED"
+        yield self._chunk(stop)
+
+    def _chunk(self, payload):
+        return {"chunk": {"bytes": json.dumps(payload).encode()}}
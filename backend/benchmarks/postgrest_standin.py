@@ -0,0 +1,148 @@
+# benchmarks/postgrest_standin.py
+#
+# A small in-memory stand-in for Supabase's PostgREST endpoint, enough for
+# services/supabase_rest.py: GET with select, eq./lt./gt. filters, order
+# and limit, and POST inserts. Keeps connections alive like the real one,
+# can charge ``handshake`` seconds for each new connection (the TCP and TLS
+# round trips to a hosted project that loopback does not have), and can be
+# told to fail or stall requests to exercise retries and deadlines.
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl, urlsplit
+
+OPERATORS = {
+    "eq": lambda value, arg: str(value) == arg,
+    "lt": lambda value, arg: str(value) < arg,
+    "gt": lambda value, arg: str(value) > arg,
+}
+
+
+class PostgrestStandIn(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, api_key: str = "test-key", latency: float = 0.0, handshake: float = 0.0):
+        super().__init__(("127.0.0.1", 0), _Handler)
+        self.api_key = api_key
+        self.latency = latency
+        self.handshake = handshake
+        self.tables = {}
+        self.lock = threading.Lock()
+        self.connections = 0
+        self.requests = 0
+        self.faults = []
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+    def start(self) -> "PostgrestStandIn":
+        self._thread = threading.Thread(target=self.serve_forever, name="postgrest-standin", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+    def fail_next(self, count: int, status: int = 503):
+        """The next ``count`` requests get ``status`` instead of being served."""
+        with self.lock:
+            self.faults.extend([("status", status)] * count)
+
+    def stall_next(self, count: int, seconds: float):
+        """The next ``count`` requests are held for ``seconds`` before being served."""
+        with self.lock:
+            self.faults.extend([("stall", seconds)] * count)
+
+    def next_fault(self):
+        with self.lock:
+            self.requests += 1
+            return self.faults.pop(0) if self.faults else None
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # Headers and body go out in separate writes; without this, Nagle and
+    # delayed ACKs add ~40 ms to every request on a kept-alive connection
+    disable_nagle_algorithm = True
+
+    def setup(self):
+        super().setup()
+        with self.server.lock:
+            self.server.connections += 1
+        if self.server.handshake:
+            time.sleep(self.server.handshake)
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        table = self._begin()
+        if table is None:
+            return
+        params = parse_qsl(urlsplit(self.path).query)
+        with self.server.lock:
+            rows = list(self.server.tables.get(table, []))
+        columns, order, limit = None, None, None
+        for name, value in params:
+            if name == "select":
+                columns = None if value == "*" else value.split(",")
+            elif name == "order":
+                column, _, direction = value.partition(".")
+                order = (column, direction == "desc")
+            elif name == "limit":
+                limit = int(value)
+            else:
+                op, _, arg = value.partition(".")
+                rows = [row for row in rows if name in row and OPERATORS[op](row[name], arg)]
+        if order:
+            rows.sort(key=lambda row: row.get(order[0], ""), reverse=order[1])
+        if limit is not None:
+            rows = rows[:limit]
+        if columns:
+            rows = [{column: row.get(column) for column in columns} for row in rows]
+        self._reply(200, rows)
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        body = self.rfile.read(length)
+        table = self._begin()
+        if table is None:
+            return
+        rows = json.loads(body)
+        rows = rows if isinstance(rows, list) else [rows]
+        with self.server.lock:
+            self.server.tables.setdefault(table, []).extend(rows)
+        if "return=minimal" in self.headers.get("Prefer", ""):
+            self._reply(201, None)
+        else:
+            self._reply(201, rows)
+
+    def _begin(self):
+        if self.headers.get("apikey") != self.server.api_key:
+            self._reply(401, {"message": "Invalid API key"})
+            return None
+        fault = self.server.next_fault()
+        if self.server.latency:
+            time.sleep(self.server.latency)
+        if fault is not None and fault[0] == "stall":
+            time.sleep(fault[1])
+        if fault is not None and fault[0] == "status":
+            self._reply(fault[1], {"message": "injected failure"})
+            return None
+        path = urlsplit(self.path).path
+        if not path.startswith("/rest/v1/"):
+            self._reply(404, {"message": "Not found"})
+            return None
+        return path[len("/rest/v1/"):]
+
+    def _reply(self, status: int, payload):
+        body = b"" if payload is None else json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
@@ -0,0 +1,167 @@
+# services/admission.py
+import heapq
+import itertools
+import os
+import random
+import threading
+import time
+from typing import Any, Dict, Optional
+
+BEDROCK_INITIAL_CONCURRENCY = int(os.getenv("BEDROCK_INITIAL_CONCURRENCY", "16"))
+BEDROCK_MIN_CONCURRENCY = int(os.getenv("BEDROCK_MIN_CONCURRENCY", "1"))
+BEDROCK_MAX_CONCURRENCY = int(os.getenv("BEDROCK_MAX_CONCURRENCY", "128"))
+BEDROCK_QUEUE_TIMEOUT_SECONDS = float(os.getenv("BEDROCK_QUEUE_TIMEOUT_SECONDS", "20"))
+
+
+class AdmissionTimeout(RuntimeError):
+    pass
+
+
+class _Waiter:
+    __slots__ = ("finish", "seq", "start", "granted", "cancelled")
+
+    def __init__(self, start: float, finish: float, seq: int):
+        self.start = start
+        self.finish = finish
+        self.seq = seq
+        self.granted = False
+        self.cancelled = False
+
+    def __lt__(self, other: "_Waiter") -> bool:
+        return (self.finish, self.seq) < (other.finish, other.seq)
+
+
+class AdaptiveLimiter:
+    """
+    Admission control for model calls shared by every request in the process.
+
+    The concurrency limit follows AIMD: it grows by 1/limit per call that
+    finishes near the best latency seen, is trimmed when latency drifts well
+    above that baseline, and is cut multiplicatively on every throttle.
+
+    Callers beyond the limit wait in a start-time fair queue: each call is
+    tagged with a virtual finish time that advances per session, so a session
+    with many queued calls is interleaved with the others instead of being
+    served first come, first served.
+    """
+
+    def __init__(self, initial_limit: int = BEDROCK_INITIAL_CONCURRENCY, min_limit: int = BEDROCK_MIN_CONCURRENCY,
+                 max_limit: int = BEDROCK_MAX_CONCURRENCY, decrease_ratio: float = 0.5,
+                 latency_tolerance: float = 2.0, smoothing: float = 0.2):
+        self.limit = float(initial_limit)
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.decrease_ratio = decrease_ratio
+        self.latency_tolerance = latency_tolerance
+        self.smoothing = smoothing
+
+        self._cond = threading.Condition()
+        self._queue = []
+        # Waiters still waiting; cancelled ones stay in the heap until popped
+        self._waiting = 0
+        self._seq = itertools.count()
+        self._virtual_time = 0.0
+        self._session_finish: Dict[str, float] = {}
+
+        self.in_flight = 0
+        self.latency_ewma: Optional[float] = None
+        self.min_latency: Optional[float] = None
+        self.admitted = 0
+        self.throttles = 0
+        self.timeouts = 0
+
+    def acquire(self, session_key: str = "", weight: float = 1.0, deadline: Optional[float] = None) -> float:
+        """Blocks until a slot is free; returns a token to hand back to release()."""
+        if deadline is None:
+            deadline = time.monotonic() + BEDROCK_QUEUE_TIMEOUT_SECONDS
+        with self._cond:
+            start = max(self._virtual_time, self._session_finish.get(session_key, 0.0))
+            waiter = _Waiter(start, start + 1.0 / max(weight, 1e-6), next(self._seq))
+            self._session_finish[session_key] = waiter.finish
+            heapq.heappush(self._queue, waiter)
+            self._waiting += 1
+            self._dispatch()
+
+            while not waiter.granted:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    waiter.cancelled = True
+                    self._waiting -= 1
+                    self.timeouts += 1
+                    raise AdmissionTimeout("Timed out waiting for model capacity")
+                self._cond.wait(remaining)
+            return time.monotonic()
+
+    def try_acquire(self) -> Optional[float]:
+        """A token if a slot is free right now and nobody is queued for one, else None; never waits."""
+        with self._cond:
+            if self.in_flight >= max(1, int(self.limit)) or self._waiting:
+                return None
+            self.in_flight += 1
+            self.admitted += 1
+            return time.monotonic()
+
+    def release(self, token: float, outcome: str = "ok"):
+        """
+        outcome is "ok", "throttled", "error" or "streamed". Only "ok" feeds
+        the latency baseline; "error" and "streamed" just free the slot.
+        """
+        latency = time.monotonic() - token
+        with self._cond:
+            self.in_flight -= 1
+            if outcome == "throttled":
+                self.throttles += 1
+                self.limit = max(self.min_limit, self.limit * self.decrease_ratio)
+            elif outcome == "ok":
+                self._observe_latency(latency)
+                if self.latency_ewma > self.min_latency * self.latency_tolerance:
+                    self.limit = max(self.min_limit, self.limit * 0.9)
+                else:
+                    self.limit = min(self.max_limit, self.limit + 1.0 / self.limit)
+            self._dispatch()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._cond:
+            return {
+                "limit": self.limit,
+                "in_flight": self.in_flight,
+                "queued": self._waiting,
+                "admitted": self.admitted,
+                "throttles": self.throttles,
+                "timeouts": self.timeouts,
+                "latency_ewma_ms": (self.latency_ewma or 0.0) * 1000,
+                "min_latency_ms": (self.min_latency or 0.0) * 1000,
+            }
+
+    def _observe_latency(self, latency: float):
+        if self.latency_ewma is None:
+            self.latency_ewma = self.min_latency = latency
+            return
+        self.latency_ewma += self.smoothing * (latency - self.latency_ewma)
+        # Let the baseline creep up slowly so one lucky fast call does not pin it forever
+        self.min_latency = min(latency, self.min_latency * 1.01)
+
+    def _dispatch(self):
+        granted = False
+        while self._queue and self.in_flight < max(1, int(self.limit)):
+            waiter = heapq.heappop(self._queue)
+            if waiter.cancelled:
+                continue
+            waiter.granted = True
+            granted = True
+            self._waiting -= 1
+            self.in_flight += 1
+            self.admitted += 1
+            self._virtual_time = max(self._virtual_time, waiter.start)
+        if granted:
+            self._cond.notify_all()
+        if len(self._session_finish) > 10000:
+            self._session_finish = {k: v for k, v in self._session_finish.items() if v > self._virtual_time}
+
+
+def jittered_backoff(attempt: int, base: float = 0.25, cap: float = 8.0) -> float:
+    # "Full jitter": spreads retries from concurrent requests over the whole window
+    return random.uniform(0, min(cap, base * 2 ** attempt))
+
+
+bedrock_limiter = AdaptiveLimiter()
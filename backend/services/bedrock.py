@@ -1,70 +1,226 @@
-import boto3
 import json
 import os
+import threading
 import time
+from typing import Dict, Iterator
 from dotenv import load_dotenv
-from services.model_selector import select_model
+from services.model_selector import select_model, model_router
+from services.bedrock_clients import bedrock_clients
+from services.admission import bedrock_limiter, jittered_backoff, BEDROCK_QUEUE_TIMEOUT_SECONDS
+from services.model_gateway import is_throttle, model_gateway
 from botocore.exceptions import ClientError
 
 load_dotenv()
 
-def ask_bedrock(messages: list) -> dict:
+GUARDRAIL_ID = "y97oobg1ywy2"
+
+BEDROCK_MAX_ATTEMPTS = int(os.getenv("BEDROCK_MAX_ATTEMPTS", "4"))
+
+FALLBACK_PHRASES = [
+    "Sorry, I can't help with that",
+    "I cannot in good conscience",
+    "Let's focus on career-related questions"
+]
+
+
+def is_guardrail_reply(text: str) -> bool:
+    return any(p.lower() in text.lower() for p in FALLBACK_PHRASES)
 
-    region = os.getenv("AWS_REGION")
-    account_id = os.getenv("AWS_ACCOUNT_ID")
-    if not region or not account_id:
-        raise ValueError("Missing AWS_REGION or AWS_ACCOUNT_ID in env")
 
-    model_id = select_model(messages[-1]["content"])
+def build_invoke_kwargs(messages: list) -> Dict:
+    account_id = os.getenv("AWS_ACCOUNT_ID")
+    if not account_id:
+        raise ValueError("Missing AWS_ACCOUNT_ID in env")
 
-    bedrock_runtime = boto3.client("bedrock-runtime", region_name=region)
+    model_id = select_model(messages[-1]["content"], messages)
 
     body = json.dumps({
         "anthropic_version": "bedrock-2023-05-31",
         "messages": messages,
         "max_tokens": 500
     })
-    content_type = "application/json"
 
-    guardrail_id = "y97oobg1ywy2"
-    guardrail_arn = f"arn:aws:bedrock:{region}:{account_id}:guardrail/{guardrail_id}"
+    return {
+        "modelId": model_id,
+        "body": body,
+        "accept": "application/json",
+        "contentType": "application/json",
+        "guardrailVersion": "DRAFT"
+    }
+
+
+def guardrail_arn(region: str) -> str:
+    # The guardrail must exist under the same id in every region in BEDROCK_REGIONS
+    return f"arn:aws:bedrock:{region}:{os.getenv('AWS_ACCOUNT_ID')}:guardrail/{GUARDRAIL_ID}"
+
+
+def invoke_with_retries(call, session_key: str = "", retries: int = BEDROCK_MAX_ATTEMPTS, hold: bool = False):
+    """
+    Runs one Bedrock call under the shared admission limiter. Throttles shrink
+    the limit and are retried with jittered backoff until the attempts or the
+    queue deadline run out; the slot is released before sleeping.
 
-    retries = 3
+    With ``hold`` the slot is kept after a successful call and (result,
+    token) is returned; the caller releases it when the work it admitted,
+    such as a stream, is over.
+    """
+    deadline = time.monotonic() + BEDROCK_QUEUE_TIMEOUT_SECONDS
     for attempt in range(retries):
+        token = bedrock_limiter.acquire(session_key, deadline=deadline)
         try:
-            response = bedrock_runtime.invoke_model(
-                modelId=model_id,
-                body=body,
-                accept="application/json",
-                contentType=content_type,
-                guardrailIdentifier=guardrail_arn,
-                guardrailVersion="DRAFT"
-            )
-
-            response_body = response["body"].read()
-            decoded = json.loads(response_body)
-            final_text = decoded.get("content") or decoded.get("completion", "")
-            if isinstance(final_text, list):
-                final_text = " ".join(part.get("text", "") for part in final_text)
-            fallback_phrases = [
-                "Sorry, I can't help with that",
-                "I cannot in good conscience",
-                "Let's focus on career-related questions"
-            ]
-            guardrail_intervened = any(p.lower() in final_text.lower() for p in fallback_phrases)
-
-            return {
-                "reply": [{"type": "text", "text": final_text.strip()}],  
-                "model_used": model_id,
-                "guardrail_intervened": guardrail_intervened
-            }
-
+            result = call()
         except ClientError as e:
-            if e.response["Error"]["Code"] == "ThrottlingException":
-                time.sleep(2 ** attempt)
-            else:
+            throttled = e.response["Error"]["Code"] == "ThrottlingException"
+            bedrock_limiter.release(token, "throttled" if throttled else "error")
+            if not throttled:
                 raise RuntimeError(f"Client error: {str(e)}")
+            delay = min(jittered_backoff(attempt), deadline - time.monotonic())
+            if delay > 0:
+                time.sleep(delay)
+            continue
         except Exception as e:
+            bedrock_limiter.release(token, "error")
             raise RuntimeError(f"Error calling Bedrock: {str(e)}")
+        if hold:
+            return result, token
+        bedrock_limiter.release(token, "ok")
+        return result
 
     raise RuntimeError("Max retries exceeded")
+
+
+def _routed_invoke(model_id: str, call_region, hedge: bool = True):
+    """Sends a call through the model gateway, counting a failure against the model unless it was a throttle."""
+    try:
+        return model_gateway.invoke(call_region, hedge=hedge)
+    except Exception as e:
+        # A throttle is account capacity, which the admission limiter handles, not a sick model
+        if not is_throttle(e):
+            model_router.record(model_id, ok=False)
+        raise
+
+
+def ask_bedrock(messages: list, session_key: str = "") -> dict:
+    kwargs = build_invoke_kwargs(messages)
+    model_id = kwargs["modelId"]
+
+    def call_region(region):
+        bedrock_runtime = bedrock_clients.get_client(region)
+        response = bedrock_runtime.invoke_model(**kwargs, guardrailIdentifier=guardrail_arn(region))
+
+        response_body = response["body"].read()
+        decoded = json.loads(response_body)
+        final_text = decoded.get("content") or decoded.get("completion", "")
+        if isinstance(final_text, list):
+            final_text = " ".join(part.get("text", "") for part in final_text)
+
+        return {
+            "reply": [{"type": "text", "text": final_text.strip()}],
+            "model_used": model_id,
+            "region": region,
+            "guardrail_intervened": is_guardrail_reply(final_text)
+        }
+
+    def call():
+        started = time.monotonic()
+        result = _routed_invoke(model_id, call_region)
+        model_router.record(model_id, time.monotonic() - started)
+        return result
+
+    return invoke_with_retries(call, session_key)
+
+
+def stream_bedrock(messages: list, client=None, session_key: str = "") -> Iterator[dict]:
+    """
+    Starts a streamed completion and returns an iterator of events:
+    {"type": "text", "text": ...} for each delta and {"type": "guardrail"}
+    when Bedrock reports a guardrail intervention. The request itself is sent
+    before this returns, so throttling is retried here rather than mid-stream.
+    Streams are never hedged, only failed over.
+
+    The admission slot stays taken until the events are exhausted or the
+    iterator is closed, so long generations count against the limit.
+    """
+    kwargs = build_invoke_kwargs(messages)
+    model_id = kwargs["modelId"]
+
+    def call_region(region):
+        bedrock_runtime = client or bedrock_clients.get_client(region)
+        return bedrock_runtime.invoke_model_with_response_stream(**kwargs, guardrailIdentifier=guardrail_arn(region))
+
+    def call():
+        response = _routed_invoke(model_id, call_region, hedge=False)
+        # Time to the first byte says little about a full reply, so only health is recorded
+        model_router.record(model_id)
+        return response
+
+    response, token = invoke_with_retries(call, session_key, hold=True)
+    return StreamEvents(response["body"], token)
+
+
+class StreamEvents:
+    """
+    Iterator over a streamed reply that hands its admission slot back
+    exactly once, and closes the HTTP body, when done, failed or closed.
+    """
+
+    def __init__(self, body, token: float):
+        self._body = body
+        self._events = _iter_stream_events(body)
+        self._token = token
+        self._lock = threading.Lock()
+
+    def __iter__(self):
+        return self
+
+    def __next__(self) -> dict:
+        try:
+            return next(self._events)
+        except StopIteration:
+            self.close()
+            raise
+        except Exception:
+            self._release("error")
+            self._close_body()
+            raise
+
+    def close(self):
+        self._release("streamed")
+        self._close_body()
+
+    def __del__(self):
+        self._release("streamed")
+
+    def _close_body(self):
+        # Separate from the slot: a failed stream must still hand its connection back
+        with self._lock:
+            body, self._body = self._body, None
+        if body is not None and hasattr(body, "close"):
+            try:
+                body.close()
+            except Exception:
+                pass
+
+    def _release(self, outcome: str):
+        with self._lock:
+            token, self._token = self._token, None
+        if token is not None:
+            # Stream length says nothing about capacity, so this frees the slot without a latency sample
+            bedrock_limiter.release(token, outcome)
+
+
+def _iter_stream_events(event_stream) -> Iterator[dict]:
+    for event in event_stream:
+        chunk = event.get("chunk")
+        if not chunk:
+            continue
+        payload = json.loads(chunk["bytes"])
+        if payload.get("amazon-bedrock-guardrailAction") == "INTERVENED":
+            yield {"type": "guardrail"}
+        if payload.get("type") == "content_block_delta":
+            text = payload.get("delta", {}).get("text", "")
+            if text:
+                yield {"type": "text", "text": text}
+        elif "completion" in payload:
+            if payload["completion"]:
+                yield {"type": "text", "text": payload["completion"]}
@@ -0,0 +1,111 @@
+# services/bedrock_clients.py
+import os
+import threading
+from typing import Any, Dict
+
+import boto3
+from botocore.config import Config
+
+BEDROCK_MAX_POOL_CONNECTIONS = int(os.getenv("BEDROCK_MAX_POOL_CONNECTIONS", "64"))
+BEDROCK_CONNECT_TIMEOUT = float(os.getenv("BEDROCK_CONNECT_TIMEOUT", "5"))
+BEDROCK_READ_TIMEOUT = float(os.getenv("BEDROCK_READ_TIMEOUT", "60"))
+
+
+class BedrockClientManager:
+    """
+    One bedrock-runtime client (and one LangChain chat model per model id) per
+    region for the whole process. boto3 clients are safe to share between
+    threads once built, so creation happens under a lock on a private session.
+    Clients are rebuilt after a fork, because pooled sockets must not be
+    shared between uvicorn workers.
+    """
+
+    def __init__(self, max_pool_connections: int = BEDROCK_MAX_POOL_CONNECTIONS):
+        base = Config(
+            max_pool_connections=max_pool_connections,
+            tcp_keepalive=True,
+            connect_timeout=BEDROCK_CONNECT_TIMEOUT,
+            read_timeout=BEDROCK_READ_TIMEOUT,
+        )
+        self.configs = {
+            # Direct calls: throttles surface to the shared admission limiter instead of being retried here
+            "runtime": base.merge(Config(retries={"total_max_attempts": 1})),
+            # LangChain agent calls bypass the limiter, so let botocore retry them
+            "agent": base.merge(Config(retries={"mode": "standard"})),
+        }
+        self._lock = threading.Lock()
+        self._pid = os.getpid()
+        self._session = None
+        self._clients: Dict[tuple, Any] = {}
+        self._chat_models: Dict[tuple, Any] = {}
+        self.clients_created = 0
+        self.client_reuses = 0
+
+    def get_client(self, region: str, purpose: str = "runtime"):
+        with self._lock:
+            self._reset_after_fork()
+            return self._client(region, purpose)
+
+    def get_chat_model(self, model_id: str, region: str):
+        key = (model_id, region)
+        with self._lock:
+            self._reset_after_fork()
+            chat_model = self._chat_models.get(key)
+            if chat_model is None:
+                from langchain_community.chat_models import BedrockChat
+                chat_model = BedrockChat(model_id=model_id, region_name=region, client=self._client(region, "agent"))
+                self._chat_models[key] = chat_model
+            return chat_model
+
+    def stats(self) -> Dict[str, Any]:
+        connections_created = 0
+        requests = 0
+        with self._lock:
+            clients = list(self._clients.values())
+        for client in clients:
+            for pool in _connection_pools(client):
+                connections_created += getattr(pool, "num_connections", 0)
+                requests += getattr(pool, "num_requests", 0)
+        return {
+            "clients": len(clients),
+            "clients_created": self.clients_created,
+            "client_reuses": self.client_reuses,
+            "chat_models": len(self._chat_models),
+            "connections_created": connections_created,
+            "connections_reused": max(0, requests - connections_created),
+            "requests": requests,
+        }
+
+    def _client(self, region: str, purpose: str):
+        # Caller holds the lock
+        key = (region, purpose)
+        client = self._clients.get(key)
+        if client is not None:
+            self.client_reuses += 1
+            return client
+        if self._session is None:
+            self._session = boto3.session.Session()
+        client = self._session.client("bedrock-runtime", region_name=region, config=self.configs[purpose])
+        self._clients[key] = client
+        self.clients_created += 1
+        return client
+
+    def _reset_after_fork(self):
+        if os.getpid() != self._pid:
+            self._pid = os.getpid()
+            self._session = None
+            self._clients = {}
+            self._chat_models = {}
+
+
+def _connection_pools(client):
+    # botocore keeps its urllib3 PoolManager on the endpoint's http session;
+    # there is no public accessor, so read it defensively.
+    try:
+        manager = client._endpoint.http_session._manager
+        return [manager.pools[key] for key in manager.pools.keys()]
+    except Exception:
+        return []
+
+
+bedrock_clients = BedrockClientManager()
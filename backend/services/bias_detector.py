@@ -1,6 +1,7 @@
 import os
 import joblib
 import re
+from functools import lru_cache
 from typing import List, Tuple
 
 EXPLICIT_BIAS_PATTERNS = [
@@ -14,41 +15,69 @@ EXPLICIT_BIAS_PATTERNS = [
     r"gender stereotype"
 ]
 
-def is_gender_biased(text: str) -> bool:
+SAFE_QUERIES = [
+    "behavioral interview",
+    "linkedin profile",
+    "resume",
+    "cv",
+    "scholarships for women",
+    "women in tech",
+    "women coders",
+    "mentorship",
+    "leadership",
+    "career advice",
+    "job search",
+    "interview prep",
+    "prepare for interview"
+]
+
+@lru_cache(maxsize=1)
+def load_bias_model():
+    current_dir = os.path.dirname(os.path.abspath(__file__))
+    model_path = os.path.join(current_dir, "..", "training", "bias_model.pkl")
+    return joblib.load(model_path)
+
+def _rule_based_bias(text: str):
+    """Returns True/False when the rules decide, or None when the model has to."""
     if not text or not text.strip():
         return False
-        
+
     text = text.lower().strip()
-    SAFE_QUERIES = [
-        "behavioral interview",
-        "linkedin profile",
-        "resume",
-        "cv",
-        "scholarships for women",
-        "women in tech",
-        "women coders",
-        "mentorship",
-        "leadership",
-        "career advice",
-        "job search",
-        "interview prep",
-        "prepare for interview"
-    ]
-   
+
     if any(safe_query in text for safe_query in SAFE_QUERIES):
         return False
-   
+
     for pattern in EXPLICIT_BIAS_PATTERNS:
         if re.search(pattern, text, re.IGNORECASE):
             return True
-   
+
+    return None
+
+def is_gender_biased(text: str) -> bool:
+    decided = _rule_based_bias(text)
+    if decided is not None:
+        return decided
+
     try:
-        current_dir = os.path.dirname(os.path.abspath(__file__))
-        model_path = os.path.join(current_dir, "..", "training", "bias_model.pkl")
-        bias_model = joblib.load(model_path)
-        
-        prediction = bias_model.predict_proba([text])[0]
+        prediction = load_bias_model().predict_proba([text.lower().strip()])[0]
         return prediction[1] > 0.8
     except Exception as e:
         print(f"Error using bias model: {e}")
-        return False
\ No newline at end of file
+        return False
+
+def detect_gender_bias_batch(texts: List[str]) -> List[bool]:
+    """Same decisions as is_gender_biased, with one model call for every text the rules leave open."""
+    results = [_rule_based_bias(text) for text in texts]
+    pending = [i for i, decided in enumerate(results) if decided is None]
+
+    if pending:
+        try:
+            probabilities = load_bias_model().predict_proba([texts[i].lower().strip() for i in pending])
+            for i, prediction in zip(pending, probabilities):
+                results[i] = prediction[1] > 0.8
+        except Exception as e:
+            print(f"Error using bias model: {e}")
+            for i in pending:
+                results[i] = False
+
+    return [bool(result) for result in results]
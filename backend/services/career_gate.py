@@ -0,0 +1,160 @@
+# services/career_gate.py
+import re
+from typing import Dict, FrozenSet, Iterable, List, Set
+
+NON_CAREER_TOPICS = [
+    "movie", "film", "cinema", "imdb", "rating", "actor", "actress", "director", "box office",
+    "song", "music", "album", "band", "singer", "concert", "lyrics", "playlist",
+    "medicine", "medical", "health", "doctor", "anxiety", "depression", "therapy", "drug", "pill",
+    "game", "play", "sport", "team", "athlete", "football", "basketball", "baseball",
+    "recipe", "food", "cook", "restaurant", "celebrity", "politics", "news", "weather",
+    "tv show", "book", "novel", "story", "poem", "religion", "god", "birthday", "wedding",
+    "dating", "relationship", "breakup", "girlfriend", "boyfriend", "prayer", "worship",
+    "travel", "vacation", "holiday", "flight", "tickets", "hotel", "tourism",
+    "anime", "manga", "comic", "superhero", "marvel", "dc", "pet", "dog", "cat"
+]
+
+LIST_PATTERNS = [
+    r"list of .+",
+    r"list .+ songs",
+    r"list .+ movies",
+    r"show me .+ list",
+    r"give me list of .+",
+    r"what are the .+ songs",
+    r"top \d+ .+"
+]
+
+CAREER_KEYWORDS = [
+    "job", "career", "resume", "cv", "interview", "skill", "profession",
+    "workplace", "salary", "hiring", "mentor", "education", "degree",
+    "certification", "industry", "employment", "work", "company",
+    "position", "role", "application", "promotion", "leadership",
+    "professional", "business", "office", "team", "manager", "experience",
+    "recruit", "talent", "hr", "human resources", "training", "development",
+    "coaching", "remote", "hybrid", "office", "startup", "corporate",
+    "tech", "technology", "software", "engineering", "developer", "design",
+    "marketing", "finance", "project", "product", "data", "analyst",
+    "portfolio", "network", "networking", "opportunity", "growth", "learn",
+    "job search", "job market", "gap", "break", "returning", "workforce"
+]
+
+CAREER_PHRASES = [
+    "going back to work", "return to work", "change my career",
+    "looking for a job", "find a job", "get hired", "get a job",
+    "career change", "earn more", "switch careers", "career advice",
+    "professional advice", "working parent", "working mother", "working father",
+    "stay at home", "maternity leave", "paternity leave", "career break",
+    "employment gap", "resume gap", "returning to workforce", "career transition"
+]
+
+CAREER_TERMS = ["job", "career", "skill", "course", "training", "resume", "cv", "company", "opportunity"]
+
+QUESTION_STARTERS = ("how", "what", "when", "where", "why", "who", "can")
+
+LIST_WORDS = ["list", "show"]
+
+# Hit categories reported by the matcher
+TOPIC = "topic"
+KEYWORD = "keyword"
+PHRASE = "phrase"
+TERM = "term"
+LIST_WORD = "list_word"
+TELL_ME_ABOUT = "tell_me_about"
+STARTER_TOPIC = "starter_topic"
+
+
+class CareerTopicMatcher:
+    """
+    Finds every keyword, phrase and topic occurrence in a single scan.
+
+    All literals are compiled into one trie-shaped regex wrapped in a
+    lookahead, so ``findall`` visits each start position once and reports
+    the longest literal beginning there. Every shorter literal starting at
+    the same position is a prefix of that match, so its categories are
+    folded into the longest literal's category set ahead of time.
+    """
+
+    def __init__(self, categories: Dict[str, Iterable[str]], list_patterns: List[str]):
+        literal_categories: Dict[str, Set[str]] = {}
+        for category, literals in categories.items():
+            for literal in literals:
+                literal_categories.setdefault(literal, set()).add(category)
+
+        self.hit_categories: Dict[str, FrozenSet[str]] = {}
+        for literal in literal_categories:
+            folded = set()
+            for end in range(1, len(literal) + 1):
+                folded |= literal_categories.get(literal[:end], set())
+            self.hit_categories[literal] = frozenset(folded)
+
+        self.pattern = re.compile(f"(?=({_trie_regex(literal_categories)}))")
+        self.list_pattern = re.compile("|".join(f"(?:{p})" for p in list_patterns))
+
+    def scan(self, text: str) -> Set[str]:
+        hits: Set[str] = set()
+        for literal in set(self.pattern.findall(text)):
+            hits |= self.hit_categories[literal]
+        return hits
+
+    def is_career_related(self, text: str) -> bool:
+        text_lower = text.lower().strip()
+        hits = self.scan(text_lower)
+
+        # Explicitly non-career
+        if TOPIC in hits:
+            if TERM not in hits and self.list_pattern.match(text_lower):
+                return False
+            if len(text_lower.split()) < 10:
+                return False
+        if TELL_ME_ABOUT in hits:
+            return False
+
+        # Career keywords or phrases
+        if KEYWORD in hits or PHRASE in hits:
+            return True
+
+        # Question with career context
+        if text_lower.startswith(QUESTION_STARTERS):
+            return STARTER_TOPIC not in hits
+
+        # List request for career topics
+        return LIST_WORD in hits and TERM in hits
+
+
+def _trie_regex(literals: Iterable[str]) -> str:
+    trie: Dict = {}
+    for literal in literals:
+        node = trie
+        for char in literal:
+            node = node.setdefault(char, {})
+        node[""] = {}
+    return _trie_node_regex(trie)
+
+
+def _trie_node_regex(node: Dict) -> str:
+    branches = [re.escape(char) + _trie_node_regex(child) for char, child in sorted(node.items()) if char]
+    if not branches:
+        return ""
+    body = branches[0] if len(branches) == 1 else f"(?:{'|'.join(branches)})"
+    if "" in node:
+        # Greedy optional suffix so the longest literal on this path wins
+        return f"(?:{body})?"
+    return body
+
+
+career_topic_matcher = CareerTopicMatcher(
+    {
+        TOPIC: NON_CAREER_TOPICS,
+        KEYWORD: CAREER_KEYWORDS,
+        PHRASE: CAREER_PHRASES,
+        TERM: CAREER_TERMS,
+        LIST_WORD: LIST_WORDS,
+        TELL_ME_ABOUT: [f"tell me about {topic}" for topic in NON_CAREER_TOPICS],
+        STARTER_TOPIC: [f"{starter} {topic}" for starter in QUESTION_STARTERS for topic in NON_CAREER_TOPICS],
+    },
+    LIST_PATTERNS,
+)
+
+
+def is_career_related(text: str) -> bool:
+    return career_topic_matcher.is_career_related(text)
@@ -0,0 +1,320 @@
+# services/context_backends.py
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict, deque
+from typing import Any, Dict, List, Optional
+
+from services.context_records import Turn
+
+CONTEXT_BACKEND = os.getenv("CONTEXT_BACKEND", "memory")
+CONTEXT_SQLITE_PATH = os.getenv("CONTEXT_SQLITE_PATH", os.path.join(tempfile.gettempdir(), "disha_context.sqlite3"))
+CONTEXT_EXPIRY_HOURS = float(os.getenv("CONTEXT_EXPIRY_HOURS", "24"))
+CONTEXT_MAX_TURNS = int(os.getenv("CONTEXT_SESSION_MAX_TURNS", "20"))
+CONTEXT_MAX_SESSIONS = int(os.getenv("CONTEXT_MAX_SESSIONS", "50000"))
+CONTEXT_MAX_BYTES = int(os.getenv("CONTEXT_MAX_BYTES", str(256 * 1024 * 1024)))
+CONTEXT_SWEEP_SECONDS = float(os.getenv("CONTEXT_SWEEP_SECONDS", "30"))
+
+CONTEXT_COMPRESS_OLDER_TURNS = os.getenv("CONTEXT_COMPRESS_OLDER_TURNS", "true").lower() == "true"
+CONTEXT_PLAIN_TURNS = int(os.getenv("CONTEXT_PLAIN_TURNS", "6"))
+
+
+class ContextBackend(ABC):
+    """
+    Storage for per-session Turn records. A session expires ``expiry_hours``
+    after its first turn and keeps at most ``max_turns`` turns, oldest
+    dropped first.
+    """
+
+    @abstractmethod
+    def append(self, anon_id: str, prompt: str, response: str):
+        raise NotImplementedError
+
+    @abstractmethod
+    def recent(self, anon_id: str, limit: Optional[int] = None) -> List[Turn]:
+        """The session's turns, oldest first; only the last ``limit`` when given."""
+        raise NotImplementedError
+
+    @abstractmethod
+    def cleanup_expired(self):
+        raise NotImplementedError
+
+    @abstractmethod
+    def stats(self) -> Dict[str, int]:
+        raise NotImplementedError
+
+
+class InProcessContextBackend(ContextBackend):
+    """
+    Dict-backed store for a single worker.
+
+    Every session expires a fixed time after it was created, so sessions
+    expire in creation order and a FIFO of (expires, anon_id) is enough to
+    find them: each read or write pops only what has already expired.
+    Each session keeps its turns in a ring buffer, and the least recently
+    used sessions are evicted once ``max_sessions`` or ``max_bytes`` is
+    exceeded. Turns older than the newest ``plain_turns`` are zlib-packed
+    when ``compress`` is on; the context builder only reads their text
+    when it extends a summary.
+    """
+
+    def __init__(self, expiry_hours: float = CONTEXT_EXPIRY_HOURS, max_turns: int = CONTEXT_MAX_TURNS,
+                 max_sessions: int = CONTEXT_MAX_SESSIONS, max_bytes: int = CONTEXT_MAX_BYTES,
+                 compress: bool = CONTEXT_COMPRESS_OLDER_TURNS, plain_turns: int = CONTEXT_PLAIN_TURNS):
+        self.context_store: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self.expiry_seconds = expiry_hours * 3600
+        self.max_turns = max_turns
+        self.max_sessions = max_sessions
+        self.max_bytes = max_bytes
+        self.compress = compress
+        self.plain_turns = plain_turns
+        self.bytes_held = 0
+        self.evictions = 0
+        self.expirations = 0
+        self._expiry_queue = deque()
+        self._lock = threading.Lock()
+
+    def append(self, anon_id, prompt, response):
+        with self._lock:
+            now = time.monotonic()
+            self._expire(now)
+            session = self.context_store.get(anon_id)
+            if session is None:
+                session = self.context_store[anon_id] = {
+                    'data': deque(maxlen=self.max_turns),
+                    'expires': now + self.expiry_seconds,
+                    'bytes': 0
+                }
+                self._expiry_queue.append((session['expires'], anon_id))
+            else:
+                self.context_store.move_to_end(anon_id)
+
+            data = session['data']
+            turn = Turn(prompt, response, now)
+            delta = turn.nbytes()
+            if len(data) == data.maxlen:
+                delta -= data[0].nbytes()
+            data.append(turn)
+            if self.compress and len(data) > self.plain_turns:
+                aging = data[-self.plain_turns - 1]
+                before = aging.nbytes()
+                if aging.compress():
+                    delta += aging.nbytes() - before
+            session['bytes'] += delta
+            self.bytes_held += delta
+            self._evict(keep=anon_id)
+            if len(self._expiry_queue) > 2 * len(self.context_store) + 1024:
+                self._compact_expiry_queue()
+
+    def recent(self, anon_id, limit=None):
+        with self._lock:
+            self._expire(time.monotonic())
+            session = self.context_store.get(anon_id)
+            if session is None:
+                return []
+            self.context_store.move_to_end(anon_id)
+            data = list(session['data'])
+        return data[-limit:] if limit else data
+
+    def cleanup_expired(self):
+        with self._lock:
+            self._expire(time.monotonic())
+
+    def stats(self):
+        return {
+            "sessions": len(self.context_store),
+            "bytes": self.bytes_held,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+        }
+
+    def export_sessions(self):
+        """Yields (anon_id, expires, turns) per live session, least recently used first. Only the
+        session list is copied under the lock; the turns can be read afterwards with Turn.state()."""
+        with self._lock:
+            self._expire(time.monotonic())
+            keys = list(self.context_store)
+            sessions = list(self.context_store.values())
+        # One short-lived tuple at a time: a list of 100k of them would set off full GC passes that
+        # stall request threads. tuple() of a deque runs in C without releasing the GIL, so it
+        # cannot see a half-done append.
+        for anon_id, session in zip(keys, sessions):
+            yield anon_id, session['expires'], tuple(session['data'])
+
+    def import_sessions(self, sessions):
+        """Adds (anon_id, expires, turns) in least recently used order, keeping newer sessions already held."""
+        with self._lock:
+            for anon_id, expires, turns in sessions:
+                if anon_id in self.context_store:
+                    continue
+                data = deque(turns, maxlen=self.max_turns)
+                size = sum(turn.nbytes() for turn in data)
+                self.context_store[anon_id] = {'data': data, 'expires': expires, 'bytes': size}
+                self.context_store.move_to_end(anon_id, last=False)
+                self.bytes_held += size
+            self._compact_expiry_queue()
+            self._evict(keep=None)
+
+    def _expire(self, now):
+        queue = self._expiry_queue
+        while queue and queue[0][0] < now:
+            expires, anon_id = queue.popleft()
+            session = self.context_store.get(anon_id)
+            # The session may have been evicted (and maybe recreated) since it was queued
+            if session is not None and session['expires'] == expires:
+                self._remove(anon_id)
+                self.expirations += 1
+
+    def _evict(self, keep):
+        while len(self.context_store) > self.max_sessions or self.bytes_held > self.max_bytes:
+            anon_id = next(iter(self.context_store))
+            if anon_id == keep:
+                break
+            self._remove(anon_id)
+            self.evictions += 1
+
+    def _compact_expiry_queue(self):
+        # Drops entries left behind by evicted sessions; amortized over the evictions that made them
+        self._expiry_queue = deque(sorted((s['expires'], k) for k, s in self.context_store.items()))
+
+    def _remove(self, anon_id):
+        session = self.context_store.pop(anon_id)
+        self.bytes_held -= session['bytes']
+
+
+class SqliteContextBackend(ContextBackend):
+    """
+    Store shared by every worker on the host through one SQLite file in WAL
+    mode: readers never block the writer, and a read of the last N turns is
+    a single indexed range scan. Each thread keeps its own connection.
+    Each worker sweeps expired and least recently written sessions at most
+    once per ``sweep_seconds``, piggybacked on a write.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS context_sessions (
+            anon_id TEXT PRIMARY KEY,
+            expires REAL NOT NULL,
+            last_write REAL NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS context_sessions_expires ON context_sessions (expires);
+        CREATE INDEX IF NOT EXISTS context_sessions_last_write ON context_sessions (last_write);
+        CREATE TABLE IF NOT EXISTS context_turns (
+            anon_id TEXT NOT NULL,
+            seq INTEGER NOT NULL,
+            created REAL NOT NULL,
+            payload TEXT NOT NULL,
+            PRIMARY KEY (anon_id, seq)
+        ) WITHOUT ROWID;
+    """
+
+    def __init__(self, path: str = CONTEXT_SQLITE_PATH, expiry_hours: float = CONTEXT_EXPIRY_HOURS,
+                 max_turns: int = CONTEXT_MAX_TURNS, max_sessions: int = CONTEXT_MAX_SESSIONS,
+                 sweep_seconds: float = CONTEXT_SWEEP_SECONDS):
+        self.path = path
+        self.expiry_seconds = expiry_hours * 3600
+        self.max_turns = max_turns
+        self.max_sessions = max_sessions
+        self.sweep_seconds = sweep_seconds
+        self._local = threading.local()
+        self._next_sweep = 0.0
+        self.evictions = 0
+        self.expirations = 0
+        self._connection().executescript(self.SCHEMA)
+
+    def _connection(self) -> sqlite3.Connection:
+        # Connections are per thread and rebuilt after a fork
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=10, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def append(self, anon_id, prompt, response):
+        # Wall-clock time here: the file outlives any one process's monotonic clock
+        now = time.time()
+        payload = json.dumps([prompt, response])
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            # An expired session not yet swept starts over, as it does in memory
+            expired = conn.execute("SELECT 1 FROM context_sessions WHERE anon_id = ? AND expires <= ?",
+                                   (anon_id, now)).fetchone() is not None
+            if expired:
+                conn.execute("DELETE FROM context_turns WHERE anon_id = ?", (anon_id,))
+                conn.execute("DELETE FROM context_sessions WHERE anon_id = ?", (anon_id,))
+            conn.execute(
+                "INSERT INTO context_sessions (anon_id, expires, last_write) VALUES (?, ?, ?) "
+                "ON CONFLICT (anon_id) DO UPDATE SET last_write = excluded.last_write",
+                (anon_id, now + self.expiry_seconds, now))
+            seq = conn.execute(
+                "SELECT COALESCE(MAX(seq), 0) + 1 FROM context_turns WHERE anon_id = ?", (anon_id,)).fetchone()[0]
+            conn.execute("INSERT INTO context_turns (anon_id, seq, created, payload) VALUES (?, ?, ?, ?)",
+                         (anon_id, seq, now, payload))
+            conn.execute("DELETE FROM context_turns WHERE anon_id = ? AND seq <= ?", (anon_id, seq - self.max_turns))
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        self.expirations += expired
+        if now >= self._next_sweep:
+            self.cleanup_expired()
+
+    def recent(self, anon_id, limit=None):
+        rows = self._connection().execute(
+            "SELECT t.payload, t.created FROM context_turns t JOIN context_sessions s ON s.anon_id = t.anon_id "
+            "WHERE t.anon_id = ? AND s.expires > ? ORDER BY t.seq DESC LIMIT ?",
+            (anon_id, time.time(), limit or self.max_turns)).fetchall()
+        return [Turn(*json.loads(payload), created) for payload, created in reversed(rows)]
+
+    def cleanup_expired(self):
+        now = time.time()
+        self._next_sweep = now + self.sweep_seconds
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            expired = [row[0] for row in conn.execute(
+                "SELECT anon_id FROM context_sessions WHERE expires < ?", (now,))]
+            overflow = conn.execute("SELECT COUNT(*) FROM context_sessions").fetchone()[0] \
+                - len(expired) - self.max_sessions
+            evicted = []
+            if overflow > 0:
+                evicted = [row[0] for row in conn.execute(
+                    "SELECT anon_id FROM context_sessions WHERE expires >= ? ORDER BY last_write LIMIT ?",
+                    (now, overflow))]
+            # By key, so only the doomed sessions' turns are touched
+            doomed = [(anon_id,) for anon_id in expired + evicted]
+            conn.executemany("DELETE FROM context_turns WHERE anon_id = ?", doomed)
+            conn.executemany("DELETE FROM context_sessions WHERE anon_id = ?", doomed)
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        self.evictions += len(evicted)
+        self.expirations += len(expired)
+
+    def stats(self):
+        conn = self._connection()
+        page_count = conn.execute("PRAGMA page_count").fetchone()[0]
+        page_size = conn.execute("PRAGMA page_size").fetchone()[0]
+        return {
+            "sessions": conn.execute("SELECT COUNT(*) FROM context_sessions").fetchone()[0],
+            "bytes": page_count * page_size,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+        }
+
+
+def create_context_backend(kind: str = CONTEXT_BACKEND) -> ContextBackend:
+    if kind == "sqlite":
+        return SqliteContextBackend()
+    if kind == "memory":
+        return InProcessContextBackend()
+    raise ValueError(f"Unknown CONTEXT_BACKEND: {kind}")
@@ -0,0 +1,147 @@
+# services/context_builder.py
+import os
+import re
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+from services.metrics import registry
+from services.context_records import Turn, estimate_tokens
+
+CONTEXT_TOKEN_BUDGET = int(os.getenv("CONTEXT_TOKEN_BUDGET", "1200"))
+CONTEXT_SUMMARY_TOKENS = int(os.getenv("CONTEXT_SUMMARY_TOKENS", "250"))
+CONTEXT_MAX_TURNS = int(os.getenv("CONTEXT_MAX_TURNS", "6"))
+CONTEXT_SUMMARY_CACHE_SIZE = int(os.getenv("CONTEXT_SUMMARY_CACHE_SIZE", "10000"))
+
+SUMMARY_PREFIX = "Summary of our earlier conversation:\n"
+SENTENCE_END = re.compile(r"(?<=[.!?])\s")
+
+TOKEN_BUCKETS = (0, 50, 100, 250, 500, 1000, 2000, 4000, 8000, 16000)
+
+CONTEXT_TOKENS = registry.histogram(
+    "disha_context_tokens", "Estimated input tokens per request: sent, and saved versus raw history",
+    ["kind"], buckets=TOKEN_BUCKETS)
+SUMMARIES = registry.counter(
+    "disha_context_summaries_total", "Rolling summary lookups: reused, extended with new turns, or rebuilt",
+    ["outcome"])
+
+
+def as_turn(ctx: Any) -> Optional[Turn]:
+    """Turns from the context store pass through; chat_history rows ({prompt, response}) are wrapped."""
+    if isinstance(ctx, Turn):
+        return ctx
+    if isinstance(ctx, dict):
+        record = ctx.get("context", ctx)
+        if isinstance(record, dict) and "prompt" in record and "response" in record:
+            return Turn(record["prompt"], record["response"])
+    return None
+
+
+def first_sentence(text: str, max_chars: int) -> str:
+    sentence = SENTENCE_END.split(text.strip(), 1)[0]
+    if len(sentence) > max_chars:
+        sentence = sentence[:max_chars].rsplit(" ", 1)[0] + "…"
+    return " ".join(sentence.split())
+
+
+def summary_line(prompt: str, response: str) -> str:
+    return f"- You asked: {first_sentence(prompt, 120)} I said: {first_sentence(response, 160)}"
+
+
+class ContextBuilder:
+    """
+    Fits prior turns into a token budget. The newest turns are passed
+    verbatim; older ones (and any that do not fit) are folded into an
+    extractive rolling summary that is cached per session and only extended
+    when new turns overflow.
+    """
+
+    def __init__(self, budget: int = CONTEXT_TOKEN_BUDGET, summary_tokens: int = CONTEXT_SUMMARY_TOKENS,
+                 max_turns: int = CONTEXT_MAX_TURNS, cache_size: int = CONTEXT_SUMMARY_CACHE_SIZE):
+        self.budget = budget
+        self.summary_tokens = summary_tokens
+        self.max_turns = max_turns
+        self.cache_size = cache_size
+        # session key -> (key of the last summarized turn, summary lines)
+        self._summaries: "OrderedDict[str, Tuple[str, List[str]]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def build(self, session_key: str, turns, clean_prompt: str) -> Tuple[List[Dict[str, str]], Dict[str, int]]:
+        turns = [turn for turn in map(as_turn, turns) if turn]
+        turn_tokens = [turn.tokens for turn in turns]
+        prompt_tokens = estimate_tokens(clean_prompt)
+        # What the fixed last-six-turns window would have sent
+        raw_tokens = prompt_tokens + sum(turn_tokens[-6:])
+
+        kept = self._fit(turn_tokens, self.budget - prompt_tokens)
+        if kept < len(turns):
+            kept = self._fit(turn_tokens, self.budget - prompt_tokens - self.summary_tokens)
+        overflow = turns[:len(turns) - kept]
+
+        messages = []
+        for turn in turns[len(turns) - kept:]:
+            messages.extend(turn.messages())
+        messages.append({"role": "user", "content": clean_prompt})
+
+        if overflow:
+            # Folded into the first user message so roles still alternate
+            summary = SUMMARY_PREFIX + "\n".join(self._summary(session_key, overflow))
+            messages[0] = {"role": "user", "content": f"{summary}\n\n{messages[0]['content']}"}
+
+        sent_tokens = sum(estimate_tokens(m["content"]) for m in messages)
+        report = {
+            "raw_tokens": raw_tokens,
+            "sent_tokens": sent_tokens,
+            "saved_tokens": raw_tokens - sent_tokens,
+            "verbatim_turns": kept,
+            "summarized_turns": len(overflow),
+        }
+        CONTEXT_TOKENS.observe(sent_tokens, kind="sent")
+        CONTEXT_TOKENS.observe(max(0, report["saved_tokens"]), kind="saved")
+        return messages, report
+
+    def _fit(self, turn_tokens: List[int], available: int) -> int:
+        # Newest turns first, and stop at the first one that does not fit so the window stays contiguous
+        kept = 0
+        for tokens in reversed(turn_tokens[-self.max_turns:]):
+            if tokens > available:
+                break
+            available -= tokens
+            kept += 1
+        return kept
+
+    def _summary(self, session_key: str, overflow: List[Turn]) -> List[str]:
+        last_key = overflow[-1].key
+        with self._lock:
+            cached = self._summaries.get(session_key)
+            if cached is not None:
+                self._summaries.move_to_end(session_key)
+        if cached is not None and cached[0] == last_key:
+            SUMMARIES.inc(outcome="reused")
+            return cached[1]
+
+        # Only the text of turns not yet in the summary is read (and, if packed, expanded)
+        keys = [turn.key for turn in overflow]
+        if cached is not None and cached[0] in keys:
+            lines = cached[1] + [summary_line(t.prompt, t.response) for t in overflow[keys.index(cached[0]) + 1:]]
+            SUMMARIES.inc(outcome="extended")
+        else:
+            lines = [summary_line(t.prompt, t.response) for t in overflow]
+            SUMMARIES.inc(outcome="rebuilt")
+
+        # Drop the oldest lines until the summary fits its share of the budget
+        while len(lines) > 1 and sum(estimate_tokens(line) for line in lines) > self.summary_tokens:
+            lines.pop(0)
+
+        with self._lock:
+            self._summaries[session_key] = (last_key, lines)
+            self._summaries.move_to_end(session_key)
+            while len(self._summaries) > self.cache_size:
+                self._summaries.popitem(last=False)
+        return lines
+
+    def stats(self) -> Dict[str, int]:
+        return {"cached_summaries": len(self._summaries)}
+
+
+context_builder = ContextBuilder()
@@ -0,0 +1,113 @@
+# services/context_records.py
+import hashlib
+import struct
+import sys
+import zlib
+from typing import Dict, List, Optional
+
+USER_ROLE = sys.intern("user")
+ASSISTANT_ROLE = sys.intern("assistant")
+
+# Below this much text zlib's header and dictionary overhead eat the savings
+COMPRESS_MIN_BYTES = 256
+_LENGTH = struct.Struct("<I")
+
+
+def estimate_tokens(text: str) -> int:
+    return len(text) // 4 + 1
+
+
+def unpack_text(packed: bytes):
+    raw = zlib.decompress(packed)
+    split = _LENGTH.size + _LENGTH.unpack_from(raw)[0]
+    return raw[_LENGTH.size:split].decode(), raw[split:].decode()
+
+
+class Turn:
+    """
+    One prompt/response pair. ``created`` is on the owning backend's clock
+    (monotonic for the in-process store). The text can be packed into one
+    zlib blob, in which case ``prompt`` and ``response`` are expanded on
+    every read rather than cached back. Reads go through state(), so they
+    are safe while the owning store compresses the turn.
+    """
+
+    __slots__ = ("created", "tokens", "_prompt", "_response", "_packed")
+
+    def __init__(self, prompt: str, response: str, created: Optional[float] = None):
+        self.created = created
+        self.tokens = estimate_tokens(prompt) + estimate_tokens(response)
+        self._prompt = prompt
+        self._response = response
+        self._packed = None
+
+    @property
+    def prompt(self) -> str:
+        return self._text()[0]
+
+    @property
+    def response(self) -> str:
+        return self._text()[1]
+
+    @property
+    def compressed(self) -> bool:
+        return self._packed is not None
+
+    @property
+    def key(self) -> str:
+        if self.created is not None:
+            return repr(self.created)
+        return hashlib.md5(f"{self.prompt}\x00{self.response}".encode()).hexdigest()
+
+    def messages(self) -> List[Dict[str, str]]:
+        prompt, response = self._text()
+        return [{"role": USER_ROLE, "content": prompt}, {"role": ASSISTANT_ROLE, "content": response}]
+
+    def compress(self) -> bool:
+        """Packs the text if that saves at least a fifth of it; returns whether it did."""
+        if self._packed is not None:
+            return False
+        prompt = self._prompt.encode()
+        raw = _LENGTH.pack(len(prompt)) + prompt + self._response.encode()
+        if len(raw) < COMPRESS_MIN_BYTES:
+            return False
+        packed = zlib.compress(raw, 6)
+        if len(packed) > len(raw) * 0.8:
+            return False
+        self._packed = packed
+        self._prompt = self._response = None
+        return True
+
+    def state(self):
+        """(created, tokens, prompt, response, packed), safe to call while another thread compresses."""
+        packed = self._packed
+        if packed is None:
+            prompt, response = self._prompt, self._response
+            if prompt is not None and response is not None:
+                return self.created, self.tokens, prompt, response, None
+            # compress() sets _packed before clearing the text, so it is there now
+            packed = self._packed
+        return self.created, self.tokens, None, None, packed
+
+    @classmethod
+    def restore(cls, created: float, tokens: int, prompt: Optional[str], response: Optional[str],
+                packed: Optional[bytes]) -> "Turn":
+        turn = cls.__new__(cls)
+        turn.created = created
+        turn.tokens = tokens
+        turn._prompt = prompt
+        turn._response = response
+        turn._packed = packed
+        return turn
+
+    def nbytes(self) -> int:
+        if self._packed is not None:
+            return sys.getsizeof(self) + sys.getsizeof(self._packed)
+        return sys.getsizeof(self) + sys.getsizeof(self._prompt) + sys.getsizeof(self._response)
+
+    def _text(self):
+        _, _, prompt, response, packed = self.state()
+        return (prompt, response) if packed is None else unpack_text(packed)
+
+    def __repr__(self):
+        return f"Turn(created={self.created!r}, tokens={self.tokens}, compressed={self.compressed})"
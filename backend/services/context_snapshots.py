@@ -0,0 +1,217 @@
+# services/context_snapshots.py
+import gc
+import os
+import struct
+import tempfile
+import threading
+import time
+from typing import Any, Dict, Optional
+
+from services.context_records import Turn
+
+# Off unless set: a snapshot file belongs to one process, so give each worker its own path
+CONTEXT_SNAPSHOT_PATH = os.getenv("CONTEXT_SNAPSHOT_PATH", "")
+CONTEXT_SNAPSHOT_SECONDS = float(os.getenv("CONTEXT_SNAPSHOT_SECONDS", "60"))
+
+# File layout, all little-endian. Turns the store has already packed are
+# written as they are; the rest is left uncompressed to keep restore fast.
+#   header   magic "DCTX", version u8, wall-clock time of the snapshot f64
+#   session  anon_id length u16, anon_id, seconds left f64, turn count u16
+#   turn     age in seconds f64, tokens u32, flags u8, then either the
+#            packed blob (u32 length + bytes) or prompt and response (each
+#            u32 length + UTF-8 bytes)
+# Times are stored relative to the snapshot because the in-process store
+# runs on the monotonic clock, which restarts with the process.
+MAGIC = b"DCTX"
+VERSION = 1
+HEADER = struct.Struct("<4sBd")
+SESSION = struct.Struct("<H")
+SESSION_TAIL = struct.Struct("<dH")
+TURN = struct.Struct("<dIB")
+LENGTH = struct.Struct("<I")
+PACKED = 1
+SNAPSHOT_CHUNK_BYTES = 1024 * 1024
+
+
+def write_snapshot(backend, path: str) -> int:
+    """Writes every live session to ``path`` atomically; returns the number of sessions written."""
+    now = time.monotonic()
+    written = 0
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(prefix=".context-", dir=directory)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(HEADER.pack(MAGIC, VERSION, time.time()))
+            buffer = bytearray()
+            for anon_id, expires, turns in backend.export_sessions():
+                key = anon_id.encode()
+                buffer += SESSION.pack(len(key))
+                buffer += key
+                buffer += SESSION_TAIL.pack(expires - now, len(turns))
+                for turn in turns:
+                    created, tokens, prompt, response, packed = turn.state()
+                    if packed is not None:
+                        buffer += TURN.pack(now - created, tokens, PACKED)
+                        buffer += LENGTH.pack(len(packed))
+                        buffer += packed
+                    else:
+                        prompt, response = prompt.encode(), response.encode()
+                        buffer += TURN.pack(now - created, tokens, 0)
+                        buffer += LENGTH.pack(len(prompt))
+                        buffer += prompt
+                        buffer += LENGTH.pack(len(response))
+                        buffer += response
+                written += 1
+                if len(buffer) >= SNAPSHOT_CHUNK_BYTES:
+                    f.write(buffer)
+                    buffer.clear()
+            f.write(buffer)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+    return written
+
+
+def read_snapshot(backend, path: str) -> Dict[str, int]:
+    """Loads a snapshot into ``backend``, skipping sessions that expired while the process was down."""
+    with open(path, "rb") as f:
+        header = f.read(HEADER.size)
+        magic, version, written_at = HEADER.unpack(header) if len(header) == HEADER.size else (b"", 0, 0.0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"Not a context snapshot: {path}")
+        data = f.read()
+    view = memoryview(data)
+
+    # Restoring allocates millions of long-lived objects; pausing the collector
+    # avoids repeated full passes over them
+    gc_was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        sessions, dropped = _parse_sessions(data, view, written_at)
+        backend.import_sessions(sessions)
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+    return {"restored": len(sessions), "dropped_expired": dropped}
+
+
+def _parse_sessions(data: bytes, view: memoryview, written_at: float):
+    now = time.monotonic()
+    downtime = max(0.0, time.time() - written_at)
+    offset = 0
+    sessions, dropped = [], 0
+    unpack_turn, unpack_length = TURN.unpack_from, LENGTH.unpack_from
+    while offset < len(data):
+        (key_length,) = SESSION.unpack_from(view, offset)
+        offset += SESSION.size
+        anon_id = data[offset:offset + key_length].decode()
+        offset += key_length
+        remaining, count = SESSION_TAIL.unpack_from(view, offset)
+        offset += SESSION_TAIL.size
+
+        turns = []
+        for _ in range(count):
+            age, tokens, flags = unpack_turn(view, offset)
+            offset += TURN.size
+            (length,) = unpack_length(view, offset)
+            offset += LENGTH.size
+            if flags & PACKED:
+                turn = Turn.restore(now - age - downtime, tokens, None, None, data[offset:offset + length])
+                offset += length
+            else:
+                prompt = data[offset:offset + length].decode()
+                offset += length
+                (length,) = unpack_length(view, offset)
+                offset += LENGTH.size
+                response = data[offset:offset + length].decode()
+                offset += length
+                turn = Turn.restore(now - age - downtime, tokens, prompt, response, None)
+            turns.append(turn)
+
+        remaining -= downtime
+        if remaining <= 0:
+            dropped += 1
+            continue
+        sessions.append((anon_id, now + remaining, turns))
+    return sessions, dropped
+
+
+class ContextSnapshotter:
+    """
+    Snapshots an in-process context store every ``interval`` seconds from a
+    background thread, and once more on stop. Requests only wait for the
+    moment it takes to copy session references out of the store.
+
+    Does nothing when ``path`` is empty, the default. The file belongs to
+    one process: with several workers, share context through
+    CONTEXT_BACKEND=sqlite instead.
+    """
+
+    def __init__(self, backend, path: str = CONTEXT_SNAPSHOT_PATH, interval: float = CONTEXT_SNAPSHOT_SECONDS):
+        self.backend = backend
+        self.path = path
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.snapshots = 0
+        self.failures = 0
+        self.last_sessions = 0
+        self.last_snapshot_seconds = 0.0
+        self.restored = 0
+        self.dropped_expired = 0
+
+    @property
+    def supported(self) -> bool:
+        return hasattr(self.backend, "export_sessions")
+
+    def start(self):
+        """Restores the last snapshot, if any, then starts the periodic writer."""
+        if not self.supported or not self.path:
+            return
+        if os.path.exists(self.path):
+            started = time.perf_counter()
+            try:
+                result = read_snapshot(self.backend, self.path)
+                self.restored = result["restored"]
+                self.dropped_expired = result["dropped_expired"]
+                print(f"[ContextSnapshot] Restored {self.restored} sessions "
+                      f"({self.dropped_expired} expired) in {time.perf_counter() - started:.2f}s")
+            except Exception as e:
+                print(f"[ContextSnapshot] Could not restore {self.path}: {e}")
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="context-snapshotter", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 10.0):
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join(timeout)
+        self._thread = None
+        self.snapshot()
+
+    def snapshot(self):
+        started = time.perf_counter()
+        try:
+            self.last_sessions = write_snapshot(self.backend, self.path)
+        except Exception as e:
+            self.failures += 1
+            print(f"[ContextSnapshot] Snapshot to {self.path} failed: {e}")
+            return
+        self.snapshots += 1
+        self.last_snapshot_seconds = time.perf_counter() - started
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "snapshots": self.snapshots,
+            "failures": self.failures,
+            "last_sessions": self.last_sessions,
+            "last_snapshot_seconds": self.last_snapshot_seconds,
+            "restored_sessions": self.restored,
+            "dropped_expired_sessions": self.dropped_expired,
+        }
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.snapshot()
@@ -0,0 +1,76 @@
+# services/corpus_watcher.py
+import os
+import threading
+import time
+from typing import Any, Dict, Optional
+
+RAG_RELOAD_SECONDS = float(os.getenv("RAG_RELOAD_SECONDS", "30"))
+
+
+class CorpusWatcher:
+    """
+    Calls ``store.refresh()`` every ``interval`` seconds from a background
+    thread, so edits to the link files or the knowledge directory reach the
+    index without a restart. A refresh only stats the files unless one
+    changed, and searches keep running on the previous snapshot meanwhile.
+    """
+
+    def __init__(self, store, interval: float = RAG_RELOAD_SECONDS):
+        self.store = store
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.checks = 0
+        self.reloads = 0
+        self.failures = 0
+        self.added = 0
+        self.updated = 0
+        self.removed = 0
+        self.last_reload_seconds = 0.0
+
+    def start(self):
+        if self._thread is not None or self.interval <= 0:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="corpus-watcher", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0):
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join(timeout)
+        self._thread = None
+
+    def check(self) -> Dict[str, int]:
+        started = time.perf_counter()
+        self.checks += 1
+        try:
+            changes = self.store.refresh()
+        except Exception as e:
+            self.failures += 1
+            print(f"[CorpusWatcher] Refresh failed: {e}")
+            return {"added": 0, "updated": 0, "removed": 0}
+        if any(changes.values()):
+            self.reloads += 1
+            self.added += changes["added"]
+            self.updated += changes["updated"]
+            self.removed += changes["removed"]
+            self.last_reload_seconds = time.perf_counter() - started
+            print(f"[CorpusWatcher] Applied {changes} in {self.last_reload_seconds * 1000:.1f}ms")
+        return changes
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "checks": self.checks,
+            "reloads": self.reloads,
+            "failures": self.failures,
+            "added": self.added,
+            "updated": self.updated,
+            "removed": self.removed,
+            "last_reload_seconds": self.last_reload_seconds,
+        }
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.check()
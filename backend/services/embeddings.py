@@ -0,0 +1,117 @@
+# services/embeddings.py
+import json
+import math
+import os
+import zlib
+from typing import Iterable, List, Optional
+
+import numpy as np
+
+from services.search_index import tokenize
+
+EMBEDDING_DIM = int(os.getenv("EMBEDDING_DIM", "384"))
+EMBEDDER_PATH = os.getenv("EMBEDDER_PATH", os.path.join(os.path.dirname(__file__), "../data/embedder.json"))
+EMBED_CHUNK_ROWS = 8192
+
+
+class HashingEmbedder:
+    """
+    Dependency-free text embedding: each word and each of its character
+    trigrams is hashed (crc32, so vectors are the same in every process)
+    into ``dim`` signed buckets with sublinear counts. Trigrams let
+    "interviewing" or a typo land near "interview"; it is not a semantic
+    model, but it needs no download and builds 100k documents in about a
+    minute.
+
+    Buckets are weighted by an IDF fitted on the corpus (``fit``), so words
+    that every article uses do not drown out the rare ones, and vectors are
+    L2-normalised so a dot product is the cosine. The weights are part of
+    the ``signature`` that vector files record, and are saved next to them.
+    """
+
+    def __init__(self, dim: int = EMBEDDING_DIM, idf: Optional[np.ndarray] = None):
+        self.dim = dim
+        self.name = f"hashing-v2-{dim}"
+        self.idf = idf
+
+    @property
+    def fitted(self) -> bool:
+        return self.idf is not None
+
+    @property
+    def signature(self) -> str:
+        if self.idf is None:
+            return self.name
+        return f"{self.name}-{zlib.crc32(self.idf.tobytes()):08x}"
+
+    def raw(self, texts: Iterable[str]) -> np.ndarray:
+        """Hashed counts before weighting and normalisation."""
+        texts = list(texts)
+        matrix = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            self._fill(matrix[row], text)
+        return matrix
+
+    def fit(self, batches: Iterable[np.ndarray]):
+        """Sets the bucket IDF from raw batches covering the whole corpus."""
+        df = np.zeros(self.dim, dtype=np.float64)
+        count = 0
+        for batch in batches:
+            df += np.count_nonzero(batch, axis=0)
+            count += len(batch)
+        self.idf = (np.log((count + 1) / (df + 1)) + 1).astype(np.float32)
+
+    def finish(self, matrix: np.ndarray) -> np.ndarray:
+        """Weights and normalises raw rows in place, a chunk at a time so a memory-mapped matrix stays paged out."""
+        for start in range(0, len(matrix), EMBED_CHUNK_ROWS):
+            chunk = np.asarray(matrix[start:start + EMBED_CHUNK_ROWS])
+            if self.idf is not None:
+                chunk = chunk * self.idf
+            norms = np.linalg.norm(chunk, axis=1, keepdims=True)
+            np.divide(chunk, norms, out=chunk, where=norms > 0)
+            matrix[start:start + EMBED_CHUNK_ROWS] = chunk
+        return matrix
+
+    def embed(self, texts: Iterable[str]) -> np.ndarray:
+        return self.finish(self.raw(texts))
+
+    def embed_one(self, text: str) -> np.ndarray:
+        return self.embed([text])[0]
+
+    def save(self, path: str):
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({"name": self.name, "dim": self.dim,
+                       "idf": None if self.idf is None else self.idf.tolist()}, f)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str, dim: int = EMBEDDING_DIM) -> Optional["HashingEmbedder"]:
+        """The embedder saved at ``path``, or None if there is none or it was made with other settings."""
+        if not os.path.exists(path):
+            return None
+        with open(path) as f:
+            saved = json.load(f)
+        embedder = cls(dim)
+        if saved.get("name") != embedder.name:
+            return None
+        if saved.get("idf") is not None:
+            embedder.idf = np.asarray(saved["idf"], dtype=np.float32)
+        return embedder
+
+    def _fill(self, vector: np.ndarray, text: str):
+        counts = {}
+        for feature in self._features(tokenize(text)):
+            counts[feature] = counts.get(feature, 0) + 1
+        dim = self.dim
+        for feature, count in counts.items():
+            h = zlib.crc32(feature.encode())
+            vector[h % dim] += (1.0 if h & 0x80000000 else -1.0) * (1.0 + math.log(count))
+
+    @staticmethod
+    def _features(tokens: List[str]):
+        for token in tokens:
+            yield token
+            padded = f"<{token}>"
+            for j in range(len(padded) - 2):
+                yield f"#{padded[j:j + 3]}"
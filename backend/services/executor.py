@@ -0,0 +1,89 @@
+# services/executor.py
+import asyncio
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict
+
+BLOCKING_POOL_SIZE = int(os.getenv("BLOCKING_POOL_SIZE", "256"))
+
+
+class BlockingExecutor:
+    """
+    Bounded thread pool for the sync calls (Bedrock, Supabase, LangChain tools)
+    that the async endpoints must not run on the event loop.
+    """
+
+    def __init__(self, max_workers: int = BLOCKING_POOL_SIZE):
+        self.max_workers = max_workers
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="disha-blocking")
+        self._lock = threading.Lock()
+        self.queued = 0
+        self.in_flight = 0
+        self.completed = 0
+        self.failed = 0
+        self.total_wait_seconds = 0.0
+        self.total_run_seconds = 0.0
+        self.max_wait_seconds = 0.0
+
+    async def run(self, fn: Callable, *args, **kwargs) -> Any:
+        loop = asyncio.get_running_loop()
+        submitted = time.perf_counter()
+        with self._lock:
+            self.queued += 1
+
+        def call():
+            started = time.perf_counter()
+            waited = started - submitted
+            with self._lock:
+                self.queued -= 1
+                self.in_flight += 1
+                self.total_wait_seconds += waited
+                self.max_wait_seconds = max(self.max_wait_seconds, waited)
+            ok = False
+            try:
+                result = fn(*args, **kwargs)
+                ok = True
+                return result
+            finally:
+                with self._lock:
+                    self.in_flight -= 1
+                    self.completed += 1
+                    if not ok:
+                        self.failed += 1
+                    self.total_run_seconds += time.perf_counter() - started
+
+        future = self._pool.submit(call)
+        future.add_done_callback(self._unqueue_if_cancelled)
+        return await asyncio.wrap_future(future, loop=loop)
+
+    def _unqueue_if_cancelled(self, future):
+        # A job cancelled before a worker picked it up never runs call()
+        if future.cancelled():
+            with self._lock:
+                self.queued -= 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            completed = self.completed or 1
+            return {
+                "max_workers": self.max_workers,
+                "queued": self.queued,
+                "in_flight": self.in_flight,
+                "completed": self.completed,
+                "failed": self.failed,
+                "avg_wait_ms": self.total_wait_seconds / completed * 1000,
+                "max_wait_ms": self.max_wait_seconds * 1000,
+                "avg_run_ms": self.total_run_seconds / completed * 1000,
+            }
+
+    def shutdown(self, wait: bool = True):
+        self._pool.shutdown(wait=wait)
+
+
+blocking_executor = BlockingExecutor()
+
+
+async def run_blocking(fn: Callable, *args, **kwargs) -> Any:
+    return await blocking_executor.run(fn, *args, **kwargs)
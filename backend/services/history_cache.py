@@ -0,0 +1,88 @@
+# services/history_cache.py
+import os
+import threading
+import time
+from collections import OrderedDict, deque
+from typing import Any, Callable, Dict, List
+
+HISTORY_CACHE_SIZE = int(os.getenv("HISTORY_CACHE_SIZE", "10000"))
+HISTORY_CACHE_TTL_SECONDS = float(os.getenv("HISTORY_CACHE_TTL_SECONDS", "1800"))
+HISTORY_CACHE_TURNS = int(os.getenv("HISTORY_CACHE_TURNS", "10"))
+
+
+class HistoryCache:
+    """
+    The most recent chat_history rows per user, oldest first. A user's rows
+    are fetched once (``fetch(user_id, limit)``, newest rows of the table)
+    and then kept current by ``append`` from save_chat, so the hot path
+    does not go to the database again until the entry expires or is evicted.
+
+    Rows appended before the first read are merged with what the database
+    returns, since save_chat writes behind and the row may not be there yet.
+    Each worker has its own cache, so a user's requests on other workers
+    see a new row after at most ``ttl`` seconds.
+    """
+
+    def __init__(self, fetch: Callable[[str, int], List[Dict[str, Any]]], max_users: int = HISTORY_CACHE_SIZE,
+                 ttl: float = HISTORY_CACHE_TTL_SECONDS, max_turns: int = HISTORY_CACHE_TURNS):
+        self.fetch = fetch
+        self.max_users = max_users
+        self.ttl = ttl
+        self.max_turns = max_turns
+        self._entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.appends = 0
+        self.evictions = 0
+
+    def get(self, user_id: str, limit: int = 5) -> List[Dict[str, Any]]:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is not None and entry['hydrated'] and entry['expires'] > now:
+                self._entries.move_to_end(user_id)
+                self.hits += 1
+                return list(entry['rows'])[-limit:]
+            self.misses += 1
+
+        rows = self.fetch(user_id, self.max_turns)
+
+        with self._lock:
+            entry = self._entries.get(user_id)
+            pending = list(entry['rows']) if entry is not None and not entry['hydrated'] else []
+            newest = rows[-1].get("timestamp", "") if rows else ""
+            merged = deque(rows, maxlen=self.max_turns)
+            merged.extend(row for row in pending if row.get("timestamp", "") > newest)
+            self._store(user_id, {'rows': merged, 'hydrated': True, 'expires': now + self.ttl})
+            return list(merged)[-limit:]
+
+    def append(self, user_id: str, row: Dict[str, Any]):
+        with self._lock:
+            self.appends += 1
+            entry = self._entries.get(user_id)
+            if entry is None or entry['expires'] <= time.monotonic():
+                entry = {'rows': deque(maxlen=self.max_turns), 'hydrated': False, 'expires': time.monotonic() + self.ttl}
+                self._store(user_id, entry)
+            else:
+                self._entries.move_to_end(user_id)
+            entry['rows'].append(row)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "users": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": self.hits / lookups if lookups else 0.0,
+                "appends": self.appends,
+                "evictions": self.evictions,
+            }
+
+    def _store(self, user_id: str, entry: Dict[str, Any]):
+        self._entries[user_id] = entry
+        self._entries.move_to_end(user_id)
+        while len(self._entries) > self.max_users:
+            self._entries.popitem(last=False)
+            self.evictions += 1
@@ -0,0 +1,116 @@
+# services/hybrid_retriever.py
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+
+from services.metrics import STAGE_SECONDS
+
+RRF_K = int(os.getenv("RAG_RRF_K", "60"))
+RAG_CANDIDATES = int(os.getenv("RAG_CANDIDATES", "20"))
+RAG_LEXICAL_WEIGHT = float(os.getenv("RAG_LEXICAL_WEIGHT", "1.0"))
+RAG_DENSE_WEIGHT = float(os.getenv("RAG_DENSE_WEIGHT", "1.0"))
+
+# Most results a single source may take; "knowledge" covers every source that is not a link list
+SOURCE_QUOTAS = {
+    "community_links": int(os.getenv("RAG_QUOTA_COMMUNITY", "1")),
+    "mentorship_links": int(os.getenv("RAG_QUOTA_MENTORSHIP", "1")),
+    "knowledge": int(os.getenv("RAG_QUOTA_KNOWLEDGE", "2")),
+}
+
+
+def quota_group(source: str) -> str:
+    return source if source in ("community_links", "mentorship_links") else "knowledge"
+
+
+class HybridRetriever:
+    """
+    Runs the store's BM25 search and its dense search at the same time (the
+    dense side on a worker thread; numpy releases the GIL for the product,
+    so this pays off with more than one core and is skipped otherwise) and
+    merges the two rankings with weighted reciprocal rank fusion:
+    ``sum(weight / (rrf_k + rank))`` over the lists a document appears in.
+    RRF only looks at ranks, so the two retrievers' incomparable scores
+    never have to be normalised against each other.
+
+    The fused list is then filled up to ``top_k`` under per-source quotas,
+    so one source cannot crowd the others out; when the quotas leave slots
+    empty, the best of the skipped results fill them.
+    """
+
+    def __init__(self, store, candidates: int = RAG_CANDIDATES, rrf_k: int = RRF_K,
+                 quotas: Optional[Dict[str, int]] = None, executor: Optional[ThreadPoolExecutor] = None,
+                 lexical_weight: float = RAG_LEXICAL_WEIGHT, dense_weight: float = RAG_DENSE_WEIGHT):
+        self.store = store
+        self.candidates = candidates
+        self.rrf_k = rrf_k
+        self.quotas = SOURCE_QUOTAS if quotas is None else quotas
+        self.weights = {"lexical": lexical_weight, "dense": dense_weight}
+        if executor is None and (os.cpu_count() or 1) > 1:
+            executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="rag-dense")
+        self.executor = executor
+
+    def retrieve(self, query: str, top_k: int = 3) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+        """Returns (results, report); each result carries its fused score and its rank and score per retriever."""
+        started = time.perf_counter()
+        if self.executor is not None:
+            dense_future = self.executor.submit(self._timed, self.store.dense_search, query)
+            lexical, lexical_seconds = self._timed(self.store.simple_search, query)
+            waited = time.perf_counter()
+            dense, dense_seconds = dense_future.result()
+        else:
+            lexical, lexical_seconds = self._timed(self.store.simple_search, query)
+            dense, dense_seconds = self._timed(self.store.dense_search, query)
+            waited = time.perf_counter()
+        fusion_started = time.perf_counter()
+
+        fused: Dict[str, Dict[str, Any]] = {}
+        for name, results in (("lexical", lexical), ("dense", dense)):
+            for rank, result in enumerate(results, 1):
+                entry = fused.get(result['id'])
+                if entry is None:
+                    entry = fused[result['id']] = {key: result[key] for key in ('id', 'content', 'metadata', 'source')}
+                    entry['score'] = 0.0
+                entry['score'] += self.weights[name] / (self.rrf_k + rank)
+                entry[f'{name}_rank'] = rank
+                entry[f'{name}_score'] = result['score']
+        ranked = sorted(fused.values(), key=lambda entry: entry['score'], reverse=True)
+        selected = self._apply_quotas(ranked, top_k)
+
+        finished = time.perf_counter()
+        report = {
+            "lexical_ms": lexical_seconds * 1000,
+            "dense_ms": dense_seconds * 1000,
+            "dense_wait_ms": (fusion_started - waited) * 1000,
+            "fusion_ms": (finished - fusion_started) * 1000,
+            "total_ms": (finished - started) * 1000,
+            "lexical_candidates": len(lexical),
+            "dense_candidates": len(dense),
+            "fused_candidates": len(fused),
+        }
+        STAGE_SECONDS.observe(lexical_seconds, stage="rag_lexical")
+        STAGE_SECONDS.observe(dense_seconds, stage="rag_dense")
+        STAGE_SECONDS.observe(finished - started, stage="rag_retrieve")
+        return selected, report
+
+    def _timed(self, search, query: str):
+        started = time.perf_counter()
+        results = search(query, self.candidates)
+        return results, time.perf_counter() - started
+
+    def _apply_quotas(self, ranked: List[Dict[str, Any]], top_k: int) -> List[Dict[str, Any]]:
+        taken: Dict[str, int] = {}
+        selected, skipped = [], []
+        for entry in ranked:
+            if len(selected) == top_k:
+                break
+            group = quota_group(entry['source'])
+            if taken.get(group, 0) < self.quotas.get(group, top_k):
+                taken[group] = taken.get(group, 0) + 1
+                selected.append(entry)
+            else:
+                skipped.append(entry)
+        if len(selected) < top_k:
+            selected.extend(skipped[:top_k - len(selected)])
+            selected.sort(key=lambda entry: entry['score'], reverse=True)
+        return selected
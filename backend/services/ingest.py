@@ -0,0 +1,200 @@
+# services/ingest.py
+import hashlib
+import json
+import os
+import re
+import time
+from collections import Counter
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+INGEST_CHUNK_WORDS = int(os.getenv("INGEST_CHUNK_WORDS", "200"))
+INGEST_CHUNK_OVERLAP = int(os.getenv("INGEST_CHUNK_OVERLAP", "40"))
+INGEST_BATCH_SIZE = int(os.getenv("INGEST_BATCH_SIZE", "1000"))
+READ_CHUNK_CHARS = 1024 * 1024
+
+_WORD = re.compile(r"\S+")
+_DECODER = json.JSONDecoder()
+
+
+def iter_articles(path: str) -> Iterator[Dict[str, Any]]:
+    """
+    Yields the articles in ``path`` one at a time: one JSON object per line
+    for .jsonl, or the items of a top-level array (or a single object) for
+    .json, decoded from a sliding buffer so the file is never read whole.
+    """
+    with open(path, encoding="utf-8") as f:
+        if path.endswith(".jsonl"):
+            for number, line in enumerate(f, 1):
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    yield json.loads(line)
+                except ValueError as e:
+                    print(f"[Ingest] Skipping line {number} of {os.path.basename(path)}: {e}")
+        else:
+            yield from _iter_json_items(f)
+
+
+def _iter_json_items(f) -> Iterator[Any]:
+    buffer, eof = f.read(READ_CHUNK_CHARS), False
+    pos = _skip(buffer, 0)
+    if buffer[pos:pos + 1] != "[":
+        yield json.loads(buffer + f.read())
+        return
+    pos += 1
+    while True:
+        pos = _skip(buffer, pos)
+        if buffer[pos:pos + 1] == "]":
+            return
+        if pos == len(buffer) and eof:
+            raise ValueError("JSON array is not closed")
+        try:
+            item, end = _DECODER.raw_decode(buffer, pos)
+        except ValueError:
+            if eof:
+                raise
+            end = None
+        # An item not yet followed by "," or "]" may have been cut short (a number, say): read on
+        if end is not None and not eof:
+            after = end
+            while after < len(buffer) and buffer[after] in " \t\r\n":
+                after += 1
+            if after == len(buffer) or buffer[after] not in ",]":
+                end = None
+        if end is None:
+            more = f.read(max(READ_CHUNK_CHARS, len(buffer) - pos))
+            buffer, pos, eof = buffer[pos:] + more, 0, not more
+            continue
+        yield item
+        pos = end
+        if pos > READ_CHUNK_CHARS:
+            buffer, pos = buffer[pos:], 0
+
+
+def _skip(buffer: str, pos: int) -> int:
+    """Index of the next character that is not whitespace or an item separator."""
+    while pos < len(buffer) and buffer[pos] in " \t\r\n,":
+        pos += 1
+    return pos
+
+
+def chunk_text(text: str, words: int = INGEST_CHUNK_WORDS, overlap: int = INGEST_CHUNK_OVERLAP) -> List[str]:
+    """
+    Splits ``text`` into windows of ``words`` words, each repeating the last
+    ``overlap`` words of the one before so a passage cut at a boundary is
+    still whole in one chunk. The original spacing inside a chunk is kept.
+    """
+    if len(text.split(None, words)) <= words:
+        return [text.strip()] if text.strip() else []
+    spans = [match.span() for match in _WORD.finditer(text)]
+    stride = max(words - overlap, 1)
+    chunks = []
+    for start in range(0, len(spans), stride):
+        end = min(start + words, len(spans))
+        chunks.append(text[spans[start][0]:spans[end - 1][1]])
+        if end == len(spans):
+            break
+    return chunks
+
+
+def article_chunks(article: Dict[str, Any], words: int = INGEST_CHUNK_WORDS,
+                   overlap: int = INGEST_CHUNK_OVERLAP) -> List[Tuple[str, str, Dict[str, Any]]]:
+    """
+    (doc_id, content, metadata) per chunk of an article ({title, content,
+    tags, url}). Ids are the md5 of the url, or else the title, so an
+    article that fits in one chunk keeps the id it always had; longer
+    ones add "-<n>". Every chunk starts with the title.
+    """
+    title = article.get("title") or ""
+    body = article.get("content") or article.get("description") or ""
+    article_id = hashlib.md5((article.get("url") or title or body).encode("utf-8")).hexdigest()
+    metadata = {"title": title, "tags": article.get("tags") or []}
+    if article.get("url"):
+        metadata["url"] = article["url"]
+    chunks = chunk_text(body, words, overlap)
+    if len(chunks) <= 1:
+        return [(article_id, f"{title}\n\n{body}", metadata)]
+    return [
+        (f"{article_id}-{n}", f"{title}\n\n{chunk}", dict(metadata, article_id=article_id, chunk=n, chunks=len(chunks)))
+        for n, chunk in enumerate(chunks)
+    ]
+
+
+def content_hash(content: str) -> int:
+    """md5 of the text with case and spacing normalised, cut to 64 bits to keep the seen-set small."""
+    normalised = " ".join(content.lower().split())
+    return int.from_bytes(hashlib.md5(normalised.encode("utf-8")).digest()[:8], "little")
+
+
+def iter_chunks(path: str, seen: set, stats: Counter, words: int = INGEST_CHUNK_WORDS,
+                overlap: int = INGEST_CHUNK_OVERLAP) -> Iterator[Tuple[str, str, Dict[str, Any]]]:
+    """
+    Streams the chunks of every article in ``path``, dropping chunks whose
+    content hash is already in ``seen`` (which it adds to) and articles with
+    no text, and counting both in ``stats``.
+    """
+    for article in iter_articles(path):
+        if not isinstance(article, dict) or not (article.get("content") or article.get("description")):
+            stats["skipped"] += 1
+            continue
+        stats["articles"] += 1
+        for doc_id, content, metadata in article_chunks(article, words, overlap):
+            stats["chunks"] += 1
+            digest = content_hash(content)
+            if digest in seen:
+                stats["duplicates"] += 1
+                continue
+            seen.add(digest)
+            yield doc_id, content, metadata
+
+
+class CorpusIngester:
+    """
+    Streams article files into a DocumentStore: articles are read one at a
+    time, split into overlapping chunks, chunks whose normalised text was
+    already seen (in any file this ingester read) are dropped, and the rest
+    go to the store ``batch_size`` at a time. Memory held by the pipeline
+    is one batch and the set of 64-bit content hashes; the store's own
+    index still grows with the corpus.
+
+    ``add_rows`` is the batching step on its own, for callers (the store's
+    own loader) that produce rows some other way.
+    """
+
+    def __init__(self, store, source: str = "knowledge_base", batch_size: int = INGEST_BATCH_SIZE,
+                 words: int = INGEST_CHUNK_WORDS, overlap: int = INGEST_CHUNK_OVERLAP):
+        self.store = store
+        self.source = source
+        self.batch_size = batch_size
+        self.words = words
+        self.overlap = overlap
+        self._seen = set()
+
+    def ingest(self, path: str) -> Dict[str, Any]:
+        """Ingests one .json or .jsonl file; returns counts of what happened to its articles and chunks."""
+        started = time.perf_counter()
+        stats = Counter(articles=0, skipped=0, chunks=0, duplicates=0, existing=0, added=0)
+        chunks = iter_chunks(path, self._seen, stats, self.words, self.overlap)
+        self.add_rows(((doc_id, content, metadata, self.source) for doc_id, content, metadata in chunks), stats)
+        stats = dict(stats, seconds=round(time.perf_counter() - started, 3))
+        print(f"[Ingest] {os.path.basename(path)}: {stats}")
+        return stats
+
+    def add_rows(self, rows: Iterable[Tuple[str, str, Dict[str, Any], str]], stats: Optional[Counter] = None) -> Counter:
+        """Adds (doc_id, content, metadata, source) rows to the store ``batch_size`` at a time."""
+        stats = Counter() if stats is None else stats
+        batch = []
+        for row in rows:
+            batch.append(row)
+            if len(batch) >= self.batch_size:
+                self._flush(batch, stats)
+                batch = []
+        if batch:
+            self._flush(batch, stats)
+        return stats
+
+    def _flush(self, batch: List[Tuple[str, str, Dict[str, Any], str]], stats: Counter):
+        added = self.store.add_documents(batch)
+        stats["added"] += added
+        stats["existing"] += len(batch) - added
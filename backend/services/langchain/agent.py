@@ -4,7 +4,8 @@ from services.tools.jobs import remote_job_tool
 from services.tools.mentorship import mentorship_tool
 from services.tools.community import community_tool
 from services.bias_detector import is_gender_biased  # Import bias detector
-from langchain_community.chat_models import BedrockChat
+from services.bedrock_clients import bedrock_clients
+from services.model_gateway import model_gateway
 from langchain.agents import initialize_agent
 from langchain_core.runnables import Runnable
 
@@ -42,7 +43,7 @@ def ask_disha_with_tools(prompt: str) -> str:
         )
 
     model_id = select_model(prompt)
-    llm = BedrockChat(model_id=model_id, region_name="us-east-1")
+    llm = bedrock_clients.get_chat_model(model_id, model_gateway.preferred_region())
     if not prompt_needs_tool(llm, prompt):
         print("💬 Prompt handled directly via LLM (no tools)")
         result = llm.invoke(prompt)
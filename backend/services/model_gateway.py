@@ -0,0 +1,248 @@
+# services/model_gateway.py
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, List, Optional
+
+from botocore.exceptions import BotoCoreError, ClientError
+
+from services.admission import bedrock_limiter
+from services.metrics import registry
+
+BEDROCK_FAILURE_THRESHOLD = int(os.getenv("BEDROCK_FAILURE_THRESHOLD", "5"))
+BEDROCK_CIRCUIT_COOLDOWN_SECONDS = float(os.getenv("BEDROCK_CIRCUIT_COOLDOWN_SECONDS", "30"))
+BEDROCK_HEDGE_MIN_DELAY_SECONDS = float(os.getenv("BEDROCK_HEDGE_MIN_DELAY_SECONDS", "0.5"))
+BEDROCK_HEDGING = os.getenv("BEDROCK_HEDGING", "true").lower() == "true"
+# Threads running region calls; each call in flight, hedged copies included, takes one
+BEDROCK_GATEWAY_POOL_SIZE = int(os.getenv("BEDROCK_GATEWAY_POOL_SIZE", "64"))
+
+# Errors that say the region is unhealthy, as opposed to a bad request.
+# Throttles are left to the admission limiter, but still fail over.
+REGION_FAILURE_CODES = {
+    "ServiceUnavailableException", "InternalServerException",
+    "ModelTimeoutException", "ModelNotReadyException", "ModelErrorException",
+}
+
+REGION_WINS = registry.counter(
+    "disha_model_region_wins_total", "Model calls answered by each region", ["region"])
+REGION_FAILURES = registry.counter(
+    "disha_model_region_failures_total", "Failed or slow model calls per region", ["region"])
+CIRCUIT_OPEN = registry.gauge(
+    "disha_model_region_circuit_open", "1 while a region's circuit is open", ["region"])
+HEDGES = registry.counter(
+    "disha_model_hedges_total", "Hedged requests sent, and calls answered outside the primary region", ["outcome"])
+
+
+class CircuitOpenError(RuntimeError):
+    pass
+
+
+def is_throttle(error: Exception) -> bool:
+    return isinstance(error, ClientError) and error.response["Error"]["Code"] == "ThrottlingException"
+
+
+def is_region_failure(error: Exception) -> bool:
+    if isinstance(error, ClientError):
+        status = error.response.get("ResponseMetadata", {}).get("HTTPStatusCode", 0)
+        return error.response["Error"]["Code"] in REGION_FAILURE_CODES or status >= 500
+    return isinstance(error, (BotoCoreError, TimeoutError, ConnectionError))
+
+
+class RegionHealth:
+    """
+    Circuit breaker for one region. Opens after ``failure_threshold``
+    consecutive failures, where a call slower than ``slow_factor`` times the
+    region's p95 also counts as a failure. After ``cooldown`` seconds a single
+    probe is let through (half-open); its outcome closes or re-opens the circuit.
+    """
+
+    def __init__(self, region: str, failure_threshold: int = BEDROCK_FAILURE_THRESHOLD,
+                 cooldown: float = BEDROCK_CIRCUIT_COOLDOWN_SECONDS, slow_factor: float = 3.0):
+        self.region = region
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.slow_factor = slow_factor
+        self.latencies = deque(maxlen=200)
+        self.consecutive_failures = 0
+        self.opened_at: Optional[float] = None
+        self.probe_in_flight = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at < self.cooldown:
+            return "open"
+        return "half_open"
+
+    def p95(self) -> Optional[float]:
+        if len(self.latencies) < 20:
+            return None
+        ordered = sorted(self.latencies)
+        return ordered[int(len(ordered) * 0.95) - 1]
+
+    def try_acquire(self) -> bool:
+        with self._lock:
+            state = self.state
+            if state == "closed":
+                return True
+            if state == "half_open" and not self.probe_in_flight:
+                self.probe_in_flight = True
+                return True
+            return False
+
+    def record_success(self, latency: float):
+        with self._lock:
+            p95 = self.p95()
+            self.latencies.append(latency)
+            if p95 is not None and latency > p95 * self.slow_factor:
+                self._record_failure_locked()
+                return
+            self.consecutive_failures = 0
+            self.probe_in_flight = False
+            if self.opened_at is not None:
+                self.opened_at = None
+                CIRCUIT_OPEN.set(0, region=self.region)
+
+    def record_failure(self):
+        with self._lock:
+            self._record_failure_locked()
+
+    def release_probe(self):
+        # A bad request or a throttle says nothing about region health
+        with self._lock:
+            self.probe_in_flight = False
+
+    def _record_failure_locked(self):
+        REGION_FAILURES.inc(region=self.region)
+        self.consecutive_failures += 1
+        if self.probe_in_flight or self.consecutive_failures >= self.failure_threshold:
+            self.opened_at = time.monotonic()
+            CIRCUIT_OPEN.set(1, region=self.region)
+        self.probe_in_flight = False
+
+
+class ModelGateway:
+    """
+    Sends a model call to the preferred healthy region. If it has not answered
+    after that region's p95 latency, a hedged copy goes to the next healthy
+    region and whichever succeeds first wins. Region failures fail over to the
+    next region straight away.
+
+    The caller holds one admission slot for the call; a hedged copy is extra
+    load, so it is only sent if ``limiter`` has a free slot right now, and
+    never before the primary region has a p95 to wait for.
+    """
+
+    def __init__(self, regions: List[str], hedging: bool = BEDROCK_HEDGING,
+                 hedge_min_delay: float = BEDROCK_HEDGE_MIN_DELAY_SECONDS,
+                 pool_size: int = BEDROCK_GATEWAY_POOL_SIZE,
+                 limiter=bedrock_limiter):
+        self.regions = regions
+        self.health = {region: RegionHealth(region) for region in regions}
+        self.hedging = hedging
+        self.hedge_min_delay = hedge_min_delay
+        self.limiter = limiter
+        self._pool = ThreadPoolExecutor(max_workers=pool_size, thread_name_prefix="disha-hedge")
+
+    def preferred_region(self) -> str:
+        for region in self.regions:
+            if self.health[region].state == "closed":
+                return region
+        return self.regions[0]
+
+    def invoke(self, call: Callable[[str], Any], hedge: bool = True) -> Any:
+        remaining = [region for region in self.regions if self.health[region].state != "open"]
+        hedge = hedge and self.hedging and len(remaining) > 1
+        primary = None
+        last_error: Optional[Exception] = None
+        pending = {}
+
+        while remaining or pending:
+            if remaining and (not pending or hedge):
+                token = None
+                if pending:
+                    token = self.limiter.try_acquire()
+                    if token is None:
+                        # No spare capacity: wait for the calls already out, keep the region for failover
+                        HEDGES.inc(outcome="no_capacity")
+                        hedge = False
+                if not pending or token is not None:
+                    region = remaining.pop(0)
+                    if self.health[region].try_acquire():
+                        primary = primary or region
+                        pending[self._pool.submit(self._timed_call, region, call, token)] = region
+                        if token is not None:
+                            HEDGES.inc(outcome="sent")
+                    elif token is not None:
+                        self.limiter.release(token, "error")
+                    if not pending:
+                        continue
+
+            timeout = self._hedge_delay(primary) if hedge and remaining else None
+            done, _ = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+
+            for future in done:
+                region = pending.pop(future)
+                try:
+                    result = future.result()
+                except Exception as e:
+                    if not (is_region_failure(e) or is_throttle(e)):
+                        raise
+                    last_error = e
+                    continue
+                REGION_WINS.inc(region=region)
+                if region != primary:
+                    HEDGES.inc(outcome="won_elsewhere")
+                return result
+
+        if last_error is not None:
+            raise last_error
+        raise CircuitOpenError("All model regions are unavailable")
+
+    def _timed_call(self, region: str, call: Callable[[str], Any], token: Optional[float] = None) -> Any:
+        """``token`` is the limiter slot of a hedged copy, held until the copy finishes even if it lost."""
+        started = time.monotonic()
+        try:
+            result = call(region)
+        except Exception as e:
+            if is_region_failure(e):
+                self.health[region].record_failure()
+            else:
+                self.health[region].release_probe()
+            if token is not None:
+                self.limiter.release(token, "throttled" if is_throttle(e) else "error")
+            raise
+        self.health[region].record_success(time.monotonic() - started)
+        if token is not None:
+            self.limiter.release(token, "ok")
+        return result
+
+    def _hedge_delay(self, region: str) -> Optional[float]:
+        """How long to wait before hedging; None (no hedge) until the region has a p95."""
+        p95 = self.health[region].p95()
+        return None if p95 is None else max(self.hedge_min_delay, p95)
+
+    def shutdown(self, wait: bool = True):
+        self._pool.shutdown(wait=wait)
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        return {
+            region: {
+                "state": health.state,
+                "consecutive_failures": health.consecutive_failures,
+                "p95_ms": (health.p95() or 0.0) * 1000,
+            }
+            for region, health in self.health.items()
+        }
+
+
+def configured_regions() -> List[str]:
+    regions = [r.strip() for r in os.getenv("BEDROCK_REGIONS", "").split(",") if r.strip()]
+    return regions or [os.getenv("AWS_REGION") or "us-east-1"]
+
+
+model_gateway = ModelGateway(configured_regions())
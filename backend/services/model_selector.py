@@ -1,7 +1,196 @@
-from typing import Dict
+# services/model_selector.py
+import os
+import re
+import threading
+import time
+from typing import Any, Dict, List, Optional
 
-def select_model(verbose: bool = False) -> str:
-    selected = "anthropic.claude-3-haiku-20240307-v1:0"
+from services.context_records import estimate_tokens
+from services.metrics import registry
+
+MODEL_LATENCY_SLO_SECONDS = float(os.getenv("MODEL_LATENCY_SLO_SECONDS", "8"))
+MODEL_COST_BUDGET_USD = float(os.getenv("MODEL_COST_BUDGET_USD", "0.02"))
+MODEL_MAX_ERROR_RATE = float(os.getenv("MODEL_MAX_ERROR_RATE", "0.25"))
+MODEL_RECOVERY_SECONDS = float(os.getenv("MODEL_RECOVERY_SECONDS", "30"))
+MAX_OUTPUT_TOKENS = 500
+
+DEFAULT_MODEL = "anthropic.claude-3-haiku-20240307-v1:0"
+
+# tier is a rough capability rank; costs are USD per 1k tokens; latency is the
+# prior (seconds for a full reply) used until live samples arrive
+MODEL_CATALOG = {
+    "anthropic.claude-3-haiku-20240307-v1:0": {
+        "tier": 1, "input_cost": 0.00025, "output_cost": 0.00125, "latency": 2.0},
+    "anthropic.claude-3-5-haiku-20241022-v1:0": {
+        "tier": 1, "input_cost": 0.0008, "output_cost": 0.004, "latency": 2.5},
+    "anthropic.claude-3-sonnet-20240229-v1:0": {
+        "tier": 2, "input_cost": 0.003, "output_cost": 0.015, "latency": 5.0},
+    "anthropic.claude-3-5-sonnet-20240620-v1:0": {
+        "tier": 2, "input_cost": 0.003, "output_cost": 0.015, "latency": 4.5},
+}
+
+# Intents that need longer, structured answers and benefit from a stronger model
+DEEP_INTENT_PATTERNS = {
+    "resume_review": r"\b(review|rewrite|improve|feedback on)\b.*\b(resume|cv|cover letter|linkedin)\b",
+    "career_plan": r"\b(career (plan|path|roadmap|transition|switch)|roadmap|5.year|long.term)\b",
+    "interview_prep": r"\b(mock interview|system design|case (study|interview)|behavioral questions)\b",
+    "negotiation": r"\b(negotiat\w*|counter.?offer|compensation package)\b",
+    "analysis": r"\b(compare|pros and cons|trade.?offs?|step.by.step|in detail|detailed)\b",
+}
+QUICK_INTENT_PATTERN = re.compile(r"^\s*(what|who|when|where|is|are|does|do|can)\b.{0,80}\??\s*$", re.IGNORECASE)
+DEEP_INTENT_REGEX = re.compile("|".join(f"(?P<{name}>{p})" for name, p in DEEP_INTENT_PATTERNS.items()),
+                               re.IGNORECASE)
+
+LONG_PROMPT_TOKENS = 300
+LARGE_CONTEXT_TOKENS = 1500
+
+ROUTER_DECISIONS = registry.counter(
+    "disha_model_router_decisions_total", "Model chosen per request, with the detected intent and why",
+    ["model", "intent", "reason"])
+MODEL_CALL_SECONDS = registry.histogram(
+    "disha_model_call_seconds", "Latency of completed model calls", ["model"])
+MODEL_CALL_ERRORS = registry.counter(
+    "disha_model_call_errors_total", "Failed or throttled model calls", ["model"])
+MODEL_LATENCY_ESTIMATE = registry.gauge(
+    "disha_model_latency_estimate_seconds", "Latency estimate the router uses for each model", ["model"])
+
+
+def detect_intent(prompt: str) -> str:
+    match = DEEP_INTENT_REGEX.search(prompt)
+    if match:
+        return match.lastgroup
+    if QUICK_INTENT_PATTERN.match(prompt):
+        return "quick_question"
+    return "guidance"
+
+
+class ModelStats:
+    """EWMA latency and deviation (like a TCP RTT estimate) plus an EWMA error rate."""
+
+    def __init__(self, prior_latency: float, smoothing: float = 0.2):
+        self.latency = prior_latency
+        self.deviation = prior_latency / 4
+        self.error_rate = 0.0
+        self.samples = 0
+        self.last_seen = 0.0
+        self.smoothing = smoothing
+
+    def estimate(self) -> float:
+        return self.latency + 2 * self.deviation
+
+    def observe(self, latency: Optional[float], ok: bool):
+        self.error_rate += self.smoothing * ((0.0 if ok else 1.0) - self.error_rate)
+        self.last_seen = time.monotonic()
+        if latency is None or not ok:
+            return
+        if self.samples == 0:
+            self.latency, self.deviation = latency, latency / 4
+        else:
+            self.deviation += self.smoothing * (abs(latency - self.latency) - self.deviation)
+            self.latency += self.smoothing * (latency - self.latency)
+        self.samples += 1
+
+
+class ModelRouter:
+    """
+    Picks a Bedrock model per request. The prompt length, detected intent and
+    context size decide the capability tier a request needs; among the
+    configured models the router takes the cheapest one of that tier whose
+    live latency estimate meets the SLO and whose estimated cost fits the
+    per-request budget. When nothing fits it degrades to the most capable
+    model that does, then to the fastest healthy one.
+    """
+
+    def __init__(self, model_ids: List[str], latency_slo: float = MODEL_LATENCY_SLO_SECONDS,
+                 cost_budget: float = MODEL_COST_BUDGET_USD, max_error_rate: float = MODEL_MAX_ERROR_RATE,
+                 recovery_seconds: float = MODEL_RECOVERY_SECONDS):
+        self.models = {model_id: MODEL_CATALOG.get(model_id, MODEL_CATALOG[DEFAULT_MODEL]) for model_id in model_ids}
+        self.latency_slo = latency_slo
+        self.cost_budget = cost_budget
+        self.max_error_rate = max_error_rate
+        self.recovery_seconds = recovery_seconds
+        self.stats = {model_id: ModelStats(profile["latency"]) for model_id, profile in self.models.items()}
+        self._lock = threading.Lock()
+
+    def required_tier(self, intent: str, prompt_tokens: int, context_tokens: int) -> int:
+        if intent in DEEP_INTENT_PATTERNS or prompt_tokens > LONG_PROMPT_TOKENS or context_tokens > LARGE_CONTEXT_TOKENS:
+            return 2
+        return 1
+
+    def estimated_cost(self, model_id: str, input_tokens: int) -> float:
+        profile = self.models[model_id]
+        return (input_tokens * profile["input_cost"] + MAX_OUTPUT_TOKENS * profile["output_cost"]) / 1000
+
+    def route(self, prompt: str, messages: Optional[list] = None) -> Dict[str, Any]:
+        messages = messages or []
+        prompt_tokens = estimate_tokens(prompt)
+        context_tokens = sum(estimate_tokens(str(m.get("content", ""))) for m in messages[:-1])
+        intent = detect_intent(prompt)
+        tier = self.required_tier(intent, prompt_tokens, context_tokens)
+
+        with self._lock:
+            # A model nobody has called for a while is judged by its prior again,
+            # otherwise one that was slow or failing would never be retried
+            stale = {m for m, s in self.stats.items() if time.monotonic() - s.last_seen > self.recovery_seconds}
+            healthy = [m for m, s in self.stats.items() if m in stale or s.error_rate <= self.max_error_rate]
+            candidates = healthy or list(self.models)
+            latency = {m: min(self.stats[m].estimate(), self.models[m]["latency"]) if m in stale
+                       else self.stats[m].estimate() for m in candidates}
+
+        cost = {m: self.estimated_cost(m, prompt_tokens + context_tokens) for m in candidates}
+        within = [m for m in candidates if latency[m] <= self.latency_slo and cost[m] <= self.cost_budget]
+        suitable = [m for m in within if self.models[m]["tier"] >= tier]
+
+        if suitable:
+            model_id = min(suitable, key=lambda m: (cost[m], latency[m]))
+            reason = "fit"
+        elif within:
+            model_id = max(within, key=lambda m: (self.models[m]["tier"], -cost[m]))
+            reason = "downgrade"
+        else:
+            model_id = min(candidates, key=lambda m: latency[m])
+            reason = "fallback"
+
+        ROUTER_DECISIONS.inc(model=model_id, intent=intent, reason=reason)
+        return {
+            "model_id": model_id,
+            "intent": intent,
+            "tier": tier,
+            "reason": reason,
+            "estimated_latency": latency[model_id],
+            "estimated_cost": cost[model_id],
+        }
+
+    def record(self, model_id: str, latency: Optional[float] = None, ok: bool = True):
+        """latency is None for calls whose duration says nothing about a full reply (streams)."""
+        stats = self.stats.get(model_id)
+        if stats is None:
+            return
+        with self._lock:
+            if time.monotonic() - stats.last_seen > self.recovery_seconds:
+                # First call after a quiet spell: start over rather than averaging into old samples
+                stats.samples = 0
+                stats.error_rate = 0.0
+            stats.observe(latency, ok)
+            estimate = stats.estimate()
+        if ok and latency is not None:
+            MODEL_CALL_SECONDS.observe(latency, model=model_id)
+        if not ok:
+            MODEL_CALL_ERRORS.inc(model=model_id)
+        MODEL_LATENCY_ESTIMATE.set(estimate, model=model_id)
+
+
+def configured_models() -> List[str]:
+    # Routing across models is opt-in: each one needs its own model access and changes cost
+    models = [m.strip() for m in os.getenv("BEDROCK_MODEL_IDS", "").split(",") if m.strip()]
+    return models or [DEFAULT_MODEL]
+
+
+model_router = ModelRouter(configured_models())
+
+
+def select_model(prompt: str = "", messages: Optional[list] = None, verbose: bool = False) -> str:
+    decision = model_router.route(prompt, messages)
     if verbose:
-        print(f"[Model Selector] Using FAST default: {selected}")
-    return selected
+        print(f"[Model Selector] {decision['intent']} -> {decision['model_id']} ({decision['reason']})")
+    return decision["model_id"]
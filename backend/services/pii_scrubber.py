@@ -0,0 +1,140 @@
+# services/pii_scrubber.py
+import re
+
+
+class ScrubbedText(str):
+    """A string that has already been through scrub_pii; later layers skip it."""
+    __slots__ = ()
+
+
+# Order matters: at any position the first alternative that matches wins.
+PII_PATTERNS = [
+    # Email pattern
+    ("EMAIL", r'[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}', '[EMAIL REDACTED]'),
+
+    # WhatsApp/Telegram number patterns
+    ("CONTACT", r'\b(?:whatsapp|telegram|signal|viber)(?:\s+at)?\s+[+]?\d[0-9\s-]{7,}', '[CONTACT REDACTED]'),
+
+    # URLs with potential user IDs
+    ("URL", r'https?://[^\s/]+/(?:user|profile|account|u)/[a-zA-Z0-9_-]+', '[URL REDACTED]'),
+
+    # LinkedIn profile patterns
+    ("LINKEDIN", r'linkedin\.com/in/[a-zA-Z0-9_-]+', '[LINKEDIN REDACTED]'),
+
+    # Phone number patterns (international, then local format)
+    ("PHONE", r'\b\+\d{1,3}[\s-]?\(?\d{3}\)?[\s.-]?\d{3}[\s.-]?\d{4}\b'
+              r'|\b\(?\d{3}\)?[\s.-]?\d{3}[\s.-]?\d{4}\b', '[PHONE REDACTED]'),
+
+    # Social security / ID number patterns
+    ("ID", r'\b\d{3}[-\s]?\d{2}[-\s]?\d{4}\b', '[ID REDACTED]'),
+
+    # Physical addresses (simplified pattern)
+    ("ADDRESS", r'\b\d+\s+[A-Za-z0-9\s,]+(?:Avenue|Ave|Street|St|Road|Rd|Boulevard|Blvd|Lane|Ln|Drive|Dr'
+                r'|Way|Court|Ct|Plaza|Square|Sq|Trail|Tr|Parkway|Pkwy|Circle|Cir)\b', '[ADDRESS REDACTED]'),
+
+    # Other social media handles
+    ("HANDLE", r'@\w{2,}', '[SOCIAL MEDIA HANDLE REDACTED]'),
+]
+
+PII_REGEX = re.compile("|".join(f"(?P<{name}>{pattern})" for name, pattern, _ in PII_PATTERNS))
+PII_REPLACEMENTS = {name: replacement for name, _, replacement in PII_PATTERNS}
+
+# Cheap precheck: every pattern needs a digit, an '@' or a URL/contact marker
+PII_HINT = re.compile(r'[\d@]|linkedin\.com/in/|https?://', re.IGNORECASE)
+
+
+def _replace(match: re.Match) -> str:
+    return PII_REPLACEMENTS[match.lastgroup]
+
+
+def scrub_pii(text: str) -> str:
+    if isinstance(text, ScrubbedText) or not isinstance(text, str):
+        return text
+    if PII_HINT.search(text):
+        text = PII_REGEX.sub(_replace, text)
+    return ScrubbedText(text)
+
+
+# No pattern can span sentence punctuation followed by whitespace
+STREAM_BOUNDARY = re.compile(r'[.!?;:]\s')
+
+
+class StreamScrubber:
+    """
+    Scrubs a streamed reply piece by piece. Text is held back until a
+    sentence boundary that no PII pattern can cross, so each released
+    segment can be scrubbed on its own without leaking a partial match.
+
+    A reply with no such boundary is released once ``max_pending``
+    characters are waiting, but only up to ``window`` characters before
+    the end: a pattern that crosses the cut is then complete in what is
+    held, so the cut moves before it. Past ``hard_cap`` the cut stays
+    before the window but may fall inside a match: one that is complete
+    goes out whole, and the sent part of one still growing is redacted.
+    """
+
+    def __init__(self, max_pending: int = 400, window: int = 200, hard_cap: int = 1600):
+        self.max_pending = max_pending
+        self.window = window
+        self.hard_cap = hard_cap
+        self.pending = ""
+        self.released = []
+
+    def feed(self, text: str) -> str:
+        self.pending += text
+        cut = 0
+        for match in STREAM_BOUNDARY.finditer(self.pending):
+            cut = match.end()
+        if not cut and len(self.pending) > self.max_pending:
+            cut = self._safe_cut()
+            if not cut and len(self.pending) > self.hard_cap:
+                return self._forced_release()
+        if not cut:
+            return ""
+        segment, self.pending = self.pending[:cut], self.pending[cut:]
+        return self._release(segment)
+
+    def _safe_cut(self) -> int:
+        """The latest word start at least ``window`` characters from the end that no match spans; 0 if none."""
+        cut = self._word_start(len(self.pending) - self.window)
+        for start, end in reversed([match.span() for match in PII_REGEX.finditer(self.pending)]):
+            if start < cut < end:
+                cut = self._word_start(start)
+        return cut
+
+    def _forced_release(self) -> str:
+        limit = len(self.pending) - self.window
+        cut = self._word_start(limit) or limit
+        for match in reversed(list(PII_REGEX.finditer(self.pending))):
+            if not match.start() < cut < match.end():
+                continue
+            if match.end() < len(self.pending):
+                # Complete: nothing later can extend it, so send it whole
+                cut = match.end()
+                break
+            start = self._word_start(match.start())
+            if not start:
+                # Still growing and it starts the buffer: send its first part redacted
+                head, self.pending = self.pending[:match.start()], self.pending[cut:]
+                return self._release(head) + self._release(PII_REPLACEMENTS[match.lastgroup])
+            cut = start
+        segment, self.pending = self.pending[:cut], self.pending[cut:]
+        return self._release(segment)
+
+    def _word_start(self, cut: int) -> int:
+        # Cut after whitespace, so a word (and any pattern in it) is never split
+        while cut > 0 and not self.pending[cut - 1].isspace():
+            cut -= 1
+        return cut
+
+    def flush(self) -> str:
+        segment, self.pending = self.pending, ""
+        return self._release(segment) if segment else ""
+
+    def text(self) -> ScrubbedText:
+        return ScrubbedText("".join(self.released))
+
+    def _release(self, segment: str) -> str:
+        clean = scrub_pii(segment)
+        self.released.append(clean)
+        return clean
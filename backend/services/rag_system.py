@@ -1,44 +1,161 @@
 import os
 import json
 import hashlib
+import threading
 import time
-from typing import Dict, List, Tuple, Optional, Any
+from collections import Counter
+from typing import Dict, Iterator, List, Tuple, Optional, Any
 import re
+from services.search_index import BM25Index, field_text
+from services.embeddings import EMBEDDER_PATH, HashingEmbedder
+from services.vector_index import EMBEDDINGS_PATH, create_vector_index, write_vectors
+from services.hybrid_retriever import HybridRetriever
+from services.corpus_watcher import CorpusWatcher
+from services.ingest import CorpusIngester, article_chunks, content_hash, iter_articles, iter_chunks
+
+EMBED_BATCH_SIZE = 256
+KNOWLEDGE_DIR = os.getenv("KNOWLEDGE_DIR", "")
+KNOWLEDGE_EXTENSIONS = (".json", ".jsonl", ".md", ".txt")
+# Rebuild the lexical index once this share of its documents are tombstones
+RAG_COMPACT_RATIO = float(os.getenv("RAG_COMPACT_RATIO", "0.3"))
+RESOURCE_FILES = ["community_links.json", "mentorship_links.json"]
+
+def _batched(rows, size):
+    for start in range(0, len(rows), size):
+        yield rows[start:start + size]
+
+def _document_hash(content: str, metadata: Dict, source: str) -> int:
+    """64-bit md5 of everything indexed about a document; a changed hash means a changed document."""
+    encoded = json.dumps([content, metadata, source], sort_keys=True, default=str).encode('utf-8')
+    return int.from_bytes(hashlib.md5(encoded).digest()[:8], "little")
 
 class DocumentStore:
   
-    def __init__(self, data_dir: str = None):
+    def __init__(self, data_dir: str = None, vectors: bool = True, embeddings_path: str = EMBEDDINGS_PATH,
+                 embedder_path: str = EMBEDDER_PATH, knowledge_dir: str = KNOWLEDGE_DIR):
         self.documents = {}
-        self.embeddings = {}
+        self.embedder = HashingEmbedder.load(embedder_path) or HashingEmbedder()
+        self.embeddings = create_vector_index(self.embedder.dim) if vectors else None
+        self.embeddings_path = embeddings_path
+        self.embedder_path = embedder_path
+        self._vectors_loaded = False
+        self.index = BM25Index()
         self.data_dir = data_dir or os.path.join(os.path.dirname(__file__), "../data")
+        self.knowledge_dir = knowledge_dir
+        # Document id -> hash per source file (or the built-in articles), and what each file looked like when read
+        self._sources: Dict[str, Dict[str, int]] = {}
+        self._file_state: Dict[str, Tuple[int, int, str]] = {}
+        # Which knowledge file supplies each chunk hash, so a chunk repeated across files is kept once
+        self._chunk_owner: Dict[int, str] = {}
+        self._chunk_hashes: Dict[str, set] = {}
+        self._shadowed_paths: set = set()
+        self._released_chunks = False
+        self._refresh_lock = threading.Lock()
+        self._ingester = CorpusIngester(self)
         self.load_documents()
+        if vectors:
+            self.load_embeddings()
         
     def load_documents(self):
-        resource_files = [
-            "community_links.json", 
-            "mentorship_links.json",
-        ]
-        
-        for filename in resource_files:
-            file_path = os.path.join(self.data_dir, filename)
-            if os.path.exists(file_path):
-                try:
-                    with open(file_path, 'r') as f:
-                        data = json.load(f)
-                    for item in data:
-                        doc_id = self._generate_id(str(item))
-
-                        content = f"{item.get('title', '')} - {item.get('description', '')}"
-                        
-                        self.documents[doc_id] = {
-                            'content': content,
-                            'metadata': item,
-                            'source': filename.replace('.json', '')
-                        }
-                except Exception as e:
-                    print(f"Error loading {filename}: {e}")
-        self._load_knowledge_base()
-    
+        """Streams every source into the index in batches, keeping only ids and hashes per source."""
+        def add(rows, hashes):
+            self._ingester.add_rows(rows)
+
+        for path, parse in self._source_files():
+            hashes = self._read_source(path, parse, add)
+            if hashes is not None:
+                self._sources[path] = hashes
+        hashes = {}
+        self._ingester.add_rows(self._hashed(self._load_knowledge_base(), hashes))
+        self._sources['builtin'] = hashes
+
+    def _source_files(self):
+        """(path, parser) for every source file that exists right now."""
+        files = [(os.path.join(self.data_dir, filename), self._parse_resource_file) for filename in RESOURCE_FILES]
+        if self.knowledge_dir and os.path.isdir(self.knowledge_dir):
+            files.extend(
+                (os.path.join(self.knowledge_dir, name), self._parse_knowledge_file)
+                for name in sorted(os.listdir(self.knowledge_dir)) if name.endswith(KNOWLEDGE_EXTENSIONS)
+            )
+        return [(path, parse) for path, parse in files if os.path.exists(path)]
+
+    def _read_source(self, path: str, parse, consume, unchanged_digest: str = None) -> Optional[Dict[str, int]]:
+        """
+        Streams one source file's (doc_id, content, metadata, source) rows
+        into ``consume(rows, hashes)``, where ``hashes`` fills in as rows go
+        by. Returns the document hashes, or None if the file cannot be read
+        right now (say, half written) or its content hash is still
+        ``unchanged_digest``.
+        """
+        try:
+            stat = os.stat(path)
+            digest = hashlib.md5()
+            with open(path, 'rb') as f:
+                for block in iter(lambda: f.read(1024 * 1024), b''):
+                    digest.update(block)
+            digest = digest.hexdigest()
+            if digest == unchanged_digest:
+                hashes = None
+            else:
+                hashes = {}
+                consume(self._hashed(parse(path), hashes), hashes)
+        except Exception as e:
+            print(f"Error loading {os.path.basename(path)}: {e}")
+            return None
+        self._file_state[path] = (stat.st_mtime_ns, stat.st_size, digest)
+        return hashes
+
+    @staticmethod
+    def _hashed(rows, hashes: Dict[str, int]):
+        for row in rows:
+            hashes[row[0]] = _document_hash(*row[1:])
+            yield row
+
+    def _parse_resource_file(self, path: str) -> Iterator[Tuple[str, str, Dict, str]]:
+        source = os.path.basename(path).replace('.json', '')
+        for item in iter_articles(path):
+            content = f"{item.get('title', '')} - {item.get('description', '')}"
+            yield self._generate_id(str(item)), content, item, source
+
+    def _parse_knowledge_file(self, path: str) -> Iterator[Tuple[str, str, Dict, str]]:
+        """
+        A .json file holds one article or a list of them ({title, content,
+        tags}) and a .jsonl file one per line, both streamed and split into
+        overlapping chunks, dropping a chunk repeated in the file or already
+        supplied by another knowledge file; .md and .txt hold one article each.
+        """
+        if path.endswith(('.json', '.jsonl')):
+            own, shadowed = set(), False
+            for doc_id, content, metadata in iter_chunks(path, set(), Counter()):
+                digest = content_hash(content)
+                if self._chunk_owner.get(digest, path) != path:
+                    shadowed = True
+                    continue
+                own.add(digest)
+                yield doc_id, content, metadata, 'knowledge_base'
+            self._claim_chunks(path, own, shadowed)
+        else:
+            with open(path, encoding='utf-8') as f:
+                lines = f.read().strip().splitlines()
+            title = lines[0].lstrip('#').strip() if lines else os.path.splitext(os.path.basename(path))[0]
+            for doc_id, content, metadata in article_chunks({'title': title, 'content': "\n".join(lines[1:]), 'tags': []}):
+                yield doc_id, content, metadata, 'knowledge_base'
+
+    def _claim_chunks(self, path: str, own: set, shadowed: bool):
+        """Records the chunk hashes ``path`` now supplies, releasing any it no longer does."""
+        released = self._chunk_hashes.pop(path, set()) - own
+        for digest in released:
+            del self._chunk_owner[digest]
+        for digest in own:
+            self._chunk_owner[digest] = path
+        if own:
+            self._chunk_hashes[path] = own
+        if shadowed:
+            self._shadowed_paths.add(path)
+        else:
+            self._shadowed_paths.discard(path)
+        self._released_chunks = self._released_chunks or bool(released)
+
     def _load_knowledge_base(self):
         knowledge_articles = [
             {
@@ -107,77 +224,244 @@ class DocumentStore:
             }
         ]
         
-        for article in knowledge_articles:
-            doc_id = self._generate_id(article["title"])
-            self.documents[doc_id] = {
-                'content': f"{article['title']}\n\n{article['content']}",
-                'metadata': {
-                    'title': article['title'],
-                    'tags': article['tags']
-                },
-                'source': 'knowledge_base'
-            }
+        return [
+            (self._generate_id(article["title"]), f"{article['title']}\n\n{article['content']}",
+             {'title': article['title'], 'tags': article['tags']}, 'knowledge_base')
+            for article in knowledge_articles
+        ]
+
+    def refresh(self) -> Dict[str, int]:
+        """
+        Re-reads source files whose size or mtime changed (and whose content
+        hash then differs too) and applies only the documents that changed.
+        Readers keep using the previous documents and index until the new
+        ones are published.
+        """
+        with self._refresh_lock:
+            changed: Dict[str, Dict[str, int]] = {}
+            upserts: Dict[str, Dict] = {}
+
+            def read(path, parse, unchanged_digest=None):
+                # Only documents whose hash differs from the last read are kept, and only if the whole file was read
+                previous, found = self._sources.get(path, {}), {}
+
+                def consume(rows, hashes):
+                    for doc_id, content, metadata, source in rows:
+                        if previous.get(doc_id) != hashes[doc_id]:
+                            found[doc_id] = {'content': content, 'metadata': metadata, 'source': source}
+
+                hashes = self._read_source(path, parse, consume, unchanged_digest)
+                if hashes is not None:
+                    changed[path] = hashes
+                    upserts.update(found)
+
+            files = self._source_files()
+            paths = {path for path, _ in files}
+            for path, parse in files:
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                known = self._file_state.get(path)
+                if known is not None and known[:2] == (stat.st_mtime_ns, stat.st_size):
+                    continue
+                read(path, parse, known[2] if known else None)
+            for path in [path for path in self._sources if path != 'builtin' and path not in paths]:
+                changed[path] = {}
+                self._file_state.pop(path, None)
+                self._claim_chunks(path, set(), False)
+            if self._released_chunks:
+                # A chunk another file skipped as a duplicate may now be supplied by nobody: re-read those files
+                self._released_chunks = False
+                for path, parse in files:
+                    if path in self._shadowed_paths:
+                        read(path, parse)
+            if not changed:
+                return {"added": 0, "updated": 0, "removed": 0}
+
+            removals = set()
+            for path, hashes in changed.items():
+                removals |= self._sources.get(path, {}).keys() - hashes.keys()
+                if hashes:
+                    self._sources[path] = hashes
+                else:
+                    self._sources.pop(path, None)
+            restore: Dict[str, set] = {}
+            for doc_id in list(removals):
+                # Still provided by another source: keep that version instead
+                other = next((path for path, hashes in self._sources.items() if doc_id in hashes), None)
+                if other is None:
+                    continue
+                removals.discard(doc_id)
+                current = upserts.get(doc_id) or self.documents.get(doc_id)
+                if current is None or self._sources[other][doc_id] != _document_hash(
+                        current['content'], current['metadata'], current['source']):
+                    restore.setdefault(other, set()).add(doc_id)
+            parsers = dict(files)
+            for path, doc_ids in restore.items():
+                upserts.update(self._documents_from(path, parsers.get(path), doc_ids))
+            return self._apply_changes(upserts, removals)
+
+    def _documents_from(self, path: str, parse, doc_ids: set) -> Dict[str, Dict]:
+        """Re-reads the given documents from one source (or the built-in articles)."""
+        rows = self._load_knowledge_base() if path == 'builtin' else parse(path)
+        documents = {}
+        try:
+            # Read to the end: the knowledge parser records the file's chunks once it is done
+            for doc_id, content, metadata, source in rows:
+                if doc_id in doc_ids:
+                    documents[doc_id] = {'content': content, 'metadata': metadata, 'source': source}
+        except Exception as e:
+            print(f"Error loading {os.path.basename(path)}: {e}")
+        return documents
+
+    def _apply_changes(self, upserts: Dict[str, Dict], removals: set) -> Dict[str, int]:
+        documents = dict(self.documents)
+        added = sum(1 for doc_id in upserts if doc_id not in documents)
+        documents.update(upserts)
+        for doc_id in removals:
+            documents.pop(doc_id, None)
+
+        vectors = None
+        if self.embeddings is not None and self._vectors_loaded and upserts:
+            vectors = self.embedder.embed(self._embedding_text(doc) for doc in upserts.values())
+
+        # Publish: readers switch to the new documents, then the index and vectors change in one step each
+        self.documents = documents
+        self.index.apply(((doc_id, self._index_fields(doc)) for doc_id, doc in upserts.items()), removals)
+        if vectors is not None or (removals and self.embeddings is not None):
+            self.embeddings.apply(list(zip(upserts, vectors if vectors is not None else [])), removals)
+        if self.index.dead_ratio > RAG_COMPACT_RATIO:
+            self._rebuild_index()
+        return {"added": added, "updated": len(upserts) - added, "removed": len(removals)}
+
+    def _rebuild_index(self):
+        index = BM25Index()
+        index.add_many((doc_id, self._index_fields(doc)) for doc_id, doc in self.documents.items())
+        self.index = index
+
+    def add_document(self, doc_id: str, content: str, metadata: Dict, source: str):
+        self.add_documents([(doc_id, content, metadata, source)])
+
+    def add_documents(self, batch: List[Tuple[str, str, Dict, str]]) -> int:
+        """
+        Adds (doc_id, content, metadata, source) rows in one index update,
+        embedding them together if vectors are loaded. Ids already present
+        are left alone; returns how many were added.
+        """
+        with self._refresh_lock:
+            new = {}
+            for doc_id, content, metadata, source in batch:
+                if doc_id not in self.documents and doc_id not in new:
+                    new[doc_id] = {'content': content, 'metadata': metadata, 'source': source}
+            if not new:
+                return 0
+            self.documents.update(new)
+            self.index.apply(((doc_id, self._index_fields(doc)) for doc_id, doc in new.items()), ())
+            if self.embeddings is not None and self._vectors_loaded:
+                vectors = self.embedder.embed(self._embedding_text(doc) for doc in new.values())
+                self.embeddings.apply(list(zip(new, vectors)), ())
+            return len(new)
+
+    def _index_fields(self, doc: Dict) -> Dict[str, str]:
+        fields = {name: field_text(doc['metadata'].get(name)) for name in self.index.fields if name != 'content'}
+        fields['content'] = doc['content']
+        return fields
+
+    def load_embeddings(self):
+        """Maps the built vectors and embeds whatever they do not cover; the IDF is fitted here if no build exists."""
+        if self.embeddings is None:
+            self.embeddings = create_vector_index(self.embedder.dim)
+        mapped = self.embeddings.load(self.embeddings_path, self.embedder.signature)
+        missing = [doc_id for doc_id in self.documents if doc_id not in self.embeddings]
+        if len(missing) > 1000:
+            print(f"[DocumentStore] Embedding {len(missing)} documents at startup; "
+                  f"run training/build_embeddings.py to map them from disk instead")
+        if missing:
+            vectors = self.embedder.raw(self.embedding_text(doc_id) for doc_id in missing)
+            if not self.embedder.fitted:
+                self.embedder.fit([vectors])
+            self.embeddings.add_many(missing, self.embedder.finish(vectors))
+        self._vectors_loaded = True
+        print(f"[DocumentStore] {mapped} vectors mapped from disk, {len(missing)} embedded at startup")
+
+    def write_embeddings(self, path: str = None, embedder_path: str = None) -> int:
+        """
+        Embeds every document and writes the vectors, and the embedder fitted
+        on them, for later startups to map instead of recomputing.
+        """
+        doc_ids = list(self.documents)
+        batches = (self.embedder.raw(self.embedding_text(doc_id) for doc_id in batch)
+                   for batch in _batched(doc_ids, EMBED_BATCH_SIZE))
+
+        def finalize(matrix):
+            self.embedder.fit(_batched(matrix, EMBED_BATCH_SIZE))
+            self.embedder.finish(matrix)
+            return self.embedder.signature
+
+        write_vectors(path or self.embeddings_path, doc_ids, batches, self.embedder.dim, finalize)
+        self.embedder.save(embedder_path or self.embedder_path)
+        return len(doc_ids)
+
+    def embedding_text(self, doc_id: str) -> str:
+        return self._embedding_text(self.documents[doc_id])
+
+    def _embedding_text(self, doc: Dict) -> str:
+        tags = field_text(doc['metadata'].get('tags'))
+        return f"{doc['content']}\n{tags}" if tags else doc['content']
     
     def _generate_id(self, text: str) -> str:
         return hashlib.md5(text.encode('utf-8')).hexdigest()
     
     def simple_search(self, query: str, top_k: int = 3) -> List[Dict]:
-        query_terms = set(query.lower().split())
         results = []
+        documents = self.documents
+        for doc_id, score in self.index.search(query, top_k):
+            doc = documents.get(doc_id)
+            if doc is None:
+                continue
+            results.append({
+                'id': doc_id,
+                'content': doc['content'],
+                'metadata': doc['metadata'],
+                'score': score,
+                'source': doc.get('source', 'unknown')
+            })
+        return results
 
-        for doc_id, doc in self.documents.items():
-            score = self._calculate_relevance_score(doc, query_terms)
-            if score > 0:
-                results.append({
-                    'id': doc_id,
-                    'content': doc['content'],
-                    'metadata': doc['metadata'],
-                    'score': score,
-                    'source': doc.get('source', 'unknown')
-                })
-
-        results.sort(key=lambda x: x['score'], reverse=True)
-        return results[:top_k]
-
-    def _calculate_relevance_score(self, doc: Dict, query_terms: set) -> int:
-        content = doc['content'].lower()
-        metadata = doc.get('metadata', {})
-        score = self._calculate_content_score(content, query_terms)
-        score += self._boost_metadata_score(metadata, query_terms)
-        return score
-
-    def _calculate_content_score(self, content: str, query_terms: set) -> int:
-        return sum(content.count(term) for term in query_terms if term in content)
-
-    def _boost_metadata_score(self, metadata: Dict, query_terms: set) -> int:
-        score = 0
-        if metadata:
-            for key, value in metadata.items():
-                score += self._calculate_string_score(value, query_terms)
-                score += self._calculate_list_score(value, query_terms)
-        return score
-
-    def _calculate_string_score(self, value: Any, query_terms: set) -> int:
-        if isinstance(value, str) and any(term in value.lower() for term in query_terms):
-            return 2
-        return 0
-
-    def _calculate_list_score(self, value: Any, query_terms: set) -> int:
-        score = 0
-        if isinstance(value, list):
-            for item in value:
-                if isinstance(item, str) and any(term in item.lower() for term in query_terms):
-                    score += 2
-        return score
+    def dense_search(self, query: str, top_k: int = 3) -> List[Dict]:
+        if self.embeddings is None:
+            return []
+        results = []
+        documents = self.documents
+        for doc_id, score in self.embeddings.search(self.embedder.embed_one(query), top_k):
+            doc = documents.get(doc_id)
+            if doc is None:
+                continue
+            results.append({
+                'id': doc_id,
+                'content': doc['content'],
+                'metadata': doc['metadata'],
+                'score': score,
+                'source': doc.get('source', 'unknown')
+            })
+        return results
 
 
 class RAGSystem:
     def __init__(self):
         self.document_store = DocumentStore()
+        self.retriever = HybridRetriever(self.document_store)
+        # Not started here: call watcher.start() to pick up edited data files without a restart
+        self.watcher = CorpusWatcher(self.document_store)
         self.feedback_cache = {}  
+
+    def retrieve(self, query: str, top_k: int = 3) -> Tuple[List[Dict], Dict[str, Any]]:
+        """Hybrid BM25 + dense results under per-source quotas, with a timing report."""
+        return self.retriever.retrieve(query, top_k)
         
     def generate_context(self, query: str) -> str:
-        results = self.document_store.simple_search(query)
+        results, _ = self.retrieve(query)
         
         if not results:
             return ""
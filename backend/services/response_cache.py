@@ -0,0 +1,92 @@
+# services/response_cache.py
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+RESPONSE_CACHE_SIZE = int(os.getenv("RESPONSE_CACHE_SIZE", "2048"))
+RESPONSE_CACHE_TTL_SECONDS = float(os.getenv("RESPONSE_CACHE_TTL_SECONDS", "900"))
+
+WHITESPACE = re.compile(r"\s+")
+
+
+class ResponseCache:
+    """
+    Exact-match cache of finished replies, keyed on the normalized scrubbed
+    prompt plus a hash of the prior context messages. Bounded by entry count
+    (least recently used goes first) and by a per-entry TTL.
+    """
+
+    def __init__(self, max_entries: int = RESPONSE_CACHE_SIZE, ttl_seconds: float = RESPONSE_CACHE_TTL_SECONDS):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    @staticmethod
+    def normalize_prompt(prompt: str) -> str:
+        return WHITESPACE.sub(" ", prompt.lower()).strip().rstrip("?!. ")
+
+    def make_key(self, clean_prompt: str, messages: List[Dict]) -> str:
+        context = json.dumps(messages[:-1], sort_keys=True, ensure_ascii=False)
+        context_hash = hashlib.sha256(context.encode("utf-8")).hexdigest()
+        return f"{self.normalize_prompt(clean_prompt)}\x00{context_hash}"
+
+    def get(self, key: str) -> Optional[Any]:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            expires, value = entry
+            if expires < now:
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key: str, value: Any):
+        expires = time.monotonic() + self.ttl_seconds
+        with self._lock:
+            self._entries[key] = (expires, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+            }
+
+
+response_cache = ResponseCache()
+
+
+def is_cacheable_reply(reply_text: str, guardrail_intervened: bool) -> bool:
+    # Never cache guardrail fallbacks or tool/agent error notices
+    return bool(reply_text) and not guardrail_intervened and not reply_text.startswith(("⚠️", "❌", "[No valid"))
@@ -0,0 +1,198 @@
+# services/search_index.py
+import heapq
+import math
+import os
+import re
+import threading
+from array import array
+from typing import Dict, FrozenSet, Iterable, List, Optional, Tuple
+
+BM25_K1 = float(os.getenv("BM25_K1", "1.2"))
+BM25_B = float(os.getenv("BM25_B", "0.75"))
+
+# Matches in these metadata fields count on top of the document body
+FIELD_BOOSTS = {"content": 1.0, "title": 2.0, "tags": 2.0, "description": 1.0}
+
+TOKEN_RE = re.compile(r"[a-z0-9]+")
+STOP_WORDS = frozenset(
+    "a an and are as at be but by can do does for from how i in is it me my of on or so that the this "
+    "to was what when where which who why will with you your".split())
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercased word tokens without stop words; a trailing plural "s" is folded so "interviews" finds "interview"."""
+    tokens = []
+    for token in TOKEN_RE.findall(text.lower()):
+        if token in STOP_WORDS:
+            continue
+        if len(token) > 3 and token.endswith("s") and not token.endswith("ss"):
+            token = token[:-1]
+        tokens.append(token)
+    return tokens
+
+
+def field_text(value) -> str:
+    if isinstance(value, str):
+        return value
+    if isinstance(value, (list, tuple)):
+        return " ".join(item for item in value if isinstance(item, str))
+    return ""
+
+
+class _Field:
+    """Postings for one field: term -> (document numbers, term frequencies), plus per-document lengths."""
+
+    __slots__ = ("boost", "postings", "lengths")
+
+    def __init__(self, boost: float):
+        self.boost = boost
+        self.postings: Dict[str, Tuple[array, array]] = {}
+        self.lengths = array("I")
+
+
+class _State:
+    """What searches see: published document numbers, tombstones and live length totals. Replaced, never changed."""
+
+    __slots__ = ("count", "live", "deleted", "totals")
+
+    def __init__(self, count: int, live: int, deleted: FrozenSet[int], totals: Dict[str, int]):
+        self.count = count
+        self.live = live
+        self.deleted = deleted
+        self.totals = totals
+
+
+class BM25Index:
+    """
+    Inverted index with BM25 scoring over a few weighted fields (the body
+    plus metadata such as title and tags). Documents are numbered in the
+    order they are added; a query only walks the postings of its own terms
+    and keeps the best ``top_k`` in a heap, so its cost follows how common
+    the query terms are rather than how many documents there are.
+
+    Postings only ever grow. A removed or replaced document is tombstoned,
+    and every change made by one ``apply`` becomes visible to searches at
+    once, when the new state is published; searches never take the lock.
+    Tombstoned postings still count towards document frequencies until the
+    index is rebuilt, which the owner does once ``dead_ratio`` gets high.
+    """
+
+    def __init__(self, field_boosts: Optional[Dict[str, float]] = None, k1: float = BM25_K1, b: float = BM25_B):
+        self.k1 = k1
+        self.b = b
+        self.fields = {name: _Field(boost) for name, boost in (field_boosts or FIELD_BOOSTS).items()}
+        self.doc_ids: List[str] = []
+        self._numbers: Dict[str, int] = {}
+        self._state = _State(0, 0, frozenset(), {name: 0 for name in self.fields})
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return self._state.live
+
+    def __contains__(self, doc_id: str) -> bool:
+        return doc_id in self._numbers
+
+    @property
+    def dead_ratio(self) -> float:
+        state = self._state
+        return len(state.deleted) / state.count if state.count else 0.0
+
+    def add(self, doc_id: str, fields: Dict[str, str]):
+        """Indexes one document given its text per field, replacing any earlier version of it."""
+        self.apply([(doc_id, fields)], ())
+
+    def add_many(self, documents: Iterable[Tuple[str, Dict[str, str]]]):
+        self.apply(documents, ())
+
+    def remove(self, doc_id: str):
+        self.apply((), [doc_id])
+
+    def apply(self, upserts: Iterable[Tuple[str, Dict[str, str]]], removals: Iterable[str]):
+        """Adds or replaces ``upserts`` and drops ``removals``, publishing all of it together."""
+        counted = []
+        for doc_id, fields in upserts:
+            per_field = []
+            for name, field in self.fields.items():
+                counts: Dict[str, int] = {}
+                tokens = tokenize(fields.get(name, ""))
+                for token in tokens:
+                    counts[token] = counts.get(token, 0) + 1
+                per_field.append((name, field, len(tokens), counts))
+            counted.append((doc_id, per_field))
+
+        with self._lock:
+            state = self._state
+            deleted = []
+            totals = dict(state.totals)
+            for doc_id in removals:
+                self._tombstone(doc_id, deleted, totals)
+            for doc_id, per_field in counted:
+                if doc_id in self._numbers:
+                    self._tombstone(doc_id, deleted, totals)
+                number = len(self.doc_ids)
+                self.doc_ids.append(doc_id)
+                self._numbers[doc_id] = number
+                for name, field, length, counts in per_field:
+                    field.lengths.append(length)
+                    totals[name] += length
+                    postings = field.postings
+                    for token, tf in counts.items():
+                        posting = postings.get(token)
+                        if posting is None:
+                            posting = postings[token] = (array("I"), array("I"))
+                        posting[0].append(number)
+                        posting[1].append(tf)
+            self._state = _State(len(self.doc_ids), len(self._numbers),
+                                 state.deleted.union(deleted) if deleted else state.deleted, totals)
+
+    def _tombstone(self, doc_id: str, deleted: List[int], totals: Dict[str, int]):
+        number = self._numbers.pop(doc_id, None)
+        if number is None:
+            return
+        deleted.append(number)
+        for name, field in self.fields.items():
+            totals[name] -= field.lengths[number]
+
+    def search(self, query: str, top_k: int = 3) -> List[Tuple[str, float]]:
+        """The ``top_k`` best (doc_id, score) pairs, best first; documents matching no term are left out."""
+        terms = set(tokenize(query))
+        state = self._state
+        count, limit, deleted = state.live, state.count, state.deleted
+        if not terms or not count:
+            return []
+        k1, b = self.k1, self.b
+        scores: Dict[int, float] = {}
+        for name, field in self.fields.items():
+            total = state.totals[name]
+            if not total:
+                continue
+            lengths = field.lengths
+            norm = k1 * (1 - b)
+            slope = k1 * b * count / total
+            for term in terms:
+                posting = field.postings.get(term)
+                if posting is None:
+                    continue
+                docs, tfs = posting
+                df = len(docs)
+                weight = field.boost * math.log(1 + max(count - df + 0.5, 0.5) / (df + 0.5)) * (k1 + 1)
+                get = scores.get
+                for number, tf in zip(docs, tfs):
+                    if number >= limit:
+                        # Postings are in document order; the rest is not published yet
+                        break
+                    scores[number] = get(number, 0.0) + weight * tf / (tf + norm + slope * lengths[number])
+        if deleted:
+            for number in deleted.intersection(scores):
+                del scores[number]
+        best = heapq.nlargest(top_k, scores.items(), key=lambda item: item[1])
+        return [(self.doc_ids[number], score) for number, score in best]
+
+    def stats(self) -> Dict[str, int]:
+        state = self._state
+        return {
+            "documents": state.live,
+            "deleted": len(state.deleted),
+            "terms": sum(len(field.postings) for field in self.fields.values()),
+            "postings": sum(len(docs) for field in self.fields.values() for docs, _ in field.postings.values()),
+        }
@@ -1,51 +1,45 @@
-from supabase import create_client
+from services.pii_scrubber import scrub_pii
+from services.write_behind import WriteBehindQueue
+from services.history_cache import HistoryCache
+from services.supabase_rest import is_unsent, supabase_rest
+from datetime import datetime, timezone
 import os
-import re
 
-supabase = create_client(os.environ["SUPABASE_URL"], os.environ["SUPABASE_ANON_KEY"])
+def fetch_chat_history(user_id: str, limit: int = 5):
+    """The user's ``limit`` most recent rows, oldest first."""
+    rows = supabase_rest.select("chat_history", {
+        "select": "prompt,response,timestamp",
+        "user_id": f"eq.{user_id}",
+        "order": "timestamp.desc",
+        "limit": str(limit),
+    })
+    return list(reversed(rows))
 
-def scrub_pii(text: str) -> str:
-    # Email pattern
-    text = re.sub(r'[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}', '[EMAIL REDACTED]', text)
-    
-    # Phone number patterns (various formats)
-    text = re.sub(r'\b\+?\d{1,3}[-.\s]?\d{3}[-.\s]?\d{3}[-.\s]?\d{4}\b', '[PHONE REDACTED]', text)
-    
-    # Social security / ID number patterns
-    text = re.sub(r'\b\d{3}[-\s]?\d{2}[-\s]?\d{4}\b', '[ID REDACTED]', text)
-    
-    # URLs with potential user IDs
-    text = re.sub(r'https?://[^\s/]+/(?:user|profile|account|u)/[a-zA-Z0-9_-]+', '[URL REDACTED]', text)
-    
-    # Physical addresses (simplified pattern)
-    text = re.sub(r'\b\d+\s+[A-Za-z0-9\s,]+(?:Ave|St|Rd|Blvd|Ln|Dr|Way|Ct|Sq|Tr|Pkwy|Cir)\b', '[ADDRESS REDACTED]', text)
-    
-    # WhatsApp/Telegram number patterns
-    text = re.sub(r'\b(?:whatsapp|telegram|signal|viber)(?:\s+at)?\s+[+]?\d[\d\s-]{7,}', '[CONTACT REDACTED]', text)
-    
-    # LinkedIn profile patterns
-    text = re.sub(r'linkedin\.com/in/[a-zA-Z0-9_-]+', '[LINKEDIN REDACTED]', text)
-    
-    # Other social media handles
-    text = re.sub(r'@\w{2,}', '[SOCIAL MEDIA HANDLE REDACTED]', text)
-    
-    return text
+def insert_chat_rows(rows: list):
+    supabase_rest.insert("chat_history", rows)
 
-def fetch_chat_history(user_id: str, limit: int = 5):
-    response = supabase.table("chat_history")\
-        .select("prompt, response")\
-        .eq("user_id", user_id)\
-        .order("timestamp", desc=False)\
-        .limit(limit)\
-        .execute()
-    return response.data
+chat_history_cache = HistoryCache(fetch_chat_history)
+
+chat_writer = WriteBehindQueue(
+    insert_chat_rows,
+    name="chat-history-writer",
+    batch_size=int(os.getenv("CHAT_WRITE_BATCH_SIZE", "50")),
+    flush_interval=float(os.getenv("CHAT_WRITE_FLUSH_SECONDS", "0.5")),
+    max_pending=int(os.getenv("CHAT_WRITE_MAX_PENDING", "10000")),
+    # An insert that may have reached the server is not repeated
+    retry_if=is_unsent
+)
 
 def save_chat(user_id: str, prompt: str, response: str):
     clean_prompt = scrub_pii(prompt)
     clean_response = scrub_pii(response)
-    
-    supabase.table("chat_history").insert({
+
+    # Rows are written in batches, so stamp them now to keep their order
+    timestamp = datetime.now(timezone.utc).isoformat()
+    chat_writer.enqueue({
         "user_id": user_id,
         "prompt": clean_prompt,
-        "response": clean_response
-    }).execute()
\ No newline at end of file
+        "response": clean_response,
+        "timestamp": timestamp
+    })
+    chat_history_cache.append(user_id, {"prompt": clean_prompt, "response": clean_response, "timestamp": timestamp})
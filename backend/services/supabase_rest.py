@@ -0,0 +1,223 @@
+# services/supabase_rest.py
+import os
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+import httpx
+
+from services.admission import jittered_backoff
+from services.metrics import registry
+
+SUPABASE_MAX_CONNECTIONS = int(os.getenv("SUPABASE_MAX_CONNECTIONS", "32"))
+SUPABASE_MAX_KEEPALIVE = int(os.getenv("SUPABASE_MAX_KEEPALIVE", "16"))
+SUPABASE_KEEPALIVE_SECONDS = float(os.getenv("SUPABASE_KEEPALIVE_SECONDS", "30"))
+SUPABASE_CONNECT_TIMEOUT = float(os.getenv("SUPABASE_CONNECT_TIMEOUT", "2"))
+SUPABASE_DEADLINE_SECONDS = float(os.getenv("SUPABASE_DEADLINE_SECONDS", "3"))
+SUPABASE_MAX_ATTEMPTS = int(os.getenv("SUPABASE_MAX_ATTEMPTS", "3"))
+
+# Statuses worth retrying a read on; only the first two say the request was not acted on at all
+RETRYABLE_STATUSES = {429, 502, 503, 504}
+UNSENT_STATUSES = {429, 503}
+# Failures where the request never reached the server, so even a write is safe to repeat
+UNSENT_ERRORS = (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout)
+# Failures after the request may have been processed; only reads are repeated
+TRANSIENT_ERRORS = UNSENT_ERRORS + (httpx.ReadTimeout, httpx.ReadError, httpx.WriteError,
+                                    httpx.RemoteProtocolError)
+
+SUPABASE_REQUESTS = registry.counter(
+    "disha_supabase_requests_total", "Supabase REST calls by table, method and outcome",
+    ("table", "method", "outcome"))
+SUPABASE_SECONDS = registry.histogram(
+    "disha_supabase_request_seconds", "Supabase REST call latency including retries", ("table", "method"))
+
+
+class SupabaseError(Exception):
+    """``unsent`` is True only when no attempt can have been acted on, so repeating a write is safe."""
+
+    def __init__(self, message: str, status_code: Optional[int] = None, unsent: bool = False):
+        super().__init__(message)
+        self.status_code = status_code
+        self.unsent = unsent
+
+
+class SupabaseTimeout(SupabaseError, TimeoutError):
+    pass
+
+
+def is_unsent(error: Exception) -> bool:
+    return isinstance(error, SupabaseError) and error.unsent
+
+
+class SupabaseRestClient:
+    """
+    Data access to Supabase's PostgREST endpoint over one pooled
+    ``httpx.Client`` per process, shared by every caller thread (threads
+    from run_blocking and the write-behind worker); httpx clients are
+    thread-safe, so concurrent calls each take their own pooled connection.
+
+    Every call has a deadline covering all of its attempts; each attempt's
+    connect, pool wait, write and every read are bounded by what is left of
+    it, so only a server trickling a response byte by byte can overrun. Reads are retried
+    on timeouts, dropped connections and 429/502/503/504; writes only when the
+    request cannot have reached the server, since an insert is not idempotent.
+    Errors say whether that held for every attempt (``is_unsent``), which is
+    what a caller retrying writes itself has to check.
+    New connections are counted through httpx's ``trace`` extension, so
+    ``stats()`` shows how often a pooled connection was reused.
+    """
+
+    def __init__(self, url: Optional[str] = None, key: Optional[str] = None,
+                 max_connections: int = SUPABASE_MAX_CONNECTIONS, max_keepalive: int = SUPABASE_MAX_KEEPALIVE,
+                 keepalive_expiry: float = SUPABASE_KEEPALIVE_SECONDS,
+                 connect_timeout: float = SUPABASE_CONNECT_TIMEOUT, deadline: float = SUPABASE_DEADLINE_SECONDS,
+                 max_attempts: int = SUPABASE_MAX_ATTEMPTS, backoff_base: float = 0.05, backoff_cap: float = 1.0):
+        self.url = url
+        self.key = key
+        self.limits = httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_keepalive,
+                                   keepalive_expiry=keepalive_expiry)
+        self.connect_timeout = connect_timeout
+        self.deadline = deadline
+        self.max_attempts = max_attempts
+        self.backoff_base = backoff_base
+        self.backoff_cap = backoff_cap
+
+        self._lock = threading.Lock()
+        self._pid = os.getpid()
+        self._client: Optional[httpx.Client] = None
+
+        self.requests = 0
+        self.attempts = 0
+        self.retries = 0
+        self.timeouts = 0
+        self.errors = 0
+        self.connections_created = 0
+        self.in_flight = 0
+
+    def select(self, table: str, params: Dict[str, str], deadline: Optional[float] = None) -> List[Dict]:
+        response = self._request("GET", table, params=params, deadline=deadline, idempotent=True)
+        return response.json()
+
+    def insert(self, table: str, rows: List[Dict], deadline: Optional[float] = None):
+        self._request("POST", table, json=rows, headers={"Prefer": "return=minimal"},
+                      deadline=deadline, idempotent=False)
+
+    def close(self):
+        with self._lock:
+            client, self._client = self._client, None
+        if client is not None:
+            client.close()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "requests": self.requests,
+            "attempts": self.attempts,
+            "retries": self.retries,
+            "timeouts": self.timeouts,
+            "errors": self.errors,
+            "in_flight": self.in_flight,
+            "connections_created": self.connections_created,
+            "connections_reused": max(0, self.attempts - self.connections_created),
+            "pooled_connections": _pooled_connections(self._client),
+        }
+
+    def _request(self, method: str, table: str, params: Optional[Dict[str, str]] = None,
+                       json: Any = None, headers: Optional[Dict[str, str]] = None,
+                       deadline: Optional[float] = None, idempotent: bool = True) -> httpx.Response:
+        client = self._get_client()
+        started = time.monotonic()
+        ends = started + (deadline or self.deadline)
+        retryable = TRANSIENT_ERRORS if idempotent else UNSENT_ERRORS
+        statuses = RETRYABLE_STATUSES if idempotent else UNSENT_STATUSES
+        sent = False
+        with self._lock:
+            self.requests += 1
+            self.in_flight += 1
+        outcome = "error"
+        try:
+            for attempt in range(self.max_attempts):
+                remaining = ends - time.monotonic()
+                if remaining <= 0:
+                    break
+                with self._lock:
+                    self.attempts += 1
+                timeout = httpx.Timeout(remaining, connect=min(self.connect_timeout, remaining), pool=remaining)
+                try:
+                    response = client.request(method, table, params=params, json=json, headers=headers,
+                                              timeout=timeout, extensions={"trace": self._trace})
+                except retryable as e:
+                    sent = sent or not isinstance(e, UNSENT_ERRORS)
+                    error = SupabaseError(f"{method} {table}: {type(e).__name__}: {e}", unsent=not sent)
+                except httpx.HTTPError as e:
+                    raise SupabaseError(f"{method} {table}: {type(e).__name__}: {e}",
+                                        unsent=not sent and isinstance(e, UNSENT_ERRORS)) from e
+                else:
+                    if response.is_success:
+                        outcome = "ok"
+                        return response
+                    sent = sent or response.status_code not in UNSENT_STATUSES
+                    error = SupabaseError(f"{method} {table}: HTTP {response.status_code}: {response.text[:200]}",
+                                          response.status_code, unsent=not sent)
+                    if response.status_code not in statuses:
+                        raise error
+
+                if attempt + 1 < self.max_attempts:
+                    delay = jittered_backoff(attempt, self.backoff_base, self.backoff_cap)
+                    if time.monotonic() + delay >= ends:
+                        break
+                    with self._lock:
+                        self.retries += 1
+                    time.sleep(delay)
+                else:
+                    raise error
+
+            outcome = "timeout"
+            with self._lock:
+                self.timeouts += 1
+            raise SupabaseTimeout(f"Supabase {method} {table} missed its {ends - started:.1f}s deadline",
+                                  unsent=not sent)
+        except SupabaseTimeout:
+            raise
+        except SupabaseError:
+            with self._lock:
+                self.errors += 1
+            raise
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+            SUPABASE_REQUESTS.inc(table=table, method=method, outcome=outcome)
+            SUPABASE_SECONDS.observe(time.monotonic() - started, table=table, method=method)
+
+    def _trace(self, event: str, info: Dict[str, Any]):
+        if event == "connection.connect_tcp.complete":
+            with self._lock:
+                self.connections_created += 1
+
+    def _get_client(self) -> httpx.Client:
+        with self._lock:
+            if os.getpid() != self._pid:
+                # The pooled sockets belong to the parent
+                self._pid = os.getpid()
+                self._client = None
+            if self._client is None:
+                url = self.url or os.environ.get("SUPABASE_URL")
+                key = self.key or os.environ.get("SUPABASE_ANON_KEY")
+                if not url or not key:
+                    raise SupabaseError("SUPABASE_URL and SUPABASE_ANON_KEY must be set")
+                self._client = httpx.Client(
+                    base_url=f"{url.rstrip('/')}/rest/v1/",
+                    headers={"apikey": key, "Authorization": f"Bearer {key}"},
+                    limits=self.limits,
+                )
+            return self._client
+
+
+def _pooled_connections(client) -> int:
+    # httpx has no public accessor for its httpcore pool, so read it defensively
+    try:
+        return len(client._transport._pool.connections)
+    except Exception:
+        return 0
+
+
+supabase_rest = SupabaseRestClient()
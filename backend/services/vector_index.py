@@ -0,0 +1,240 @@
+# services/vector_index.py
+import json
+import os
+import threading
+import uuid
+from abc import ABC, abstractmethod
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+EMBEDDINGS_PATH = os.getenv("EMBEDDINGS_PATH", os.path.join(os.path.dirname(__file__), "../data/embeddings.npy"))
+VECTOR_INDEX = os.getenv("VECTOR_INDEX", "numpy")
+QDRANT_PATH = os.getenv("QDRANT_PATH", os.path.join(os.path.dirname(__file__), "../data/qdrant"))
+QDRANT_COLLECTION = os.getenv("QDRANT_COLLECTION", "disha_documents")
+
+
+def ids_path(path: str) -> str:
+    return os.path.splitext(path)[0] + ".ids.json"
+
+
+def write_vectors(path: str, doc_ids: List[str], batches: Iterable[np.ndarray], dim: int,
+                  finalize: Callable[[np.ndarray], str]):
+    """
+    Writes vectors to ``path`` as a float32 ``.npy`` (row i belongs to
+    doc_ids[i]) batch by batch, so the whole matrix never has to be in
+    memory, plus a sidecar with the ids. ``finalize`` gets the filled
+    (memory-mapped) matrix to fit and transform in place, and returns the
+    embedder signature the sidecar records. Both files are replaced
+    atomically.
+    """
+    tmp_path = f"{path}.tmp.npy"
+    matrix = np.lib.format.open_memmap(tmp_path, mode="w+", dtype=np.float32, shape=(len(doc_ids), dim))
+    row = 0
+    try:
+        for batch in batches:
+            matrix[row:row + len(batch)] = batch
+            row += len(batch)
+        if row != len(doc_ids):
+            raise ValueError(f"Got {row} vectors for {len(doc_ids)} documents")
+        signature = finalize(matrix)
+        matrix.flush()
+        del matrix
+        sidecar = ids_path(path)
+        with open(f"{sidecar}.tmp", "w") as f:
+            json.dump({"embedder": signature, "dim": dim, "ids": doc_ids}, f)
+        os.replace(tmp_path, path)
+        os.replace(f"{sidecar}.tmp", sidecar)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+
+
+class VectorIndex(ABC):
+    """Cosine top-k over L2-normalised vectors keyed by document id."""
+
+    def load(self, path: str, signature: str) -> int:
+        return 0
+
+    @abstractmethod
+    def apply(self, upserts: List[Tuple[str, np.ndarray]], removals: Iterable[str]):
+        """Adds or replaces ``upserts`` and drops ``removals``."""
+        raise NotImplementedError
+
+    def add(self, doc_id: str, vector: np.ndarray):
+        self.apply([(doc_id, vector)], ())
+
+    def add_many(self, doc_ids: List[str], vectors):
+        self.apply(list(zip(doc_ids, vectors)), ())
+
+    def remove(self, doc_id: str):
+        self.apply([], [doc_id])
+
+    @abstractmethod
+    def search(self, vector: np.ndarray, top_k: int = 3) -> List[Tuple[str, float]]:
+        raise NotImplementedError
+
+    @abstractmethod
+    def __contains__(self, doc_id: str) -> bool:
+        raise NotImplementedError
+
+    @abstractmethod
+    def __len__(self) -> int:
+        raise NotImplementedError
+
+    def stats(self) -> Dict[str, int]:
+        return {"vectors": len(self)}
+
+
+class NumpyVectorIndex(VectorIndex):
+    """
+    A float32 matrix memory-mapped from the file the build step wrote, plus
+    the vectors added since (documents the file does not cover yet). A
+    query is one matrix-vector product and an ``argpartition`` for the top
+    k, so nothing is sorted beyond the k results; the OS pages the mapped
+    vectors in on first use and shares them between workers.
+
+    Rows are never rewritten: a replaced or removed document's row is
+    masked out of the scores, and its new vector is appended.
+    """
+
+    def __init__(self, dim: int):
+        self.dim = dim
+        self._mapped: Optional[np.ndarray] = None
+        self._ids: List[str] = []
+        self._rows: Dict[str, int] = {}
+        self._extra: List[np.ndarray] = []
+        self._stacked: Optional[np.ndarray] = None
+        self._dead = np.zeros(0, dtype=np.int64)
+        self._lock = threading.Lock()
+
+    def load(self, path: str, signature: str) -> int:
+        """Maps vectors written by ``write_vectors``; returns how many, or 0 if the files are missing or stale."""
+        sidecar = ids_path(path)
+        if not (os.path.exists(path) and os.path.exists(sidecar)):
+            return 0
+        with open(sidecar) as f:
+            meta = json.load(f)
+        if meta.get("embedder") != signature or meta.get("dim") != self.dim:
+            print(f"[VectorIndex] Ignoring {path}: built by {meta.get('embedder')}, expected {signature}")
+            return 0
+        mapped = np.load(path, mmap_mode="r")
+        if mapped.shape != (len(meta["ids"]), self.dim) or mapped.dtype != np.float32:
+            print(f"[VectorIndex] Ignoring {path}: shape {mapped.shape} does not match its ids")
+            return 0
+        with self._lock:
+            self._mapped = mapped
+            self._ids = list(meta["ids"])
+            self._rows = {doc_id: row for row, doc_id in enumerate(self._ids)}
+            self._extra = []
+            self._stacked = None
+            self._dead = np.zeros(0, dtype=np.int64)
+        return len(self._ids)
+
+    def apply(self, upserts: List[Tuple[str, np.ndarray]], removals: Iterable[str]):
+        with self._lock:
+            dead = []
+            for doc_id in removals:
+                row = self._rows.pop(doc_id, None)
+                if row is not None:
+                    dead.append(row)
+            for doc_id, vector in upserts:
+                row = self._rows.get(doc_id)
+                if row is not None:
+                    dead.append(row)
+                self._rows[doc_id] = len(self._ids)
+                self._ids.append(doc_id)
+                self._extra.append(np.asarray(vector, dtype=np.float32))
+            if upserts:
+                self._stacked = None
+            if dead:
+                self._dead = np.concatenate([self._dead, np.asarray(dead, dtype=np.int64)])
+
+    def search(self, vector: np.ndarray, top_k: int = 3) -> List[Tuple[str, float]]:
+        with self._lock:
+            mapped, ids, stacked, dead = self._mapped, self._ids, self._stacked, self._dead
+            if stacked is None and self._extra:
+                stacked = self._stacked = np.vstack(self._extra)
+        query = np.asarray(vector, dtype=np.float32)
+        parts = [m @ query for m in (mapped, stacked) if m is not None and len(m)]
+        if not parts:
+            return []
+        scores = parts[0] if len(parts) == 1 else np.concatenate(parts)
+        if len(dead):
+            scores[dead] = -np.inf
+        k = min(top_k, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [(ids[row], float(scores[row])) for row in top if scores[row] > 0]
+
+    def __contains__(self, doc_id: str) -> bool:
+        return doc_id in self._rows
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def stats(self) -> Dict[str, int]:
+        mapped = 0 if self._mapped is None else len(self._mapped)
+        return {"vectors": len(self._rows), "mapped": mapped, "in_memory": len(self._ids) - mapped,
+                "masked": len(self._dead)}
+
+
+class QdrantVectorIndex(VectorIndex):
+    """
+    Embedded local Qdrant (no server; data under ``path``) with an HNSW
+    index, for corpora where a brute-force product per query gets too slow.
+    Qdrant wants integer or UUID point ids, so the point id is a UUID
+    derived from the document id, which is kept in the payload.
+    """
+
+    def __init__(self, dim: int, path: str = QDRANT_PATH, collection: str = QDRANT_COLLECTION):
+        from qdrant_client import QdrantClient
+        from qdrant_client.models import Distance, VectorParams
+
+        self.dim = dim
+        self.collection = collection
+        self.client = QdrantClient(path=path)
+        if not self.client.collection_exists(collection):
+            self.client.create_collection(collection, vectors_config=VectorParams(size=dim, distance=Distance.COSINE))
+        self._count = self.client.count(collection).count
+
+    def load(self, path: str, signature: str) -> int:
+        # Points persist in the Qdrant directory, so there is nothing to map
+        return self._count
+
+    def apply(self, upserts: List[Tuple[str, np.ndarray]], removals: Iterable[str]):
+        from qdrant_client.models import PointIdsList, PointStruct
+
+        removals = [self._point_id(doc_id) for doc_id in removals]
+        if removals:
+            self.client.delete(self.collection, points_selector=PointIdsList(points=removals))
+        if upserts:
+            points = [PointStruct(id=self._point_id(doc_id), vector=np.asarray(vector, dtype=np.float32).tolist(),
+                                  payload={"doc_id": doc_id})
+                      for doc_id, vector in upserts]
+            self.client.upsert(self.collection, points)
+        self._count = self.client.count(self.collection).count
+
+    def search(self, vector: np.ndarray, top_k: int = 3) -> List[Tuple[str, float]]:
+        hits = self.client.query_points(self.collection, query=np.asarray(vector, dtype=np.float32).tolist(),
+                                        limit=top_k).points
+        return [(hit.payload["doc_id"], hit.score) for hit in hits if hit.score > 0]
+
+    def __contains__(self, doc_id: str) -> bool:
+        return bool(self.client.retrieve(self.collection, [self._point_id(doc_id)]))
+
+    def __len__(self) -> int:
+        return self._count
+
+    @staticmethod
+    def _point_id(doc_id: str) -> str:
+        return str(uuid.uuid5(uuid.NAMESPACE_URL, doc_id))
+
+
+def create_vector_index(dim: int, kind: str = VECTOR_INDEX) -> VectorIndex:
+    if kind == "qdrant":
+        return QdrantVectorIndex(dim)
+    if kind == "numpy":
+        return NumpyVectorIndex(dim)
+    raise ValueError(f"Unknown VECTOR_INDEX: {kind}")
@@ -0,0 +1,147 @@
+# services/write_behind.py
+import random
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Dict, List, Optional
+
+
+class WriteBehindQueue:
+    """
+    Buffers rows in memory and hands them to ``flush_rows`` in batches from a
+    background thread. A batch is flushed when ``batch_size`` rows are waiting
+    or ``flush_interval`` seconds after the first of them arrived, whichever
+    comes first. Failed batches are retried with jittered exponential backoff,
+    but only for errors ``retry_if`` accepts: re-sending a batch the store may
+    already have written would duplicate its rows.
+
+    Memory is bounded by ``max_pending``: a full queue blocks the producer for
+    up to ``enqueue_timeout`` seconds and then drops the row.
+    """
+
+    def __init__(self, flush_rows: Callable[[List[Dict]], Any], name: str = "write-behind",
+                 batch_size: int = 50, flush_interval: float = 0.5, max_pending: int = 10000,
+                 enqueue_timeout: float = 1.0, max_retries: int = 5, backoff_base: float = 0.2,
+                 backoff_cap: float = 5.0, retry_if: Optional[Callable[[Exception], bool]] = None):
+        self.flush_rows = flush_rows
+        self.retry_if = retry_if
+        self.name = name
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self.enqueue_timeout = enqueue_timeout
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_cap = backoff_cap
+
+        self._queue: deque = deque()
+        self._cond = threading.Condition()
+        self._thread = None
+        self._stopping = False
+        self._flushing = 0
+
+        self.enqueued = 0
+        self.flushed_rows = 0
+        self.flushed_batches = 0
+        self.retries = 0
+        self.dropped_rows = 0
+        self.last_flush_seconds = 0.0
+        self.max_flush_seconds = 0.0
+        self.total_flush_seconds = 0.0
+
+    def enqueue(self, row: Dict) -> bool:
+        with self._cond:
+            if self._stopping:
+                self.dropped_rows += 1
+                return False
+            self._ensure_started()
+            deadline = time.monotonic() + self.enqueue_timeout
+            while len(self._queue) >= self.max_pending:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self.dropped_rows += 1
+                    print(f"[{self.name}] Queue full, dropping row")
+                    return False
+                self._cond.wait(remaining)
+            self._queue.append(row)
+            self.enqueued += 1
+            self._cond.notify_all()
+            return True
+
+    def stop(self, timeout: float = 10.0):
+        """Flushes everything still queued, then stops the worker thread."""
+        with self._cond:
+            self._stopping = True
+            self._cond.notify_all()
+            thread = self._thread
+        if thread is not None:
+            thread.join(timeout)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._cond:
+            batches = self.flushed_batches or 1
+            return {
+                "depth": len(self._queue),
+                "in_flush": self._flushing,
+                "max_pending": self.max_pending,
+                "enqueued": self.enqueued,
+                "flushed_rows": self.flushed_rows,
+                "flushed_batches": self.flushed_batches,
+                "retries": self.retries,
+                "dropped_rows": self.dropped_rows,
+                "last_flush_ms": self.last_flush_seconds * 1000,
+                "avg_flush_ms": self.total_flush_seconds / batches * 1000,
+                "max_flush_ms": self.max_flush_seconds * 1000,
+            }
+
+    def _ensure_started(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._queue and not self._stopping:
+                    self._cond.wait()
+                if not self._queue:
+                    return
+                window_ends = time.monotonic() + self.flush_interval
+                while len(self._queue) < self.batch_size and not self._stopping:
+                    remaining = window_ends - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+                batch = [self._queue.popleft() for _ in range(min(self.batch_size, len(self._queue)))]
+                self._flushing = len(batch)
+                # Wake producers blocked on a full queue
+                self._cond.notify_all()
+            self._flush(batch)
+
+    def _flush(self, batch: List[Dict]):
+        for attempt in range(self.max_retries + 1):
+            started = time.perf_counter()
+            try:
+                self.flush_rows(batch)
+            except Exception as e:
+                if attempt == self.max_retries or (self.retry_if is not None and not self.retry_if(e)):
+                    print(f"[{self.name}] Dropping {len(batch)} rows after {attempt + 1} attempts: {e}")
+                    with self._cond:
+                        self.dropped_rows += len(batch)
+                        self._flushing = 0
+                    return
+                with self._cond:
+                    self.retries += 1
+                delay = min(self.backoff_cap, self.backoff_base * 2 ** attempt)
+                time.sleep(random.uniform(delay / 2, delay))
+                continue
+
+            elapsed = time.perf_counter() - started
+            with self._cond:
+                self.flushed_rows += len(batch)
+                self.flushed_batches += 1
+                self._flushing = 0
+                self.last_flush_seconds = elapsed
+                self.total_flush_seconds += elapsed
+                self.max_flush_seconds = max(self.max_flush_seconds, elapsed)
+            return
@@ -0,0 +1,30 @@
+# Embeds every RAG document once, offline, so app startup maps the vectors
+# instead of recomputing them.
+#
+#   cd backend && PYTHONPATH=. python training/build_embeddings.py
+#
+# With VECTOR_INDEX=qdrant the vectors are upserted into the embedded
+# Qdrant collection under QDRANT_PATH instead of written to EMBEDDINGS_PATH.
+import time
+
+from services.embeddings import EMBEDDER_PATH
+from services.rag_system import DocumentStore, EMBED_BATCH_SIZE
+from services.vector_index import EMBEDDINGS_PATH, VECTOR_INDEX, create_vector_index
+
+started = time.perf_counter()
+store = DocumentStore(vectors=False)
+embedder = store.embedder
+
+if VECTOR_INDEX == "qdrant":
+    index = create_vector_index(embedder.dim)
+    doc_ids = list(store.documents)
+    batches = [doc_ids[start:start + EMBED_BATCH_SIZE] for start in range(0, len(doc_ids), EMBED_BATCH_SIZE)]
+    # Two passes: the IDF has to be fitted on the whole corpus before any vector is final
+    embedder.fit(embedder.raw(store.embedding_text(doc_id) for doc_id in batch) for batch in batches)
+    for batch in batches:
+        index.add_many(batch, embedder.embed(store.embedding_text(doc_id) for doc_id in batch))
+    embedder.save(EMBEDDER_PATH)
+    print(f"Upserted {len(doc_ids)} vectors into Qdrant in {time.perf_counter() - started:.1f}s")
+else:
+    count = store.write_embeddings(EMBEDDINGS_PATH, EMBEDDER_PATH)
+    print(f"Wrote {count} {embedder.signature} vectors to {EMBEDDINGS_PATH} in {time.perf_counter() - started:.1f}s")